@@ -1,21 +1,21 @@
 # app/api/v1/documents.py
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Request, status
+from fastapi import APIRouter, Body, File, Form, Header, UploadFile, HTTPException, Depends, Request, status
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-import os
-import tempfile
-import shutil
+from typing import Dict, List, Optional, Tuple
+import json
 from datetime import datetime
 
 from app.database.database import get_db
-from app.database.models import DocumentMetadata
+from app.database.models import DocumentFingerprint, DocumentLSHBand, DocumentMetadata
 from app.utils.file_validator import validate_upload_file
-from app.extractors.pdf_extractor import extract_text_from_pdf, extract_metadata_from_pdf
-from app.extractors.docx_extractor import extract_text_from_docx, extract_metadata_from_docx
+from app.extractors.document_extractor import extract_document
+from app.nlp.label_sets import LabelSet
+from app.nlp.minhash import MinHasher, band_keys, similarity
+from app.nlp.profiles import ProcessingProfile, profiles, resolve_profile
 from app.nlp.semantic_analysis import (
-    perform_ner, generate_summary, classify_text,
-    extract_keywords, analyze_sentiment, identify_key_sections
+    analyze_documents, default_label_set, label_set_registry
 )
 from app.metadata.dublin_core_mapper import map_to_dublin_core
 from app.config.settings import get_settings
@@ -24,17 +24,147 @@ from app.middleware.rate_limiter import limiter
 router = APIRouter()
 settings = get_settings()
 
+minhasher = MinHasher(num_perm=settings.MINHASH_PERMUTATIONS)
+
+# Per-upload fields recomputed when a near-duplicate's analysis is reused
+_PER_UPLOAD_FIELDS = (
+    'label_set_id', 'text_length', 'word_count', 'processing_date',
+    'stage_timings', 'stage_errors', 'near_duplicate_of'
+)
+
+
+def _register_label_set(labels: List[str]) -> LabelSet:
+    """Register a client taxonomy, rejecting empty or oversized sets."""
+    if len(labels) > settings.LABEL_SET_MAX_LABELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Label sets are limited to {settings.LABEL_SET_MAX_LABELS} labels"
+        )
+    try:
+        return label_set_registry.register(labels)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _resolve_label_set(label_set_id: Optional[str], labels: Optional[str]) -> LabelSet:
+    """Resolve the upload's label set from an id or an inline label list."""
+    if labels:
+        # Accept a JSON array or a comma-separated list
+        try:
+            parsed = json.loads(labels)
+        except ValueError:
+            parsed = labels.split(',')
+        if not isinstance(parsed, list):
+            raise HTTPException(status_code=400, detail="labels must be a list")
+        return _register_label_set(parsed)
+    
+    if label_set_id:
+        label_set = label_set_registry.get(label_set_id)
+        if not label_set:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Label set {label_set_id} not found; register it again"
+            )
+        return label_set
+    
+    return default_label_set
+
+
+def _resolve_profile(profile: Optional[str], tenant: Optional[str]) -> ProcessingProfile:
+    """Resolve the upload's processing profile, rejecting unknown names."""
+    try:
+        return resolve_profile(profile, tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _find_near_duplicate(db: Session, signature) -> Optional[Tuple[DocumentMetadata, float]]:
+    """Most similar stored document above the threshold, via the LSH band index."""
+    keys = band_keys(signature, settings.MINHASH_BANDS)
+    candidate_ids = [
+        row.document_id for row in
+        db.query(DocumentLSHBand.document_id).filter(DocumentLSHBand.band_key.in_(keys)).distinct()
+    ]
+    if not candidate_ids:
+        return None
+    
+    best_id, best_score = None, settings.NEAR_DUPLICATE_THRESHOLD
+    fingerprints = db.query(DocumentFingerprint).filter(
+        DocumentFingerprint.document_id.in_(candidate_ids),
+        DocumentFingerprint.num_perm == len(signature)
+    )
+    for fingerprint in fingerprints:
+        score = similarity(signature, minhasher.from_bytes(fingerprint.signature))
+        if score >= best_score:
+            best_id, best_score = fingerprint.document_id, score
+    
+    if best_id is None:
+        return None
+    document = db.query(DocumentMetadata).filter(DocumentMetadata.id == best_id).first()
+    return (document, best_score) if document else None
+
+
+def _reusable_analysis(db: Session, signature, label_set: LabelSet,
+                       profile: ProcessingProfile) -> Optional[Dict]:
+    """A near-duplicate's analysis, if it was produced with the same label set and profile."""
+    match = _find_near_duplicate(db, signature)
+    if match is None:
+        return None
+    
+    document, score = match
+    analysis = document.extracted_metadata or {}
+    if (document.processing_status != 'completed'
+            or analysis.get('label_set_id') != label_set.id
+            or analysis.get('profile', settings.DEFAULT_PROFILE) != profile.name):
+        return None
+    
+    reused = {key: value for key, value in analysis.items() if key not in _PER_UPLOAD_FIELDS}
+    reused['near_duplicate_of'] = {'document_id': document.id, 'similarity': round(score, 4)}
+    return reused
+
+
+def _index_fingerprint(db: Session, document_id: int, signature):
+    """Store a document's signature and LSH buckets (flushed with its record)."""
+    db.add(DocumentFingerprint(
+        document_id=document_id,
+        num_perm=len(signature),
+        signature=minhasher.to_bytes(signature)
+    ))
+    db.add_all([
+        DocumentLSHBand(document_id=document_id, band_key=key)
+        for key in band_keys(signature, settings.MINHASH_BANDS)
+    ])
+
 
 @router.post("/upload", response_model=dict)
 @limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
 async def upload_documents(
     request: Request,
     files: List[UploadFile] = File(...),
+    label_set_id: Optional[str] = Form(None),
+    labels: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None),
+    x_tenant_id: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Upload and process documents to generate metadata."""
+    """Upload and process documents to generate metadata.
+    
+    Categories come from the default taxonomy unless the client passes a
+    registered ``label_set_id`` or an inline ``labels`` list. ``profile``
+    (fast, balanced or accurate) trades quality for latency; without it
+    the tenant's configured profile or the default applies.
+    
+    Documents whose text nearly matches a stored document (re-saved
+    files, changed footers, format conversions) reuse its analysis; only
+    the per-file metadata is recomputed.
+    """
+    label_set = _resolve_label_set(label_set_id, labels)
+    processing_profile = _resolve_profile(profile, x_tenant_id)
     results = []
+    pending = []
+    pending_by_hash = {}
     
+    # First pass: validate, deduplicate and extract text for every file
     for file in files:
         try:
             # Validate file
@@ -59,93 +189,59 @@ async def upload_documents(
                 })
                 continue
             
-            # Save to temporary file for processing
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-                tmp_file.write(content)
-                tmp_path = tmp_file.name
+            # Same content uploaded twice in one request: process it once
+            if file_hash in pending_by_hash:
+                pending_by_hash[file_hash]['duplicates'].append(
+                    (len(results), file.filename)
+                )
+                results.append(None)
+                continue
             
-            try:
-                # Extract text and metadata
-                text = ""
-                file_metadata = {
-                    'filename': file.filename,
-                    'format': file.content_type or 'application/octet-stream',
-                    'size': validation_result['size']
-                }
-                
-                if file_ext == '.pdf':
-                    text = extract_text_from_pdf(tmp_path)
-                    pdf_metadata = extract_metadata_from_pdf(tmp_path)
-                    file_metadata.update(pdf_metadata)
-                elif file_ext == '.docx':
-                    text = extract_text_from_docx(tmp_path)
-                    docx_metadata = extract_metadata_from_docx(tmp_path)
-                    file_metadata.update(docx_metadata)
-                elif file_ext == '.txt':
-                    text = content.decode('utf-8', errors='ignore')
-                
-                if not text or len(text.strip()) < 10:
-                    raise HTTPException(
-                        status_code=422,
-                        detail=f"Could not extract meaningful text from {file.filename}"
-                    )
-                
-                # Truncate text if too long
-                if len(text) > settings.MAX_TEXT_LENGTH:
-                    text = text[:settings.MAX_TEXT_LENGTH]
-                
-                # Perform semantic analysis
-                entities = perform_ner(text)
-                summary = generate_summary(text)
-                categories = classify_text(text)
-                keywords = extract_keywords(text)
-                sentiment = analyze_sentiment(text)
-                key_sections = identify_key_sections(text)
-                
-                # Prepare extracted metadata
-                extracted_metadata = {
-                    'entities': entities,
-                    'summary': summary,
-                    'categories': categories,
-                    'keywords': keywords,
-                    'sentiment': sentiment,
-                    'key_sections': key_sections,
-                    'text_length': len(text),
-                    'word_count': len(text.split()),
-                    'processing_date': datetime.now().isoformat()
-                }
-                
-                # Map to Dublin Core
-                dc_metadata = map_to_dublin_core(extracted_metadata, file_metadata)
-                
-                # Save to database
-                db_document = DocumentMetadata(
-                    filename=file.filename,
-                    file_hash=file_hash,
-                    file_size=validation_result['size'],
-                    file_extension=file_ext,
-                    dublin_core_metadata=dc_metadata,
-                    extracted_metadata=extracted_metadata,
-                    file_metadata=file_metadata,
-                    processing_status='completed'
+            # Extract text and metadata in one in-memory parse
+            extracted = await run_in_threadpool(extract_document, content, file_ext)
+            text = extracted['text']
+            file_metadata = {
+                'filename': file.filename,
+                'format': file.content_type or 'application/octet-stream',
+                'size': validation_result['size']
+            }
+            file_metadata.update(extracted['metadata'])
+            if extracted['page_count'] is not None:
+                file_metadata['page_count'] = extracted['page_count']
+            
+            if not text or len(text.strip()) < 10:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Could not extract meaningful text from {file.filename}"
                 )
-                db.add(db_document)
-                db.commit()
-                db.refresh(db_document)
-                
-                results.append({
-                    'filename': file.filename,
-                    'status': 'success',
-                    'document_id': db_document.id,
-                    'dublin_core_metadata': dc_metadata,
-                    'extracted_metadata': extracted_metadata,
-                    'file_metadata': file_metadata
-                })
-                
-            finally:
-                # Clean up temporary file
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+            
+            # Truncate text if too long; chunked stages still get the full text
+            full_text = text
+            if len(text) > settings.MAX_TEXT_LENGTH:
+                text = text[:settings.MAX_TEXT_LENGTH]
+            
+            signature = None
+            reused = None
+            if settings.NEAR_DUPLICATE_ENABLED:
+                signature = minhasher.signature(full_text)
+                reused = _reusable_analysis(db, signature, label_set, processing_profile)
+            
+            # Reserve the result slot so responses keep upload order
+            pending.append({
+                'index': len(results),
+                'filename': file.filename,
+                'file_hash': file_hash,
+                'file_ext': file_ext,
+                'size': validation_result['size'],
+                'file_metadata': file_metadata,
+                'text': text,
+                'full_text': full_text,
+                'signature': signature,
+                'analysis': reused,
+                'duplicates': []
+            })
+            pending_by_hash[file_hash] = pending[-1]
+            results.append(None)
                     
         except HTTPException:
             raise
@@ -156,9 +252,118 @@ async def upload_documents(
                 'error': str(e)
             })
     
+    # Parse all extracted texts in one batched spaCy pass and analyze them
+    # concurrently off the event loop, so model calls from this and other
+    # requests are micro-batched together
+    to_analyze = [item for item in pending if item['analysis'] is None]
+    if to_analyze:
+        analyses = await run_in_threadpool(
+            analyze_documents,
+            [item['text'] for item in to_analyze],
+            [item['full_text'] for item in to_analyze],
+            label_set,
+            processing_profile
+        )
+        for item, analysis in zip(to_analyze, analyses):
+            item['analysis'] = analysis
+    
+    # Second pass: persistence
+    for item in pending:
+        analysis = item['analysis']
+        try:
+            if isinstance(analysis, Exception):
+                raise analysis
+            
+            text = item['text']
+            
+            # Prepare extracted metadata
+            extracted_metadata = {
+                **analysis,
+                'label_set_id': label_set.id,
+                'text_length': len(text),
+                'word_count': len(text.split()),
+                'processing_date': datetime.now().isoformat()
+            }
+            
+            # Map to Dublin Core
+            file_metadata = item['file_metadata']
+            dc_metadata = map_to_dublin_core(extracted_metadata, file_metadata)
+            
+            # Save to database
+            db_document = DocumentMetadata(
+                filename=item['filename'],
+                file_hash=item['file_hash'],
+                file_size=item['size'],
+                file_extension=item['file_ext'],
+                dublin_core_metadata=dc_metadata,
+                extracted_metadata=extracted_metadata,
+                file_metadata=file_metadata,
+                processing_status='completed'
+            )
+            db.add(db_document)
+            if item['signature'] is not None:
+                db.flush()
+                _index_fingerprint(db, db_document.id, item['signature'])
+            db.commit()
+            db.refresh(db_document)
+            
+            results[item['index']] = {
+                'filename': item['filename'],
+                'status': 'success',
+                'document_id': db_document.id,
+                'dublin_core_metadata': dc_metadata,
+                'extracted_metadata': extracted_metadata,
+                'file_metadata': file_metadata
+            }
+            if 'near_duplicate_of' in analysis:
+                results[item['index']]['message'] = (
+                    f"Near-duplicate of document {analysis['near_duplicate_of']['document_id']}; "
+                    f"analysis reused"
+                )
+            
+        except Exception as e:
+            db.rollback()
+            results[item['index']] = {
+                'filename': item['filename'],
+                'status': 'error',
+                'error': str(e)
+            }
+        
+        for index, filename in item['duplicates']:
+            results[index] = dict(results[item['index']], filename=filename)
+            if results[index]['status'] == 'success':
+                results[index]['message'] = 'Document already processed'
+    
     return JSONResponse(content={'results': results})
 
 
+@router.post("/label-sets", response_model=dict)
+async def register_label_set(labels: List[str] = Body(..., embed=True)):
+    """Register a custom taxonomy for classification and return its id."""
+    return _register_label_set(labels).to_dict()
+
+
+@router.get("/label-sets/{label_set_id}", response_model=dict)
+async def get_label_set(label_set_id: str):
+    """Get a registered label set."""
+    label_set = label_set_registry.get(label_set_id)
+    if not label_set:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Label set {label_set_id} not found"
+        )
+    return label_set.to_dict()
+
+
+@router.get("/profiles", response_model=dict)
+async def list_profiles():
+    """List the processing profiles an upload can select."""
+    return {
+        'default': settings.DEFAULT_PROFILE,
+        'profiles': [profile.to_dict() for profile in profiles.values()]
+    }
+
+
 @router.get("/{document_id}", response_model=dict)
 async def get_document_metadata(
     document_id: int,
@@ -1,7 +1,9 @@
 # app/api/v1/health.py
 from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 from app.config.settings import get_settings
+from app.nlp.semantic_analysis import runtime_stats
 
 router = APIRouter()
 settings = get_settings()
@@ -38,3 +40,28 @@ async def api_info():
         ]
     }
 
+
+
+@router.get("/models")
+async def model_status():
+    """Report model, thread and cache state of the process that runs inference.
+    
+    With the inference server enabled that is the server, not this API
+    process; ``source`` says which one the figures describe.
+    """
+    if settings.INFERENCE_SERVER_ENABLED:
+        from app.nlp.inference_server import get_client
+        try:
+            stats = await run_in_threadpool(get_client().stats)
+        except Exception as e:
+            stats = {"error": f"Inference server unavailable: {e}"}
+        source = "inference_server"
+    else:
+        stats = runtime_stats()
+        source = "local"
+    
+    return {
+        "source": source,
+        **stats,
+        "timestamp": datetime.now().isoformat()
+    }
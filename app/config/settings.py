@@ -1,6 +1,6 @@
 # app/config/settings.py
 from pydantic_settings import BaseSettings
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from functools import lru_cache
 
 
@@ -21,6 +21,19 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "./uploads"
     TEMP_DIR: str = "./temp"
     
+    # Extraction Settings
+    PDF_EXTRACTION_WORKERS: int = 0  # Processes for per-page text extraction; 0 = min(4, cores)
+    PDF_PARALLEL_MIN_PAGES: int = 64  # Smaller PDFs are extracted in-process
+    OCR_DPI: int = 300  # Render resolution of OCRed pages
+    OCR_PAGES_IN_FLIGHT: int = 2  # Rendered pages held at once; bounds OCR memory
+    OCR_MIN_PAGE_CHARS: int = 50  # Pages whose text layer is shorter than this are OCRed
+    OCR_BLANK_MAX_INK: float = 0.0001  # Pages with a smaller share of dark pixels count as blank
+    OCR_TARGET_DPI: int = 0  # Downscale rendered pages to this resolution before OCR; 0 = keep
+    OCR_DENOISE: bool = True  # Median filter after binarization (salt-and-pepper noise)
+    OCR_DESKEW: bool = False  # Straighten pages scanned at an angle
+    OCR_DESKEW_MAX_ANGLE: float = 5.0  # Degrees searched either way
+    DOCX_STREAMING_ENABLED: bool = True  # Stream word/document.xml instead of loading python-docx's object model
+    
     # Database Settings
     DATABASE_URL: Optional[str] = "sqlite:///./metadata.db"
     DATABASE_ECHO: bool = False
@@ -37,8 +50,96 @@ class Settings(BaseSettings):
     # Model Settings
     MODEL_CACHE_DIR: str = "./models"
     USE_GPU: bool = False
-    BATCH_SIZE: int = 8
+    INFERENCE_BACKEND: str = "torch"  # torch (fp32), int8 (dynamic quantization) or onnx (needs optimum[onnxruntime])
+    INFERENCE_PARITY_MIN_F1: float = 0.6  # Summaries: min token-overlap F1 vs fp32
+    INFERENCE_PARITY_MAX_SCORE_DIFF: float = 0.1  # Classifiers: max score drift vs fp32
+    BATCH_SIZE: int = 8  # Max inputs per micro-batched forward pass
+    BATCH_MAX_WAIT_MS: int = 10  # Max time a call waits for a batch to fill
+    INFERENCE_BATCHING_ENABLED: bool = True
     MAX_TEXT_LENGTH: int = 10000  # Max characters for processing
+    ENABLED_MODELS: List[str] = [
+        "spacy", "summarizer", "classifier", "keybert", "sentiment",
+        "summarizer_distilled", "sentiment_distilled"
+    ]
+    MODEL_WARMUP_ON_STARTUP: bool = False  # Load models in the lifespan hook
+    MODEL_WARMUP_MODELS: List[str] = []  # Empty = every enabled model
+    MODEL_MEMORY_BUDGET_MB: int = 0  # Evict least recently used models above this; 0 = unlimited
+    MODEL_PINNED: List[str] = ["spacy"]  # Never evicted
+    MODEL_EVICTION_MIN_IDLE_S: float = 5.0  # Models used more recently than this are kept
+    THREAD_BUDGET_ENABLED: bool = True  # Split cores across workers and libraries at process start
+    THREAD_BUDGET_CORES: int = 0  # Cores to split; 0 = CPU affinity / cgroup quota
+    THREAD_BUDGET_WORKERS: int = 1  # Inference processes sharing those cores (Celery uses its concurrency)
+    TORCH_INTRA_OP_THREADS: int = 0  # 0 = cores / workers
+    TORCH_INTER_OP_THREADS: int = 0  # 0 = 1
+    BLAS_THREADS: int = 0  # NumPy/spaCy BLAS threads; 0 = cores / workers
+    TOKENIZERS_PARALLELISM: bool = False  # HF tokenizers' own thread pool
+    MODEL_SNAPSHOTS_ENABLED: bool = True  # Save evicted torch models as local safetensors for fast reloads
+    TOKEN_CACHE_SIZE: int = 256  # Recent documents' token ids kept per tokenizer family
+    PHRASE_EMBEDDING_CACHE_ENABLED: bool = True  # Persist KeyBERT candidate embeddings
+    PHRASE_EMBEDDING_CACHE_DIR: str = "./models/phrase_embeddings"
+    PHRASE_EMBEDDING_CACHE_MAX_PHRASES: int = 200000  # float16 rows in the memory-mapped matrix
+    TOKEN_CACHE_PREFIX_CHARS: int = 8192  # Characters tokenized per document; keep <= MAX_TEXT_LENGTH
+    
+    # Processing Profiles (per upload or per tenant)
+    DEFAULT_PROFILE: str = "accurate"  # fast, balanced or accurate
+    PROCESSING_PROFILES: Dict[str, Dict[str, Any]] = {}  # Overrides or new profiles, e.g. {"bulk": {"base": "fast"}}
+    TENANT_PROFILES: Dict[str, str] = {}  # X-Tenant-ID header value -> profile name
+    
+    # Analysis Pipeline Settings
+    PIPELINE_MAX_WORKERS: int = 8  # Threads shared by all documents' analysis stages
+    PIPELINE_STAGE_TIMEOUT_S: float = 120.0  # Default per-stage timeout
+    PIPELINE_STAGE_TIMEOUTS: Dict[str, float] = {}  # Per-stage overrides, e.g. {"summary": 30}
+    
+    # Stage Result Cache Settings
+    STAGE_CACHE_ENABLED: bool = True
+    STAGE_CACHE_MAX_ENTRIES: int = 2048  # In-process LRU entries (Redis tier when REDIS_ENABLED)
+    STAGE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    STAGE_CACHE_VERSION: str = "2"  # Bump to invalidate results after model changes
+    
+    # Inference Server Settings (one shared copy of the models per node)
+    INFERENCE_SERVER_ENABLED: bool = False  # Send analysis to the server instead of loading models
+    INFERENCE_SERVER_SOCKET: str = "/tmp/metadata-inference.sock"
+    INFERENCE_SERVER_AUTHKEY: Optional[str] = None  # Defaults to SECRET_KEY
+    INFERENCE_SERVER_SHM_THRESHOLD: int = 64 * 1024  # Texts above this many bytes use shared memory
+    INFERENCE_SERVER_TIMEOUT_S: float = 300.0  # Max wait for a response before giving up on the server
+    INFERENCE_SERVER_FALLBACK_LOCAL: bool = False  # Analyze in-process when the server is down or hung
+    
+    # Classification Settings
+    CLASSIFIER_MODE: str = "zero_shot"  # zero_shot (BART-MNLI) or embedding
+    CLASSIFIER_MIN_MARGIN: float = 0.03  # Below this top-1/top-2 gap, fall back to MNLI
+    LABEL_SET_CACHE_SIZE: int = 256  # Custom label sets kept with cached hypothesis encodings
+    LABEL_SET_MAX_LABELS: int = 100
+    NLI_MAX_PAIRS_PER_FORWARD: int = 64  # Premise/hypothesis pairs per forward pass
+    
+    # Summarization Settings
+    SUMMARY_MODE: str = "truncate"  # truncate (first 1024 tokens), map_reduce or extractive
+    SUMMARY_MAX_LENGTH: int = 150  # Max tokens of a generated summary
+    SUMMARY_CHUNK_TOKENS: int = 900  # Token budget per chunk in map_reduce mode
+    SUMMARY_MAX_CHUNKS: int = 16  # Chunks beyond this are sampled evenly
+    SUMMARY_CONCURRENCY: int = 4  # Chunk summaries in flight at once
+    SUMMARY_TIME_BUDGET_S: float = 60.0  # Total time budget per document
+    SUMMARY_CHUNK_MAX_LENGTH: int = 120  # Max tokens of each partial summary
+    SUMMARY_EXTRACTIVE_SENTENCES: int = 3  # Sentences in an extractive summary
+    SUMMARY_EXTRACTIVE_MAX_CANDIDATES: int = 1000  # Longer documents are sampled evenly
+    SUMMARY_EXTRACTIVE_FALLBACK: bool = True  # Extract when the abstractive model fails or runs out of time
+    
+    # Near-Duplicate Detection Settings
+    NEAR_DUPLICATE_ENABLED: bool = True  # Reuse metadata of documents with nearly the same text
+    NEAR_DUPLICATE_THRESHOLD: float = 0.9  # Min estimated Jaccard similarity of word 5-gram shingles
+    MINHASH_PERMUTATIONS: int = 128
+    MINHASH_BANDS: int = 16  # LSH bands; rows per band = permutations / bands
+    
+    # Windowed Analysis Settings
+    WINDOWED_STAGES: List[str] = []  # "sentiment" and/or "classification"
+    WINDOW_TOKENS: int = 256  # Tokens per window
+    WINDOW_STRIDE_TOKENS: int = 224  # Step between window starts (overlap = difference)
+    WINDOW_MAX_WINDOWS: int = 8  # Windows kept per document, sampled by salience
+    
+    # spaCy Settings
+    SPACY_MODEL: str = "en_core_web_sm"
+    SPACY_BATCH_SIZE: int = 16  # Documents per nlp.pipe batch
+    SPACY_N_PROCESS: int = 1  # Worker processes for nlp.pipe (1 = in-process)
+    SPACY_DISABLED_COMPONENTS: List[str] = ["tagger", "attribute_ruler", "lemmatizer"]
     
     # Security Settings
     CORS_ORIGINS: List[str] = ["http://localhost:8000", "http://localhost:3000"]
@@ -65,7 +166,21 @@ class Settings(BaseSettings):
     
     # Language Detection
     LANGUAGE_DETECTION_ENABLED: bool = True
-    SUPPORTED_LANGUAGES: List[str] = ["en", "es", "fr", "de", "it"]
+    SUPPORTED_LANGUAGES: List[str] = ["en", "es", "fr", "de", "it"]  # Trigram languages that gate stages; others (pt, nl) run every stage
+    LANGUAGE_MIN_CONFIDENCE: float = 0.1  # Below this the language is 'und' and every stage runs
+    LANGUAGE_MIN_LETTERS: int = 150  # Shorter Latin-script text is 'und' (codes and numbers mislead trigrams)
+    LANGUAGE_MIN_MARGIN: float = 0.2  # Lead over the runner-up profile needed; mixed-language text is 'und'
+    # Languages each stage's model handles; other languages skip the stage
+    STAGE_LANGUAGES: Dict[str, List[str]] = {
+        "entities": ["en"],
+        "summary": ["en"],
+        "keywords": ["en"],
+        "categories": ["en"],
+        "category_scores": ["en"],
+        "sentiment": ["en"]
+    }
+    # Sentiment for these languages is rerouted when "sentiment_multilingual" is in ENABLED_MODELS
+    MULTILINGUAL_SENTIMENT_LANGUAGES: List[str] = ["ar", "de", "en", "es", "fr", "hi", "it", "pt"]
     
     class Config:
         env_file = ".env"
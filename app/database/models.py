@@ -1,5 +1,5 @@
 # app/database/models.py
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -46,6 +46,7 @@ class DocumentMetadata(Base):
     # Relationships
     user = relationship("User", back_populates="documents")
     jobs = relationship("ProcessingJob", back_populates="document")
+    fingerprint = relationship("DocumentFingerprint", back_populates="document", uselist=False)
     
     # Indexes
     __table_args__ = (
@@ -53,6 +54,28 @@ class DocumentMetadata(Base):
     )
 
 
+class DocumentFingerprint(Base):
+    """MinHash signature of a document's extracted text."""
+    __tablename__ = "document_fingerprints"
+    
+    document_id = Column(Integer, ForeignKey("document_metadata.id"), primary_key=True)
+    num_perm = Column(Integer, nullable=False)
+    signature = Column(LargeBinary, nullable=False)  # num_perm little-endian uint32
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    document = relationship("DocumentMetadata", back_populates="fingerprint")
+
+
+class DocumentLSHBand(Base):
+    """LSH bucket of one signature band; documents sharing a bucket are candidates."""
+    __tablename__ = "document_lsh_bands"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("document_metadata.id"), nullable=False, index=True)
+    band_key = Column(String(32), nullable=False, index=True)  # "<band>:<hash of the band's rows>"
+
+
 class ProcessingJob(Base):
     """Background job tracking model."""
     __tablename__ = "processing_jobs"
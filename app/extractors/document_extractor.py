@@ -0,0 +1,28 @@
+# app/extractors/document_extractor.py
+import logging
+from typing import Dict, Union
+
+from app.extractors.docx_extractor import extract_docx
+from app.extractors.pdf_extractor import extract_pdf
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Content = Union[bytes, bytearray, memoryview]
+
+
+def extract_document(content: Content, file_ext: str) -> Dict:
+    """Text, metadata and page count of uploaded content, parsed in memory.
+    
+    Each format is parsed once, straight from ``content``; no temporary
+    file is written. Unsupported extensions yield empty text.
+    """
+    if file_ext == '.pdf':
+        return extract_pdf(content)
+    if file_ext == '.docx':
+        return extract_docx(content)
+    if file_ext == '.txt':
+        return {'text': bytes(content).decode('utf-8', errors='ignore'), 'metadata': {}, 'page_count': None}
+    
+    logger.error(f"No extractor for {file_ext} files")
+    return {'text': "", 'metadata': {}, 'page_count': None}
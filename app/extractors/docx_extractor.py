@@ -2,65 +2,270 @@
 from docx import Document
 from docx.shared import Inches
 import logging
-from typing import Dict, List
+import re
+import zipfile
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Dict, IO, Iterator, List, Optional, Union
+from xml.etree import ElementTree
+
+from app.config.settings import get_settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_text_from_docx(file_path: str) -> str:
-    """Extract text from DOCX file with structure preservation."""
-    try:
-        doc = Document(file_path)
-        
-        # Extract paragraphs
-        paragraphs = []
-        for para in doc.paragraphs:
-            if para.text.strip():
-                paragraphs.append(para.text.strip())
-        
-        # Extract tables
-        table_texts = []
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    if cell.text.strip():
-                        row_text.append(cell.text.strip())
-                if row_text:
-                    table_texts.append(" | ".join(row_text))
+settings = get_settings()
+
+# A file path, or the file content itself
+DocxSource = Union[str, bytes, bytearray, memoryview]
+
+_APP_PROPERTIES_PART = '/docProps/app.xml'
+_PAGES = re.compile(rb'<(?:\w+:)?Pages>(\d+)</(?:\w+:)?Pages>')
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Alternate content: Word writes text boxes and shapes twice, as mc:Choice
+# and as an mc:Fallback copy for older readers; only the Choice is read
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+_CORE_NAMESPACES = {
+    'cp': 'http://schemas.openxmlformats.org/package/2006/metadata/core-properties',
+    'dc': 'http://purl.org/dc/elements/1.1/',
+    'dcterms': 'http://purl.org/dc/terms/',
+}
+# Run content other than w:t, as python-docx renders it
+_BREAKS = {_W + 'tab': '\t', _W + 'br': '\n', _W + 'cr': '\n'}
+
+def open_docx(source: DocxSource) -> Document:
+    """Open a DOCX from a path, or parse it straight from memory."""
+    if isinstance(source, str):
+        return Document(source)
+    return Document(BytesIO(source))
+
+def _document_text(doc) -> str:
+    # Extract paragraphs
+    paragraphs = []
+    for para in doc.paragraphs:
+        if para.text.strip():
+            paragraphs.append(para.text.strip())
+    
+    # Extract tables
+    table_texts = []
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = []
+            for cell in row.cells:
+                if cell.text.strip():
+                    row_text.append(cell.text.strip())
+            if row_text:
+                table_texts.append(" | ".join(row_text))
+    
+    # Combine all text
+    all_text = paragraphs + table_texts
+    text = "\n".join(all_text)
+    
+    logger.info(f"Extracted {len(text)} characters from DOCX")
+    return text
+
+def _document_metadata(doc) -> Dict:
+    core_props = doc.core_properties
+    return {
+        'title': core_props.title or '',
+        'author': core_props.author or '',
+        'subject': core_props.subject or '',
+        'keywords': core_props.keywords or '',
+        'comments': core_props.comments or '',
+        'created': core_props.created.isoformat() if core_props.created else '',
+        'modified': core_props.modified.isoformat() if core_props.modified else '',
+        'last_modified_by': core_props.last_modified_by or '',
+        'revision': core_props.revision or '',
+        'category': core_props.category or ''
+    }
+
+def _page_count(doc) -> Optional[int]:
+    """Page count Word stored in the extended properties, if any (DOCX has no layout)."""
+    for part in doc.part.package.iter_parts():
+        if part.partname == _APP_PROPERTIES_PART:
+            match = _PAGES.search(part.blob)
+            return int(match.group(1)) if match else None
+    return None
+
+def _open_package(source: DocxSource) -> zipfile.ZipFile:
+    if isinstance(source, str):
+        return zipfile.ZipFile(source)
+    return zipfile.ZipFile(BytesIO(source))
+
+def _paragraph_text(paragraph: ElementTree.Element) -> str:
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == _W + 't':
+            parts.append(element.text or '')
+        elif element.tag in _BREAKS:
+            parts.append(_BREAKS[element.tag])
+    return ''.join(parts)
+
+def _continues_merge(cell: ElementTree.Element) -> bool:
+    """Whether a cell continues a merge started above (vMerge) or to its left (legacy hMerge)."""
+    properties = cell.find(_W + 'tcPr')
+    if properties is None:
+        return False
+    for tag in ('vMerge', 'hMerge'):
+        merge = properties.find(_W + tag)
+        if merge is not None and merge.get(_W + 'val', 'continue') == 'continue':
+            return True
+    return False
+
+def iter_document_blocks(stream: IO[bytes]) -> Iterator[str]:
+    """Paragraph and table-row text of ``word/document.xml``, in document order.
+    
+    Parsed incrementally: every paragraph, cell and row is cleared once
+    its text is taken, and finished body elements are dropped, so memory
+    stays flat for long documents. Rows are emitted as ``a | b | c``, and
+    merged cells are emitted once. A nested table's rows become part of
+    the enclosing cell's text. ``mc:Fallback`` copies of alternate content
+    are skipped.
+    """
+    cells: List[List[str]] = []  # Paragraph texts of the open cells, innermost last
+    rows: List[List[str]] = []  # Cell texts of the open rows
+    body = None
+    depth = 0
+    fallback = 0  # Open mc:Fallback elements around the current one
+    
+    for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+        tag = element.tag
+        if tag == _MC_FALLBACK:
+            fallback += 1 if event == 'start' else -1
+        if fallback or tag == _MC_FALLBACK:
+            depth += 1 if event == 'start' else -1
+            if event == 'end' and tag == _MC_FALLBACK:
+                # Keep its text out of the enclosing paragraph too
+                element.clear()
+            continue
         
-        # Combine all text
-        all_text = paragraphs + table_texts
-        text = "\n".join(all_text)
+        if event == 'start':
+            depth += 1
+            if tag == _W + 'body':
+                body = element
+            elif tag == _W + 'tr':
+                rows.append([])
+            elif tag == _W + 'tc':
+                cells.append([])
+            continue
         
-        logger.info(f"Extracted {len(text)} characters from DOCX")
-        return text
+        depth -= 1
+        if tag == _W + 'p':
+            text = _paragraph_text(element).strip()
+            if cells:
+                cells[-1].append(text)
+            elif text:
+                yield text
+            element.clear()
+        elif tag == _W + 'tc':
+            cell_text = "\n".join(cells.pop()).strip()
+            if cell_text and rows and not _continues_merge(element):
+                rows[-1].append(cell_text)
+            element.clear()
+        elif tag == _W + 'tr':
+            row = rows.pop()
+            if row:
+                if cells:
+                    cells[-1].append(" | ".join(row))
+                else:
+                    yield " | ".join(row)
+            element.clear()
         
+        # A direct child of the body is finished; nothing before it is needed
+        if depth == 2 and body is not None:
+            body.clear()
+
+def _w3cdtf(value: str) -> str:
+    """ISO timestamp as python-docx reports it: naive UTC, or '' when unparseable."""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return ''
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+def _core_metadata(package: zipfile.ZipFile) -> Dict:
+    """Metadata from ``docProps/core.xml``, in the shape of ``_document_metadata``."""
+    try:
+        root = ElementTree.fromstring(package.read('docProps/core.xml'))
+    except KeyError:
+        root = None
+    
+    def value(name: str) -> str:
+        element = root.find(name, _CORE_NAMESPACES) if root is not None else None
+        return (element.text or '').strip() if element is not None else ''
+    
+    revision = value('cp:revision')
+    return {
+        'title': value('dc:title'),
+        'author': value('dc:creator'),
+        'subject': value('dc:subject'),
+        'keywords': value('cp:keywords'),
+        'comments': value('dc:description'),
+        'created': _w3cdtf(value('dcterms:created')),
+        'modified': _w3cdtf(value('dcterms:modified')),
+        'last_modified_by': value('cp:lastModifiedBy'),
+        'revision': int(revision) if revision.isdigit() and int(revision) > 0 else '',
+        'category': value('cp:category')
+    }
+
+def _package_page_count(package: zipfile.ZipFile) -> Optional[int]:
+    try:
+        match = _PAGES.search(package.read('docProps/app.xml'))
+    except KeyError:
+        return None
+    return int(match.group(1)) if match else None
+
+def _extract_streaming(source: DocxSource) -> Dict:
+    with _open_package(source) as package:
+        metadata = _core_metadata(package)
+        page_count = _package_page_count(package)
+        with package.open('word/document.xml') as stream:
+            text = "\n".join(iter_document_blocks(stream))
+    
+    logger.info(f"Extracted {len(text)} characters from DOCX")
+    return {'text': text, 'metadata': metadata, 'page_count': page_count}
+
+def extract_docx(source: DocxSource) -> Dict:
+    """Text, metadata and page count from a single parse of the DOCX.
+    
+    ``source`` may be the uploaded bytes, so nothing touches the disk.
+    The document XML is streamed (``DOCX_STREAMING_ENABLED``), falling
+    back to python-docx if that fails. Returns empty text and metadata
+    when the file cannot be read.
+    """
+    if settings.DOCX_STREAMING_ENABLED:
+        try:
+            return _extract_streaming(source)
+        except Exception as e:
+            logger.warning(f"Streaming DOCX extraction failed ({e}); using python-docx")
+    
+    result = {'text': "", 'metadata': {}, 'page_count': None}
+    try:
+        doc = open_docx(source)
+        result['metadata'] = _document_metadata(doc)
+        result['page_count'] = _page_count(doc)
+        result['text'] = _document_text(doc)
     except Exception as e:
         logger.error(f"DOCX extraction failed: {e}")
-        return ""
+    return result
 
-def extract_metadata_from_docx(file_path: str) -> Dict:
+def extract_text_from_docx(file_path: DocxSource) -> str:
+    """Extract text from DOCX file with structure preservation."""
+    return extract_docx(file_path)['text']
+
+def extract_metadata_from_docx(file_path: DocxSource) -> Dict:
     """Extract metadata from DOCX file."""
     metadata = {}
     
     try:
-        doc = Document(file_path)
-        core_props = doc.core_properties
-        
-        metadata.update({
-            'title': core_props.title or '',
-            'author': core_props.author or '',
-            'subject': core_props.subject or '',
-            'keywords': core_props.keywords or '',
-            'comments': core_props.comments or '',
-            'created': core_props.created.isoformat() if core_props.created else '',
-            'modified': core_props.modified.isoformat() if core_props.modified else '',
-            'last_modified_by': core_props.last_modified_by or '',
-            'revision': core_props.revision or '',
-            'category': core_props.category or ''
-        })
-        
+        if settings.DOCX_STREAMING_ENABLED:
+            with _open_package(file_path) as package:
+                metadata.update(_core_metadata(package))
+        else:
+            metadata.update(_document_metadata(open_docx(file_path)))
     except Exception as e:
         logger.error(f"DOCX metadata extraction failed: {e}")
     
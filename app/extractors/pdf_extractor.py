@@ -1,104 +1,381 @@
 # app/extractors/pdf_extractor.py
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
+import numpy as np
 from PIL import Image, ImageFilter, ImageOps
 import pytesseract
+import math
+import multiprocessing
 import os
 import tempfile
 import logging
-from typing import Optional
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterable, List, Optional, Union
+
+from app.config.settings import get_settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def preprocess_image_for_ocr(image: Image.Image) -> Image.Image:
-    """Enhanced image preprocessing for better OCR accuracy."""
+settings = get_settings()
+
+# Shared page-extraction pool, started on the first large PDF
+_page_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+
+# Tesseract runs as a subprocess, so threads are enough to overlap it with rendering
+_ocr_pool = ThreadPoolExecutor(
+    max_workers=max(1, settings.OCR_PAGES_IN_FLIGHT), thread_name_prefix='ocr'
+)
+
+# Blank-page check: low-resolution render, pixels darker than the ink level count as content
+_BLANK_CHECK_DPI = 36
+_INK_LEVEL = 200
+
+# A file path, or the file content itself
+PdfSource = Union[str, bytes, bytearray, memoryview]
+
+# Configure Tesseract for better accuracy
+TESSERACT_CONFIG = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,!?;:()[]{}"\'-/\\ '
+
+def otsu_threshold(histogram) -> int:
+    """Gray level maximizing the between-class variance of a 256-bin histogram."""
+    counts = np.asarray(histogram, dtype=np.float64)[:256]
+    levels = np.arange(256, dtype=np.float64)
+    background = np.cumsum(counts)
+    foreground = background[-1] - background
+    cumulative_mean = np.cumsum(counts * levels)
+    total_mean = cumulative_mean[-1]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = (total_mean * background - background[-1] * cumulative_mean) ** 2 / (background * foreground)
+    between[~np.isfinite(between)] = 0.0
+    return int(np.argmax(between))
+
+def estimate_skew(binary: Image.Image, max_angle: float = 5.0, step: float = 0.5) -> float:
+    """Rotation (degrees) that best aligns text lines, by projection-profile variance."""
+    # A thumbnail is enough to find the angle
+    thumbnail = binary.copy()
+    thumbnail.thumbnail((800, 800))
+    ink = Image.eval(thumbnail, lambda value: 255 - value)
+    
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step / 2, step):
+        rows = np.asarray(ink.rotate(float(angle), resample=Image.NEAREST), dtype=np.float32).sum(axis=1)
+        # Aligned lines give sharp peaks and gaps between rows
+        score = float(np.var(rows))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+def preprocess_image_for_ocr(image: Image.Image, dpi: Optional[int] = None) -> Image.Image:
+    """Enhanced image preprocessing for better OCR accuracy.
+    
+    Binarizes at the Otsu threshold computed from the image histogram and
+    applied as a lookup table, so no per-pixel Python runs and each step
+    allocates at most one new image. ``dpi`` is the render resolution,
+    used to downscale to ``OCR_TARGET_DPI``.
+    """
     try:
-        # Convert to grayscale
-        gray = image.convert('L')
+        # Convert to grayscale (pages are already rendered as grayscale)
+        gray = image if image.mode == 'L' else image.convert('L')
+        
+        # Downscale oversampled renders before any per-pixel work
+        if settings.OCR_TARGET_DPI and dpi and dpi > settings.OCR_TARGET_DPI:
+            scale = settings.OCR_TARGET_DPI / dpi
+            gray = gray.resize(
+                (max(1, round(gray.width * scale)), max(1, round(gray.height * scale))),
+                Image.BILINEAR, reducing_gap=2.0
+            )
         
         # Apply Gaussian blur to reduce noise
         blurred = gray.filter(ImageFilter.GaussianBlur(radius=0.5))
         
-        # Apply binary thresholding using Otsu's method
-        threshold = 128
-        binary = blurred.point(lambda x: 0 if x < threshold else 255, '1')
+        # Apply binary thresholding using Otsu's method, via a lookup table
+        threshold = otsu_threshold(blurred.histogram())
+        lut = [0] * (threshold + 1) + [255] * (255 - threshold)
+        binary = blurred.point(lut)
         
         # Apply median filter to remove salt-and-pepper noise
-        filtered_img = binary.filter(ImageFilter.MedianFilter(size=3))
+        if settings.OCR_DENOISE:
+            binary = binary.filter(ImageFilter.MedianFilter(size=3))
         
-        # Convert back to grayscale for OCR
-        processed = filtered_img.convert('L')
+        if settings.OCR_DESKEW:
+            angle = estimate_skew(binary, settings.OCR_DESKEW_MAX_ANGLE)
+            if angle:
+                binary = binary.rotate(angle, resample=Image.NEAREST, expand=True, fillcolor=255)
+                logger.debug(f"Deskewed page by {angle} degrees")
         
-        return processed
+        return binary
     except Exception as e:
         logger.error(f"Image preprocessing failed: {e}")
         return image.convert('L')
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extract text from PDF with enhanced OCR fallback."""
-    text = ""
+class _SharedPdf:
+    """PDF bytes placed in shared memory once; workers receive only the name."""
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self.size = len(data)
+        self._segment = SharedMemory(create=True, size=max(1, self.size))
+        self._segment.buf[:self.size] = data
+        self.name = self._segment.name
+
+    def __getstate__(self):
+        return {'name': self.name, 'size': self.size}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._segment = None
+
+    def read(self) -> bytes:
+        segment = SharedMemory(name=self.name)
+        try:
+            return bytes(segment.buf[:self.size])
+        finally:
+            segment.close()
+
+    def release(self):
+        self._segment.close()
+        self._segment.unlink()
+
+def open_pdf(source: PdfSource) -> fitz.Document:
+    """Open a PDF from a path, or parse it straight from memory."""
+    if isinstance(source, str):
+        return fitz.open(source)
+    if isinstance(source, _SharedPdf):
+        source = source.read()
+    if isinstance(source, memoryview):
+        source = source.tobytes()
+    return fitz.open(stream=source, filetype='pdf')
+
+def _extraction_workers() -> int:
+    if settings.PDF_EXTRACTION_WORKERS:
+        return settings.PDF_EXTRACTION_WORKERS
+    from app.nlp.thread_budget import available_cores
+    return min(4, available_cores())
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is None:
+            # Spawned workers do not inherit the parent's threads or loaded models
+            _page_pool = ProcessPoolExecutor(
+                max_workers=_extraction_workers(),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _page_pool
+
+def _reset_page_pool():
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False, cancel_futures=True)
+        _page_pool = None
+
+def _extract_page_range(source: Union[PdfSource, _SharedPdf], start: int, stop: int) -> List[str]:
+    """Text of pages ``start`` to ``stop`` (exclusive); runs in a pool worker."""
+    page_texts = []
+    with open_pdf(source) as doc:
+        for page_num in range(start, stop):
+            page_text = doc[page_num].get_text()
+            page_texts.append(page_text)
+            logger.debug(f"Extracted {len(page_text)} characters from page {page_num + 1}")
+    return page_texts
+
+def _page_ranges(page_count: int, parts: int) -> List[range]:
+    size = math.ceil(page_count / parts)
+    return [range(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def _document_page_texts(doc: fitz.Document, source: PdfSource) -> List[str]:
+    page_count = doc.page_count
+    if page_count < settings.PDF_PARALLEL_MIN_PAGES:
+        page_texts = []
+        for page_num, page in enumerate(doc):
+            page_texts.append(page.get_text())
+            logger.debug(f"Extracted {len(page_texts[-1])} characters from page {page_num + 1}")
+        return page_texts
     
+    ranges = _page_ranges(page_count, _extraction_workers())
+    # Workers get the path, or the name of one shared copy of the bytes
+    # instead of the whole PDF pickled into every range task
+    shared = None if isinstance(source, str) else _SharedPdf(source)
     try:
-        # First attempt: Direct text extraction
-        with fitz.open(file_path) as doc:
-            for page_num, page in enumerate(doc):
-                page_text = page.get_text()
-                text += page_text
-                logger.info(f"Extracted {len(page_text)} characters from page {page_num + 1}")
-        
-        # Check if extraction was successful
-        if len(text.strip()) < 100:
-            logger.info("Low text content detected, falling back to OCR")
-            
-            # OCR fallback with preprocessing
-            try:
-                images = convert_from_path(file_path, dpi=300)
-                ocr_texts = []
-                
-                for i, img in enumerate(images):
-                    # Preprocess image for better OCR
-                    processed_img = preprocess_image_for_ocr(img)
-                    
-                    # Configure Tesseract for better accuracy
-                    custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,!?;:()[]{}"\'-/\\ '
-                    
-                    ocr_result = pytesseract.image_to_string(
-                        processed_img, 
-                        config=custom_config
-                    )
-                    ocr_texts.append(ocr_result)
-                    logger.info(f"OCR extracted {len(ocr_result)} characters from page {i + 1}")
-                
-                text = "\n".join(ocr_texts)
-                
-            except Exception as ocr_error:
-                logger.error(f"OCR processing failed: {ocr_error}")
-                return ""
-                
+        pool = _get_page_pool()
+        futures = [
+            pool.submit(_extract_page_range, shared or source, pages.start, pages.stop)
+            for pages in ranges
+        ]
+        page_texts = [text for future in futures for text in future.result()]
+    except BrokenProcessPool as e:
+        logger.error(f"Page extraction pool failed ({e}); extracting in-process")
+        _reset_page_pool()
+        page_texts = [page.get_text() for page in doc]
+    finally:
+        if shared is not None:
+            shared.release()
+    
+    logger.info(f"Extracted text from {page_count} pages in {len(ranges)} ranges")
+    return page_texts
+
+def extract_page_texts(source: PdfSource) -> List[str]:
+    """Text layer of every page, in page order.
+    
+    Large documents are split into contiguous page ranges extracted in
+    parallel worker processes, each opening the file (or bytes) itself.
+    """
+    with open_pdf(source) as doc:
+        return _document_page_texts(doc, source)
+
+def render_page(page: fitz.Page, dpi: int) -> Image.Image:
+    """Render one page straight to an 8-bit grayscale image."""
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+    return Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+
+def is_blank_page(page: fitz.Page) -> bool:
+    """Whether a page is visually empty, from the histogram of a thumbnail render."""
+    pixmap = page.get_pixmap(dpi=_BLANK_CHECK_DPI, colorspace=fitz.csGRAY, alpha=False)
+    pixels = np.frombuffer(pixmap.samples, dtype=np.uint8)
+    if not pixels.size:
+        return True
+    histogram = np.bincount(pixels, minlength=256)
+    return histogram[:_INK_LEVEL].sum() / pixels.size < settings.OCR_BLANK_MAX_INK
+
+def _ocr_image(image: Image.Image) -> str:
+    # Preprocess image for better OCR
+    processed_img = preprocess_image_for_ocr(image, settings.OCR_DPI)
+    return pytesseract.image_to_string(processed_img, config=TESSERACT_CONFIG)
+
+def _completed(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+def ocr_pages(source: PdfSource, page_numbers: Optional[Iterable[int]] = None) -> List[str]:
+    """OCR pages (all by default) in order, with bounded memory.
+    
+    Pages are rendered one at a time, and at most ``OCR_PAGES_IN_FLIGHT``
+    rendered pages exist at once: the next page is rendered only after
+    the oldest one in flight has been recognized. Peak memory therefore
+    does not grow with the page count. Visually blank pages are skipped
+    and yield an empty string.
+    """
+    with open_pdf(source) as doc:
+        return _ocr_document(doc, page_numbers)
+
+def _ocr_document(doc: fitz.Document, page_numbers: Optional[Iterable[int]] = None) -> List[str]:
+    in_flight_limit = max(1, settings.OCR_PAGES_IN_FLIGHT)
+    texts = []
+    in_flight = deque()
+    
+    if page_numbers is None:
+        page_numbers = range(doc.page_count)
+    for page_num in page_numbers:
+        if len(in_flight) >= in_flight_limit:
+            texts.append(in_flight.popleft().result())
+        page = doc[page_num]
+        if is_blank_page(page):
+            logger.debug(f"Page {page_num + 1} is blank, skipping OCR")
+            in_flight.append(_completed(""))
+            continue
+        image = render_page(page, settings.OCR_DPI)
+        in_flight.append(_ocr_pool.submit(_ocr_image, image))
+        del image
+        logger.debug(f"Rendered page {page_num + 1} for OCR")
+    
+    while in_flight:
+        texts.append(in_flight.popleft().result())
+    return texts
+
+def sparse_pages(page_texts: List[str]) -> List[int]:
+    """Pages whose text layer is empty or too short to be the page's content."""
+    return [
+        page_num for page_num, page_text in enumerate(page_texts)
+        if len(page_text.strip()) < settings.OCR_MIN_PAGE_CHARS
+    ]
+
+def ocr_sparse_pages(source: PdfSource, page_texts: List[str]) -> Dict[int, str]:
+    """OCR text of the pages lacking a text layer, by page number."""
+    with open_pdf(source) as doc:
+        return _ocr_sparse_document(doc, page_texts)
+
+def _ocr_sparse_document(doc: fitz.Document, page_texts: List[str]) -> Dict[int, str]:
+    page_numbers = sparse_pages(page_texts)
+    if not page_numbers:
+        return {}
+    
+    logger.info(f"OCR for {len(page_numbers)} of {len(page_texts)} pages without a text layer")
+    ocr_texts = dict(zip(page_numbers, _ocr_document(doc, page_numbers)))
+    blank = sum(1 for text in ocr_texts.values() if not text)
+    logger.info(f"OCR extracted {sum(map(len, ocr_texts.values()))} characters ({blank} blank pages skipped)")
+    return ocr_texts
+
+def _document_text(doc: fitz.Document, source: PdfSource) -> str:
+    # Direct text extraction first
+    page_texts = _document_page_texts(doc, source)
+    
+    # Hybrid OCR: scanned pages in an otherwise digital PDF are recovered,
+    # and a text cover page no longer prevents OCR of the scanned rest
+    try:
+        ocr_texts = _ocr_sparse_document(doc, page_texts)
+    except Exception as ocr_error:
+        logger.error(f"OCR processing failed: {ocr_error}")
+        ocr_texts = {}
+    
+    for page_num, ocr_text in ocr_texts.items():
+        if len(ocr_text.strip()) > len(page_texts[page_num].strip()):
+            page_texts[page_num] = ocr_text.rstrip() + "\n"
+    
+    # Joined once, in page order
+    return "".join(page_texts).strip()
+
+def _document_metadata(doc: fitz.Document) -> dict:
+    pdf_metadata = doc.metadata or {}
+    return {
+        'title': pdf_metadata.get('title', ''),
+        'author': pdf_metadata.get('author', ''),
+        'subject': pdf_metadata.get('subject', ''),
+        'creator': pdf_metadata.get('creator', ''),
+        'producer': pdf_metadata.get('producer', ''),
+        'creation_date': pdf_metadata.get('creationDate', ''),
+        'modification_date': pdf_metadata.get('modDate', ''),
+        'page_count': doc.page_count
+    }
+
+def extract_pdf(source: PdfSource) -> Dict:
+    """Text, metadata and page count from a single parse of the PDF.
+    
+    ``source`` may be the uploaded bytes, so nothing touches the disk.
+    Returns empty text and metadata when the PDF cannot be read.
+    """
+    result = {'text': "", 'metadata': {}, 'page_count': 0}
+    try:
+        with open_pdf(source) as doc:
+            result['metadata'] = _document_metadata(doc)
+            result['page_count'] = doc.page_count
+            result['text'] = _document_text(doc, source)
+    except Exception as e:
+        logger.error(f"PDF extraction failed: {e}")
+    return result
+
+def extract_text_from_pdf(file_path: PdfSource) -> str:
+    """Extract text from PDF, OCRing only the pages without a text layer."""
+    try:
+        with open_pdf(file_path) as doc:
+            return _document_text(doc, file_path)
     except Exception as e:
         logger.error(f"PDF extraction failed: {e}")
         return ""
-    
-    return text.strip()
 
-def extract_metadata_from_pdf(file_path: str) -> dict:
+def extract_metadata_from_pdf(file_path: PdfSource) -> dict:
     """Extract metadata from PDF file."""
     metadata = {}
     
     try:
-        with fitz.open(file_path) as doc:
-            pdf_metadata = doc.metadata
-            metadata.update({
-                'title': pdf_metadata.get('title', ''),
-                'author': pdf_metadata.get('author', ''),
-                'subject': pdf_metadata.get('subject', ''),
-                'creator': pdf_metadata.get('creator', ''),
-                'producer': pdf_metadata.get('producer', ''),
-                'creation_date': pdf_metadata.get('creationDate', ''),
-                'modification_date': pdf_metadata.get('modDate', ''),
-                'page_count': doc.page_count
-            })
+        with open_pdf(file_path) as doc:
+            metadata.update(_document_metadata(doc))
     except Exception as e:
         logger.error(f"PDF metadata extraction failed: {e}")
     
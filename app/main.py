@@ -4,6 +4,7 @@ from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import os
 import logging
 from contextlib import asynccontextmanager
@@ -12,6 +13,8 @@ from app.config.settings import get_settings
 from app.database.database import init_db, get_db
 from app.middleware.rate_limiter import setup_rate_limiting
 from app.middleware.metrics import setup_metrics
+from app.nlp.semantic_analysis import analyzer
+from app.nlp.thread_budget import apply_thread_budget
 from app.api.v1 import router as v1_router
 
 # Configure logging
@@ -29,6 +32,8 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     # Startup
     logger.info("Starting application...")
+    if settings.THREAD_BUDGET_ENABLED:
+        apply_thread_budget()
     init_db()
     logger.info("Database initialized")
     
@@ -37,6 +42,14 @@ async def lifespan(app: FastAPI):
     os.makedirs(settings.TEMP_DIR, exist_ok=True)
     os.makedirs(settings.MODEL_CACHE_DIR, exist_ok=True)
     
+    # Optionally load models up front instead of on the first request
+    if settings.MODEL_WARMUP_ON_STARTUP:
+        logger.info("Warming up NLP models...")
+        warmed = await run_in_threadpool(
+            analyzer.warm_up, settings.MODEL_WARMUP_MODELS or None
+        )
+        logger.info(f"Model warm-up finished: {warmed}")
+    
     yield
     
     # Shutdown
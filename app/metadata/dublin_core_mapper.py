@@ -234,8 +234,12 @@ class DublinCoreMapper:
     
     def _extract_language(self, extracted_metadata: Dict) -> str:
         """Extract language information."""
-        # For now, default to English
-        # Could be enhanced with language detection
+        # Detected during analysis; 'und' when the text was too short to tell
+        language = extracted_metadata.get('language')
+        if language:
+            return language
+        
+        # Documents analyzed without language detection
         return 'en'
 
 # Global mapper instance
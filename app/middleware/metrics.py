@@ -37,6 +37,24 @@ DOCUMENT_PROCESSING_DURATION = Histogram(
     ['file_type']
 )
 
+NLP_STAGE_CACHE_LOOKUPS = Counter(
+    'nlp_stage_cache_lookups_total',
+    'NLP stage result cache lookups',
+    ['stage', 'result']
+)
+
+MODEL_RESIDENT_BYTES = Gauge(
+    'nlp_model_resident_bytes',
+    'Measured memory footprint of each loaded NLP model (0 when not loaded)',
+    ['model']
+)
+
+MODEL_EVICTIONS = Counter(
+    'nlp_model_evictions_total',
+    'NLP models evicted to stay within the memory budget',
+    ['model']
+)
+
 
 class MetricsMiddleware(BaseHTTPMiddleware):
     """Middleware to collect Prometheus metrics."""
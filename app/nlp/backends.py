@@ -0,0 +1,215 @@
+# app/nlp/backends.py
+import logging
+import os
+import re
+import shutil
+from typing import Dict, List, Optional
+
+from app.config.settings import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+SUPPORTED_BACKENDS = ('torch', 'int8', 'onnx')
+
+# Which Auto* class backs each pipeline task
+_TASK_MODEL_CLASSES = {
+    'summarization': ('AutoModelForSeq2SeqLM', 'ORTModelForSeq2SeqLM'),
+    'zero-shot-classification': ('AutoModelForSequenceClassification',
+                                 'ORTModelForSequenceClassification'),
+    'sentiment-analysis': ('AutoModelForSequenceClassification',
+                           'ORTModelForSequenceClassification'),
+}
+
+# Inputs used by the parity check when none are given
+PARITY_SAMPLES = [
+    "The quarterly report shows revenue growth of 12 percent, driven by strong "
+    "demand in the European market and lower operating costs.",
+    "This agreement is entered into by and between the parties and shall be "
+    "governed by the laws of the State of Delaware.",
+    "The patient was admitted with acute chest pain and discharged after two "
+    "days of observation with no further complications.",
+]
+
+
+def _cache_dir(backend: str, model_name: str) -> str:
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '--', model_name)
+    return os.path.join(settings.MODEL_CACHE_DIR, backend, safe_name)
+
+
+def _snapshot_dir(model_name: str) -> Optional[str]:
+    """Local safetensors copy of a torch model, if one was saved."""
+    directory = _cache_dir('snapshot', model_name)
+    return directory if os.path.exists(os.path.join(directory, 'config.json')) else None
+
+
+def save_snapshot(pipe, model_name: str):
+    """Save a torch pipeline's model and tokenizer as a local safetensors snapshot.
+
+    Snapshots are memory-mapped on load, so a model evicted by the
+    registry comes back without re-resolving or unpickling hub weights.
+    """
+    if not settings.MODEL_SNAPSHOTS_ENABLED or settings.INFERENCE_BACKEND != 'torch':
+        return
+    if _snapshot_dir(model_name):
+        return
+
+    directory = _cache_dir('snapshot', model_name)
+    tmp_dir = directory + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    pipe.model.save_pretrained(tmp_dir, safe_serialization=True)
+    pipe.tokenizer.save_pretrained(tmp_dir)
+    os.replace(tmp_dir, directory)
+    logger.info(f"Saved snapshot of {model_name} to {directory}")
+
+
+def _load_int8_model(task: str, model_name: str):
+    """Dynamically quantize Linear layers to int8, caching the quantized weights."""
+    import torch
+    import transformers
+
+    auto_class = getattr(transformers, _TASK_MODEL_CLASSES[task][0])
+    cache_dir = _cache_dir('int8', model_name)
+    weights_path = os.path.join(cache_dir, 'quantized_state_dict.pt')
+
+    if os.path.exists(weights_path):
+        # Build the quantized structure without fp32 weights, then load int8 weights
+        config = transformers.AutoConfig.from_pretrained(model_name)
+        model = auto_class.from_config(config)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.load_state_dict(torch.load(weights_path))
+        logger.info(f"Loaded int8 {model_name} from {cache_dir}")
+    else:
+        model = auto_class.from_pretrained(model_name)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        os.makedirs(cache_dir, exist_ok=True)
+        torch.save(model.state_dict(), weights_path)
+        logger.info(f"Quantized {model_name} to int8 and cached it in {cache_dir}")
+
+    model.eval()
+    return model
+
+
+def _load_onnx_model(task: str, model_name: str):
+    """Export to ONNX once and serve with onnxruntime (requires optimum[onnxruntime])."""
+    import optimum.onnxruntime
+
+    ort_class = getattr(optimum.onnxruntime, _TASK_MODEL_CLASSES[task][1])
+    cache_dir = _cache_dir('onnx', model_name)
+
+    if os.path.isdir(cache_dir) and any(name.endswith('.onnx') for name in os.listdir(cache_dir)):
+        model = ort_class.from_pretrained(cache_dir)
+        logger.info(f"Loaded ONNX {model_name} from {cache_dir}")
+    else:
+        model = ort_class.from_pretrained(model_name, export=True)
+        model.save_pretrained(cache_dir)
+        logger.info(f"Exported {model_name} to ONNX in {cache_dir}")
+    return model
+
+
+def build_pipeline(task: str, model_name: str, backend: str = None):
+    """Build a CPU pipeline for ``task`` served by the selected backend.
+
+    Falls back to fp32 PyTorch when the backend is unknown, its optional
+    dependency is missing, or the model cannot be converted.
+    """
+    from transformers import AutoTokenizer, pipeline
+
+    backend = backend or settings.INFERENCE_BACKEND
+    if backend not in SUPPORTED_BACKENDS:
+        logger.warning(f"Unknown inference backend '{backend}', using torch")
+        backend = 'torch'
+
+    if backend != 'torch':
+        try:
+            if backend == 'int8':
+                model = _load_int8_model(task, model_name)
+            else:
+                model = _load_onnx_model(task, model_name)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            return pipeline(task, model=model, tokenizer=tokenizer, device=-1)
+        except ImportError as e:
+            requirement = 'optimum[onnxruntime]' if backend == 'onnx' else 'torch'
+            logger.error(
+                f"INFERENCE_BACKEND={backend} needs {requirement}, which is not installed ({e}); "
+                f"serving {model_name} with fp32 torch"
+            )
+        except Exception as e:
+            logger.error(f"Failed to build {backend} pipeline for {model_name}: {e}")
+
+    snapshot = _snapshot_dir(model_name) if settings.MODEL_SNAPSHOTS_ENABLED else None
+    if snapshot:
+        logger.info(f"Loading {model_name} from snapshot {snapshot}")
+        return pipeline(task, model=snapshot, device=-1)
+    return pipeline(task, model=model_name, device=-1)
+
+
+def _token_f1(reference: str, candidate: str) -> float:
+    reference_tokens = reference.lower().split()
+    candidate_tokens = candidate.lower().split()
+    if not reference_tokens or not candidate_tokens:
+        return float(reference_tokens == candidate_tokens)
+    remaining = list(reference_tokens)
+    overlap = 0
+    for token in candidate_tokens:
+        if token in remaining:
+            remaining.remove(token)
+            overlap += 1
+    precision = overlap / len(candidate_tokens)
+    recall = overlap / len(reference_tokens)
+    return 0.0 if overlap == 0 else 2 * precision * recall / (precision + recall)
+
+
+def check_parity(task: str, model_name: str, backend: str,
+                 samples: List[str] = None, labels: List[str] = None) -> Dict:
+    """Compare a backend's outputs with fp32 PyTorch on sample inputs.
+
+    Classification tasks report top-label agreement and the largest score
+    difference; summarization reports the mean token-overlap F1.
+    """
+    samples = samples or PARITY_SAMPLES
+    reference = build_pipeline(task, model_name, backend='torch')
+    candidate = build_pipeline(task, model_name, backend=backend)
+
+    report = {'task': task, 'model': model_name, 'backend': backend, 'samples': len(samples)}
+
+    if task == 'summarization':
+        kwargs = {'max_length': 60, 'min_length': 10, 'do_sample': False}
+        f1_scores = [
+            _token_f1(ref['summary_text'], cand['summary_text'])
+            for ref, cand in zip(reference(samples, **kwargs), candidate(samples, **kwargs))
+        ]
+        report['mean_token_f1'] = round(sum(f1_scores) / len(f1_scores), 4)
+        report['passed'] = report['mean_token_f1'] >= settings.INFERENCE_PARITY_MIN_F1
+        return report
+
+    if task == 'zero-shot-classification':
+        labels = labels or ['finance', 'law', 'medicine', 'technology']
+        ref_results = reference(samples, labels)
+        cand_results = candidate(samples, labels)
+        ref_scores = [dict(zip(r['labels'], r['scores'])) for r in ref_results]
+        cand_scores = [dict(zip(r['labels'], r['scores'])) for r in cand_results]
+        top_agreement = [r['labels'][0] == c['labels'][0] for r, c in zip(ref_results, cand_results)]
+    else:
+        ref_results = reference(samples, top_k=None)
+        cand_results = candidate(samples, top_k=None)
+        ref_scores = [{item['label']: item['score'] for item in r} for r in ref_results]
+        cand_scores = [{item['label']: item['score'] for item in r} for r in cand_results]
+        top_agreement = [
+            max(r, key=r.get) == max(c, key=c.get) for r, c in zip(ref_scores, cand_scores)
+        ]
+
+    max_score_diff = max(
+        abs(r[label] - c.get(label, 0.0))
+        for r, c in zip(ref_scores, cand_scores)
+        for label in r
+    )
+    report['top_label_agreement'] = sum(top_agreement) / len(top_agreement)
+    report['max_score_diff'] = round(max_score_diff, 4)
+    report['passed'] = (
+        report['top_label_agreement'] == 1.0
+        and max_score_diff <= settings.INFERENCE_PARITY_MAX_SCORE_DIFF
+    )
+    return report
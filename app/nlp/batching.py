@@ -0,0 +1,144 @@
+# app/nlp/batching.py
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BatchFn = Callable[[List[Any]], List[Any]]
+
+
+class _BatchQueue:
+    """Pending calls for one model and one set of call parameters."""
+
+    def __init__(self, name: str, batch_fn: BatchFn, scheduler: 'InferenceScheduler'):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.scheduler = scheduler
+        self.pending: List[Tuple[Any, int, Future]] = []
+        self.first_arrival = 0.0
+        self.condition = threading.Condition()
+        self.worker = threading.Thread(
+            target=self._run, name=f"batcher-{name}", daemon=True
+        )
+        self.worker.start()
+
+    def put(self, item: Any, length: int) -> Future:
+        future = Future()
+        with self.condition:
+            if not self.pending:
+                self.first_arrival = time.monotonic()
+            self.pending.append((item, length, future))
+            self.condition.notify()
+        return future
+
+    def _take_batch(self) -> List[Tuple[Any, int, Future]]:
+        """Block until a batch is full or the oldest call has waited long enough."""
+        max_batch_size = self.scheduler.max_batch_size
+        max_wait = self.scheduler.max_wait_ms / 1000.0
+
+        with self.condition:
+            while not self.pending:
+                self.condition.wait()
+
+            while len(self.pending) < max_batch_size:
+                remaining = self.first_arrival + max_wait - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+
+            batch, self.pending = self.pending, []
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+
+            # Bucket by length so each padded batch wastes as little as possible
+            batch.sort(key=lambda entry: entry[1])
+            size = self.scheduler.max_batch_size
+            for start in range(0, len(batch), size):
+                self._execute(batch[start:start + size])
+
+    def _execute(self, batch: List[Tuple[Any, int, Future]]):
+        # Callers that gave up (e.g. a time budget) cancel before the batch runs
+        batch = [entry for entry in batch if entry[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _, _ in batch]
+        try:
+            outputs = self.batch_fn(items)
+            if len(outputs) != len(items):
+                raise RuntimeError(
+                    f"Batch function for '{self.name}' returned {len(outputs)} "
+                    f"results for {len(items)} inputs"
+                )
+        except Exception as e:
+            logger.error(f"Batched inference for '{self.name}' failed: {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        logger.debug(f"Ran '{self.name}' batch of {len(items)}")
+        for (_, _, future), output in zip(batch, outputs):
+            future.set_result(output)
+
+
+class InferenceScheduler:
+    """Dynamic micro-batching for model inference.
+
+    Concurrent calls to the same model with the same parameters are
+    collected until ``max_batch_size`` calls are waiting or the oldest has
+    waited ``max_wait_ms``. The collected calls are sorted by input length
+    and run in padded batches through a single batch function call.
+    """
+
+    def __init__(self, max_batch_size: int = 8, max_wait_ms: int = 10, enabled: bool = True):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0, max_wait_ms)
+        self.enabled = enabled and self.max_batch_size > 1
+        self._queues: Dict[Tuple[str, Hashable], _BatchQueue] = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, name: str, key: Hashable, batch_fn: BatchFn) -> _BatchQueue:
+        with self._lock:
+            queue = self._queues.get((name, key))
+            if queue is None:
+                queue = _BatchQueue(name, batch_fn, self)
+                self._queues[(name, key)] = queue
+            return queue
+
+    def submit(self, name: str, batch_fn: BatchFn, item: Any,
+               length: int = 0, key: Hashable = ()) -> Future:
+        """Queue one input; the returned future resolves to its output.
+
+        ``key`` groups calls that may share a batch (e.g. identical
+        generation parameters); ``batch_fn`` maps a list of inputs to a
+        list of outputs in the same order. Every distinct key gets its own
+        queue and batcher thread for the life of the scheduler, so keys
+        must come from a small fixed set; client-supplied parameters
+        belong in the item instead.
+        """
+        if not self.enabled:
+            future = Future()
+            try:
+                future.set_result(batch_fn([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        return self._queue(name, key, batch_fn).put(item, length)
+
+    def run(self, name: str, batch_fn: BatchFn, item: Any,
+            length: int = 0, key: Hashable = ()) -> Any:
+        """Submit and block until the result is ready."""
+        return self.submit(name, batch_fn, item, length, key).result()
+
+    async def run_async(self, name: str, batch_fn: BatchFn, item: Any,
+                        length: int = 0, key: Hashable = ()) -> Any:
+        """Submit and await the result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(name, batch_fn, item, length, key))
@@ -0,0 +1,75 @@
+# app/nlp/embedding_classifier.py
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Phrasings averaged into one prototype vector per label
+PROTOTYPE_TEMPLATES = [
+    "{label}",
+    "This document is a {label}.",
+]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingClassifier:
+    """Classify documents by cosine similarity to label prototypes.
+
+    The document is embedded once and compared against every label in a
+    single matrix-vector product, instead of one NLI forward pass per label.
+    Prototypes are kept for the ``max_label_sets`` most recently used label
+    sets, since label sets come from clients.
+    """
+
+    def __init__(self, embed_fn: Callable[[List[str]], np.ndarray], max_label_sets: int = 256):
+        self.embed_fn = embed_fn
+        self.max_label_sets = max(1, max_label_sets)
+        self._prototypes: 'OrderedDict[Tuple[str, ...], np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prototypes(self, labels: List[str]) -> np.ndarray:
+        """Return the normalized (labels x dim) prototype matrix, cached per label set."""
+        key = tuple(labels)
+        with self._lock:
+            matrix = self._prototypes.get(key)
+            if matrix is not None:
+                self._prototypes.move_to_end(key)
+                return matrix
+
+        phrases = [
+            template.format(label=label)
+            for label in labels
+            for template in PROTOTYPE_TEMPLATES
+        ]
+        embeddings = np.asarray(self.embed_fn(phrases), dtype=np.float32)
+        embeddings = embeddings.reshape(len(labels), len(PROTOTYPE_TEMPLATES), -1)
+        matrix = _normalize(embeddings.mean(axis=1))
+
+        with self._lock:
+            self._prototypes[key] = matrix
+            self._prototypes.move_to_end(key)
+            while len(self._prototypes) > self.max_label_sets:
+                self._prototypes.popitem(last=False)
+        return matrix
+
+    def score(self, document_embedding: np.ndarray, labels: List[str]) -> np.ndarray:
+        """Cosine similarity between one document embedding and each label."""
+        document_embedding = _normalize(np.asarray(document_embedding, dtype=np.float32))
+        return self.prototypes(labels) @ document_embedding
+
+    def rank(self, document_embedding: np.ndarray,
+             labels: List[str]) -> Tuple[List[str], float]:
+        """Return labels ordered by similarity and the top-1/top-2 margin."""
+        scores = self.score(document_embedding, labels)
+        order = np.argsort(-scores)
+        margin = float(scores[order[0]] - scores[order[1]]) if len(order) > 1 else 1.0
+        return [labels[i] for i in order], margin
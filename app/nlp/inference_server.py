@@ -0,0 +1,249 @@
+# app/nlp/inference_server.py
+"""Out-of-process inference service holding a single copy of the models.
+
+Run it with ``python -m app.nlp.inference_server``. API and Celery workers
+set ``INFERENCE_SERVER_ENABLED=true`` and send analysis requests over a
+Unix socket instead of loading the models themselves. Large texts travel
+through shared memory; only the segment name crosses the socket.
+"""
+import logging
+import os
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Tuple, Union
+
+from app.config.settings import get_settings
+from app.nlp.label_sets import LabelSet
+from app.nlp.profiles import ProcessingProfile, get_profile
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+def _authkey() -> bytes:
+    return (settings.INFERENCE_SERVER_AUTHKEY or settings.SECRET_KEY).encode('utf-8')
+
+
+def _pack_text(text: str, segments: List[SharedMemory]) -> Tuple:
+    """Inline small texts; put large ones in a shared-memory segment."""
+    data = text.encode('utf-8')
+    if len(data) < settings.INFERENCE_SERVER_SHM_THRESHOLD:
+        return ('inline', text)
+
+    segment = SharedMemory(create=True, size=len(data))
+    segment.buf[:len(data)] = data
+    segments.append(segment)
+    return ('shm', segment.name, len(data))
+
+
+def _unpack_text(payload: Tuple) -> str:
+    if payload[0] == 'inline':
+        return payload[1]
+
+    _, name, size = payload
+    segment = SharedMemory(name=name)
+    try:
+        return bytes(segment.buf[:size]).decode('utf-8')
+    finally:
+        segment.close()
+        # The client owns the segment; stop this process's tracker unlinking it
+        resource_tracker.unregister(segment._name, 'shared_memory')
+
+
+class InferenceServer:
+    """Serves analysis requests from many workers with one set of models."""
+
+    def __init__(self, address: str = None):
+        self.address = address or settings.INFERENCE_SERVER_SOCKET
+
+    def serve_forever(self):
+        from app.nlp import semantic_analysis
+
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+        semantic_analysis.analyzer.warm_up(settings.MODEL_WARMUP_MODELS or None)
+
+        with Listener(self.address, family='AF_UNIX', authkey=_authkey()) as listener:
+            logger.info(f"Inference server listening on {self.address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:
+                    logger.error(f"Rejected inference connection: {e}")
+                    continue
+                # One thread per client so concurrent requests share micro-batches
+                threading.Thread(
+                    target=self._handle, args=(connection,), daemon=True
+                ).start()
+
+    def _handle(self, connection):
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                try:
+                    response = {'ok': True, 'result': self._dispatch(request)}
+                except Exception as e:
+                    logger.error(f"Inference request failed: {e}")
+                    response = {'ok': False, 'error': str(e)}
+
+                try:
+                    connection.send(response)
+                except (EOFError, OSError):
+                    return
+
+    def _dispatch(self, request: Dict):
+        from app.nlp import semantic_analysis
+
+        method = request.get('method')
+        if method == 'ping':
+            return 'pong'
+        if method == 'stats':
+            return semantic_analysis.runtime_stats()
+        if method == 'analyze':
+            texts = [_unpack_text(payload) for payload in request['texts']]
+            full_texts = [_unpack_text(payload) for payload in request['full_texts']]
+            label_set = None
+            if request.get('labels'):
+                label_set = semantic_analysis.label_set_registry.register(
+                    request['labels'], request['hypothesis_template']
+                )
+            profile = get_profile(request.get('profile'))
+            results = semantic_analysis.analyze_documents_local(
+                texts, full_texts, label_set, profile
+            )
+            return [
+                {'error': str(result)} if isinstance(result, Exception) else {'result': result}
+                for result in results
+            ]
+        raise ValueError(f"Unknown inference method: {method}")
+
+
+class InferenceClient:
+    """Sends analysis requests to the inference server, one connection per thread.
+
+    A request unanswered within ``timeout`` seconds raises ``TimeoutError``
+    and an unreachable server raises ``ConnectionError``, so callers can
+    fall back to in-process inference.
+    """
+
+    def __init__(self, address: str = None, timeout: float = None):
+        self.address = address or settings.INFERENCE_SERVER_SOCKET
+        self.timeout = timeout if timeout is not None else settings.INFERENCE_SERVER_TIMEOUT_S
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = Client(self.address, family='AF_UNIX', authkey=_authkey())
+            self._local.connection = connection
+        return connection
+
+    def _reset(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def call(self, request: Dict):
+        # Retry once on a fresh connection (e.g. after a server restart)
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.send(request)
+                if not connection.poll(self.timeout):
+                    # A late reply must not be read as the answer to the next request
+                    self._reset()
+                    raise TimeoutError(
+                        f"Inference server did not respond within {self.timeout}s"
+                    )
+                response = connection.recv()
+                break
+            except TimeoutError:
+                raise
+            except (EOFError, OSError, ConnectionError) as e:
+                self._reset()
+                if attempt:
+                    raise ConnectionError(f"Inference server unavailable: {e}")
+
+        if not response['ok']:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    def ping(self) -> bool:
+        try:
+            return self.call({'method': 'ping'}) == 'pong'
+        except Exception:
+            return False
+
+    def stats(self) -> Dict:
+        return self.call({'method': 'stats'})
+
+    def analyze(self, texts: List[str], full_texts: List[str] = None,
+                label_set: Optional[LabelSet] = None,
+                profile: Optional[ProcessingProfile] = None) -> List[Union[Dict, Exception]]:
+        """Analyze on the server; failed documents come back as exceptions.
+
+        Raises ``ConnectionError`` or ``TimeoutError`` when the server
+        itself is unreachable or hung.
+        """
+        if not texts:
+            return []
+        full_texts = full_texts or texts
+
+        segments: List[SharedMemory] = []
+        try:
+            request = {
+                'method': 'analyze',
+                'texts': [_pack_text(text, segments) for text in texts],
+                'full_texts': [_pack_text(text, segments) for text in full_texts],
+                'labels': label_set.labels if label_set else None,
+                'hypothesis_template': label_set.hypothesis_template if label_set else None,
+                'profile': profile.name if profile else None
+            }
+            results = self.call(request)
+        except (ConnectionError, TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Remote analysis failed: {e}")
+            return [e] * len(texts)
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+        return [
+            RuntimeError(item['error']) if 'error' in item else item['result']
+            for item in results
+        ]
+
+
+_client: Optional[InferenceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> InferenceClient:
+    """Process-wide client for the configured socket."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient()
+        return _client
+
+
+if __name__ == "__main__":
+    if settings.THREAD_BUDGET_ENABLED:
+        from app.nlp.thread_budget import apply_thread_budget
+        apply_thread_budget()
+    InferenceServer().serve_forever()
@@ -0,0 +1,170 @@
+# app/nlp/label_sets.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.nlp.tokenization import pad_batch, tokenizer_key
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HYPOTHESIS_TEMPLATE = "This example is {}."
+
+
+def normalize_labels(labels: List[str]) -> List[str]:
+    """Strip whitespace and drop empty or repeated labels, keeping order."""
+    seen = set()
+    normalized = []
+    for label in labels:
+        label = str(label).strip()
+        if label and label not in seen:
+            seen.add(label)
+            normalized.append(label)
+    return normalized
+
+
+def compute_label_set_id(labels: List[str],
+                         hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE) -> str:
+    """Content hash identifying a label set, so identical sets share a cache entry."""
+    key_data = hypothesis_template + "\x00" + "\x00".join(labels)
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()[:16]
+
+
+class LabelSet:
+    """A taxonomy for zero-shot classification plus its cached hypothesis encodings."""
+
+    def __init__(self, labels: List[str],
+                 hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE):
+        self.labels = labels
+        self.hypothesis_template = hypothesis_template
+        self.id = compute_label_set_id(labels, hypothesis_template)
+        self._hypothesis_ids: Dict[Tuple, List[List[int]]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def hypotheses(self) -> List[str]:
+        return [self.hypothesis_template.format(label) for label in self.labels]
+
+    def hypothesis_ids(self, tokenizer) -> List[List[int]]:
+        """Token ids of each hypothesis (no special tokens), tokenized once per tokenizer."""
+        key = tokenizer_key(tokenizer)
+        ids = self._hypothesis_ids.get(key)
+        if ids is None:
+            with self._lock:
+                ids = self._hypothesis_ids.get(key)
+                if ids is None:
+                    ids = tokenizer(self.hypotheses, add_special_tokens=False)['input_ids']
+                    self._hypothesis_ids[key] = ids
+        return ids
+
+    def to_dict(self) -> Dict:
+        return {
+            'label_set_id': self.id,
+            'labels': self.labels,
+            'hypothesis_template': self.hypothesis_template
+        }
+
+
+class LabelSetRegistry:
+    """Bounded LRU registry of label sets keyed by content hash."""
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._label_sets: 'OrderedDict[str, LabelSet]' = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+
+    def register(self, labels: List[str],
+                 hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE,
+                 pinned: bool = False) -> LabelSet:
+        """Return the label set for these labels, creating it if needed."""
+        labels = normalize_labels(labels)
+        if not labels:
+            raise ValueError("A label set needs at least one label")
+
+        label_set_id = compute_label_set_id(labels, hypothesis_template)
+        with self._lock:
+            label_set = self._label_sets.get(label_set_id)
+            if label_set is None:
+                label_set = LabelSet(labels, hypothesis_template)
+                self._label_sets[label_set_id] = label_set
+                logger.info(f"Registered label set {label_set_id} with {len(labels)} labels")
+            self._label_sets.move_to_end(label_set_id)
+            if pinned:
+                self._pinned.add(label_set_id)
+            self._evict()
+            return label_set
+
+    def get(self, label_set_id: str) -> Optional[LabelSet]:
+        with self._lock:
+            label_set = self._label_sets.get(label_set_id)
+            if label_set is not None:
+                self._label_sets.move_to_end(label_set_id)
+            return label_set
+
+    def _evict(self):
+        unpinned = [key for key in self._label_sets if key not in self._pinned]
+        while len(self._label_sets) > self.max_size and unpinned:
+            self._label_sets.pop(unpinned.pop(0), None)
+
+
+def _entailment_index(model) -> int:
+    for label, index in model.config.label2id.items():
+        if label.lower().startswith('entail'):
+            return int(index)
+    # Fall back to the last logit, the MNLI convention
+    return int(model.config.num_labels) - 1
+
+
+def premise_budget(tokenizer, label_set: LabelSet) -> int:
+    """Premise tokens that fit beside the longest hypothesis in the model context."""
+    hypothesis_ids = label_set.hypothesis_ids(tokenizer)
+    special_tokens = tokenizer.num_special_tokens_to_add(pair=True)
+    max_length = min(tokenizer.model_max_length, 1024)
+    return max(16, max_length - special_tokens - max(len(ids) for ids in hypothesis_ids))
+
+
+def score_premises(model, tokenizer, premise_ids: List[List[int]], label_set: LabelSet,
+                   max_pairs_per_forward: int = 64) -> List[Dict]:
+    """Zero-shot classify pre-tokenized premises against a label set.
+
+    Premises are token ids without special tokens, cut to ``premise_budget``.
+    Premise/hypothesis pairs are assembled from cached hypothesis token ids
+    and run through the NLI model as padded tensors, instead of re-building
+    and re-tokenizing the hypotheses on every call. Scores match the
+    ``zero-shot-classification`` pipeline (single-label softmax).
+    """
+    import torch
+
+    hypothesis_ids = label_set.hypothesis_ids(tokenizer)
+    budget = premise_budget(tokenizer, label_set)
+
+    pairs = [
+        tokenizer.build_inputs_with_special_tokens(premise[:budget], hypothesis)
+        for premise in premise_ids
+        for hypothesis in hypothesis_ids
+    ]
+
+    entail_index = _entailment_index(model)
+    logits = []
+    with torch.inference_mode():
+        for start in range(0, len(pairs), max_pairs_per_forward):
+            input_ids, attention_mask = pad_batch(
+                pairs[start:start + max_pairs_per_forward], tokenizer.pad_token_id
+            )
+            output = model(input_ids=input_ids, attention_mask=attention_mask)
+            logits.append(output.logits[:, entail_index])
+
+    entail_logits = torch.cat(logits).view(len(premise_ids), len(label_set.labels))
+    probabilities = entail_logits.softmax(dim=-1)
+
+    results = []
+    for scores in probabilities.tolist():
+        order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        results.append({
+            'labels': [label_set.labels[i] for i in order],
+            'scores': [scores[i] for i in order]
+        })
+    return results
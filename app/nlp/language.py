@@ -0,0 +1,172 @@
+# app/nlp/language.py
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+UNDETERMINED = 'und'
+
+# Characters sampled per document; enough for a stable n-gram profile
+SAMPLE_CHARS = 1024
+
+# Below this many letters the guess is reported as undetermined
+MIN_LETTERS = 20
+
+_NON_LETTERS = re.compile(r'[^\w]+|[\d_]+')
+
+# Most frequent character trigrams per language, most frequent first.
+# Word boundaries are spaces, so short function words are included.
+TRIGRAM_PROFILES: Dict[str, List[str]] = {
+    'en': [
+        ' th', 'the', 'he ', 'ed ', ' an', 'and', 'nd ', ' of', 'of ', ' to',
+        'to ', 'ing', 'ng ', ' in', 'in ', 'ion', 'tio', 'ent', 'er ', 'is ',
+        ' is', 'hat', 'tha', 'at ', ' fo', 'for', 'or ', 'es ', 're ', 'on ',
+        'ati', ' co', ' be', 'ter', 'her', 'ly ', 'ere', 'wit', 'ith', ' wi',
+        'th ', 'ver', 'his', ' ha', 'ave', 'was', ' wa', 'are', ' re', 'con',
+        ' a ', 'al ', 'ts ', 'ty ', 'ou ', ' wh', 'whi', 'ich', 'ch ',
+    ],
+    'es': [
+        ' de', 'de ', 'os ', ' la', 'la ', 'que', ' qu', 'ue ', ' el', 'el ',
+        'es ', 'as ', ' en', 'en ', 'ent', 'ión', 'ció', 'aci', 'do ', ' co',
+        'con', 'ado', 'nte', ' lo', 'los', 'las', ' pa', 'par', 'ara', 'est',
+        ' es', 'ien', ' se', 'por', ' po', 'or ', 'del', ' un', 'una', 'ra ',
+        'ida', ' y ', 'dad', 'mos', 'nes', 'tra', 'ón ', 'ndo', 'ici', 'sta',
+    ],
+    'fr': [
+        ' de', 'de ', 'es ', ' le', 'le ', 'ent', 'nt ', ' la', 'la ', ' et',
+        'et ', 'les', 'ion', ' pa', 'que', ' qu', 'ue ', ' co', 're ', 'des',
+        'tio', ' un', 'ne ', ' en', 'men', 'ons', 'our', ' po', 'pou', 'ait',
+        'ur ', 'dan', 'ans', ' da', 'une', 'est', ' es', ' du', 'du ', 'eme',
+        'é d', 'lle', 'ais', 'ell', 'qui', 'ont', ' à ', 'té ', 'ès ',
+    ],
+    'de': [
+        'en ', 'er ', 'ch ', ' de', 'der', 'die', ' di', 'ie ', 'ein', ' ei',
+        'ich', 'sch', 'cht', 'nd ', 'und', ' un', 'den', 'te ', 'in ', 'ung',
+        'ng ', 'gen', ' zu', 'das', ' da', 'ist', ' is', 'ten', 'ent', 'ine',
+        'eit', 'hen', ' ve', 'ver', ' ge', 'auf', 'nde', 'ber', 'mit', ' mi',
+        'sie', 'von', ' vo', 'lic', 'ges', 'ach', 'ür ', ' fü', 'für', 'ere',
+    ],
+    'it': [
+        ' di', 'di ', ' la', 'la ', 'che', ' ch', 'he ', 'to ', 're ', 'del',
+        'ell', ' de', 'lla', 'ion', 'zio', 'ne ', 'one', ' il', 'il ', ' co',
+        'con', 'ent', 'ato', ' e ', 'per', ' pe', 'nte', ' in', 'in ', 'no ',
+        'le ', 'gli', 'ta ', 'ia ', 'ti ', 'azi', 'ono', 'men', 'are', 'ere',
+        'una', ' un', 'sta', 'ali', 'non', ' no', 'ell', 'lle', 'tà ', 'ità',
+    ],
+    'pt': [
+        ' de', 'de ', 'os ', 'ão ', 'ção', 'açã', ' qu', 'que', 'ue ', ' a ',
+        'do ', ' do', 'da ', ' da', ' co', 'com', 'ent', 'men', ' e ', ' o ',
+        'nte', 'as ', 'es ', 'em ', ' em', 'ara', ' pa', 'par', 'não', 'ões',
+        'est', 'uma', ' um', 'dos', 'das', ' se', 'ado', 'ida', 'ica',
+    ],
+    'nl': [
+        'en ', ' de', 'de ', 'het', ' he', 'et ', 'van', ' va', 'an ', 'een',
+        ' ee', 'ij ', ' in', 'in ', 'ver', ' ve', 'er ', 'aar', 'ing', 'ng ',
+        'oor', 'den', 'ter', ' te', 'ten', 'and', 'ie ', ' zi', 'zij', 'ijk',
+        'lij', 'ge ', 'sch', 'cht', ' op', 'op ', 'nie', 'met', ' me', 'dat',
+    ],
+}
+
+# Scripts that identify a language (or its most common one) directly
+_SCRIPT_LANGUAGES = [
+    (re.compile(r'[\u3040-\u30ff]'), 'ja'),  # Hiragana and Katakana
+    (re.compile(r'[\uac00-\ud7af]'), 'ko'),
+    (re.compile(r'[\u4e00-\u9fff]'), 'zh'),
+    (re.compile(r'[\u0400-\u04ff]'), 'ru'),
+    (re.compile(r'[\u0370-\u03ff]'), 'el'),
+    (re.compile(r'[\u0600-\u06ff]'), 'ar'),
+    (re.compile(r'[\u0590-\u05ff]'), 'he'),
+    (re.compile(r'[\u0900-\u097f]'), 'hi'),
+    (re.compile(r'[\u0e00-\u0e7f]'), 'th'),
+]
+
+
+def _build_weights(profiles: Dict[str, List[str]]) -> Dict[str, List[Tuple[str, float]]]:
+    """Invert the profiles: trigram -> [(language, rank weight)]."""
+    weights: Dict[str, List[Tuple[str, float]]] = {}
+    for language, trigrams in profiles.items():
+        trigrams = list(dict.fromkeys(trigrams))
+        for rank, trigram in enumerate(trigrams):
+            weights.setdefault(trigram, []).append((language, 1.0 - rank / len(trigrams)))
+    return weights
+
+
+_WEIGHTS = _build_weights(TRIGRAM_PROFILES)
+
+
+def _script_language(sample: str, letters: int) -> Optional[str]:
+    """Language implied by the dominant non-Latin script, if any."""
+    counts: Counter = Counter()
+    for pattern, language in _SCRIPT_LANGUAGES:
+        count = len(pattern.findall(sample))
+        if count:
+            counts[language] += count
+
+    if not counts or letters == 0:
+        return None
+    # Kana alongside kanji means Japanese rather than Chinese
+    if counts.get('ja') and counts.get('zh'):
+        counts['ja'] += counts.pop('zh')
+    language, count = counts.most_common(1)[0]
+    return language if count / letters >= 0.5 else None
+
+
+def language_evidence(text: str, candidates: List[str] = None) -> Dict:
+    """Detected language with the evidence behind it.
+
+    ``language`` and ``confidence`` are as ``detect_language`` returns
+    them; ``margin`` is the best profile's relative lead over the
+    runner-up, ``letters`` the letters sampled and ``method`` either
+    ``'script'`` or ``'trigram'``.
+    """
+    sample = text[:SAMPLE_CHARS]
+    normalized = ' ' + _NON_LETTERS.sub(' ', sample.lower()).strip() + ' '
+    letters = len(normalized) - normalized.count(' ')
+    evidence = {
+        'language': UNDETERMINED, 'confidence': 0.0, 'margin': 0.0,
+        'letters': letters, 'method': 'trigram'
+    }
+
+    if not sample.isascii():
+        language = _script_language(sample, letters)
+        if language is not None:
+            evidence.update(language=language, confidence=1.0, margin=1.0, method='script')
+            return evidence
+
+    if letters < MIN_LETTERS:
+        return evidence
+
+    trigrams = Counter(normalized[i:i + 3] for i in range(len(normalized) - 2))
+    total = sum(trigrams.values())
+
+    scores: Dict[str, float] = {}
+    for trigram, count in trigrams.items():
+        for language, weight in _WEIGHTS.get(trigram, ()):
+            scores[language] = scores.get(language, 0.0) + count * weight
+    if candidates:
+        scores = {language: score for language, score in scores.items() if language in candidates}
+    if not scores:
+        return evidence
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    best_language, best_score = ranked[0]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+    # Confidence combines profile coverage with the margin over the runner-up
+    coverage = min(1.0, best_score / total * 4)
+    margin = (best_score - runner_up) / best_score if best_score else 0.0
+    evidence.update(
+        language=best_language,
+        confidence=round(coverage * min(1.0, margin * 2), 3),
+        margin=round(margin, 3)
+    )
+    return evidence
+
+
+def detect_language(text: str, candidates: List[str] = None) -> Tuple[str, float]:
+    """Identify the language of ``text`` from character trigrams.
+
+    Returns an ISO 639-1 code and a confidence in [0, 1]; ``'und'`` when
+    the text is too short or matches no profile. ``candidates`` restricts
+    the trigram profiles considered; script-based languages always apply.
+    """
+    evidence = language_evidence(text, candidates)
+    return evidence['language'], evidence['confidence']
@@ -0,0 +1,95 @@
+# app/nlp/minhash.py
+import hashlib
+import logging
+import re
+import zlib
+from typing import List
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r'\w+')
+
+# Mersenne prime for the universal hash family (a * x + b) mod p
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Shingle hashes processed per step, bounding the (rows x permutations) matrix
+_CHUNK_ROWS = 4096
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """32-bit hashes of the distinct word ``size``-grams of normalized text.
+
+    Case, punctuation and whitespace are ignored, so re-saved files and
+    format conversions of the same text produce the same shingles.
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    if len(words) < size:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+        dtype=np.uint64, count=len(shingles)
+    )
+
+
+class MinHasher:
+    """MinHash signatures whose agreement estimates Jaccard similarity.
+
+    The permutations derive from ``seed``; signatures are only comparable
+    between hashers with the same seed and ``num_perm``.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # a < 2**31 keeps a * x + b (x < 2**32) within 64 bits
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """A ``num_perm`` uint32 signature; all-max for text without words."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), _CHUNK_ROWS):
+            chunk = hashes[start:start + _CHUNK_ROWS, None]
+            permuted = ((chunk * self._a + self._b) % _PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def to_bytes(self, signature: np.ndarray) -> bytes:
+        return signature.astype('<u4').tobytes()
+
+    def from_bytes(self, data: bytes) -> np.ndarray:
+        return np.frombuffer(data, dtype='<u4')
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if len(first) != len(second) or not len(first):
+        return 0.0
+    return float(np.mean(first == second))
+
+
+def band_keys(signature: np.ndarray, bands: int) -> List[str]:
+    """LSH bucket keys, one per band of ``len(signature) // bands`` rows.
+
+    Documents sharing any key are candidates; with ``r`` rows per band,
+    a pair with similarity ``s`` collides with probability
+    ``1 - (1 - s**r) ** bands``.
+    """
+    rows = len(signature) // bands
+    data = signature.astype('<u4')
+    return [
+        f"{band:03d}:" + hashlib.blake2b(
+            data[band * rows:(band + 1) * rows].tobytes(), digest_size=8
+        ).hexdigest()
+        for band in range(bands)
+    ]
@@ -0,0 +1,295 @@
+# app/nlp/model_registry.py
+import ctypes
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from app.middleware.metrics import MODEL_EVICTIONS, MODEL_RESIDENT_BYTES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_bytes() -> int:
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        # ru_maxrss is a peak value (KB on Linux), good enough as a fallback
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return 0
+
+
+def _model_footprint(model: Any) -> int:
+    """Bytes of the tensors a model (or the module a pipeline wraps) holds."""
+    inner = getattr(model, 'model', None)
+    for candidate in (model, inner, getattr(inner, 'embedding_model', None)):
+        if callable(getattr(candidate, 'parameters', None)) and callable(getattr(candidate, 'buffers', None)):
+            try:
+                tensors = list(candidate.parameters()) + list(candidate.buffers())
+                return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+            except Exception:
+                return 0
+    return 0
+
+
+def _release_memory():
+    """Collect garbage and hand freed heap pages back to the OS (glibc)."""
+    gc.collect()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class ModelRegistry:
+    """Loads models on first use instead of at import time.
+
+    Each model is registered with a zero-argument loader. Nothing is loaded
+    until ``get`` is called or ``warm_up`` is run, so processes that never
+    run inference (migrations, scripts, tests) stay cheap to start.
+
+    With a ``memory_budget_bytes``, loading a model first evicts the least
+    recently used models (never ``pinned`` ones, ones held through
+    ``acquire``, nor ones used within ``min_idle_s``) until the measured
+    footprints fit. Evicted models are reloaded on their next use; a
+    model's optional ``snapshot`` callback runs once in the background
+    after its first load, so a reload can come from a fast local copy.
+    """
+
+    def __init__(self, enabled_models: Optional[List[str]] = None,
+                 memory_budget_bytes: int = 0, pinned: Optional[List[str]] = None,
+                 min_idle_s: float = 0.0):
+        self.enabled_models = enabled_models
+        self.memory_budget_bytes = memory_budget_bytes
+        self.pinned = set(pinned or [])
+        self.min_idle_s = min_idle_s
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._snapshots: Dict[str, Callable[[Any], None]] = {}
+        self._models: Dict[str, Any] = {}
+        self._last_used: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._in_use: Dict[str, int] = {}
+        self._snapshot_threads: Dict[str, threading.Thread] = {}
+        self._registry_lock = threading.Lock()
+        self._budget_lock = threading.Lock()
+        self._use_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 snapshot: Optional[Callable[[Any], None]] = None):
+        """Register a loader for a model without loading it."""
+        with self._registry_lock:
+            self._loaders[name] = loader
+            if snapshot is not None:
+                self._snapshots[name] = snapshot
+            self._locks.setdefault(name, threading.Lock())
+            self._stats.setdefault(name, {
+                'loaded': False,
+                'load_time_seconds': None,
+                'resident_bytes': None,
+                'loads': 0,
+                'evictions': 0,
+                'error': None
+            })
+
+    def is_enabled(self, name: str) -> bool:
+        """Check whether a model is enabled in configuration."""
+        if self.enabled_models is None:
+            return True
+        return name in self.enabled_models
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the model, loading it on first use.
+
+        Returns None when the model is disabled, unknown or failed to load.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            self._last_used[name] = time.monotonic()
+            return model
+
+        if name not in self._loaders or not self.is_enabled(name):
+            return None
+
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name in self._models:
+                self._last_used[name] = time.monotonic()
+                return self._models[name]
+
+            # Do not retry a load that already failed in this process
+            if self._stats[name]['error']:
+                return None
+
+            return self._load(name)
+
+    @contextmanager
+    def acquire(self, name: str):
+        """The model (or None, as ``get``), kept resident until the block exits.
+
+        Wrap each inference call so a concurrent load cannot evict a model
+        while a forward pass is still using it.
+        """
+        with self._use_lock:
+            self._in_use[name] = self._in_use.get(name, 0) + 1
+        try:
+            yield self.get(name)
+        finally:
+            with self._use_lock:
+                self._in_use[name] -= 1
+                if not self._in_use[name]:
+                    del self._in_use[name]
+
+    def _load(self, name: str) -> Optional[Any]:
+        stats = self._stats[name]
+        # A reload is expected to need what the model measured last time
+        self._make_room(stats['resident_bytes'] or 0, keep=name)
+        rss_before = _current_rss_bytes()
+        start_time = time.perf_counter()
+
+        try:
+            model = self._loaders[name]()
+        except Exception as e:
+            stats['error'] = str(e)
+            logger.error(f"Failed to load model '{name}': {e}")
+            return None
+
+        # RSS growth misses memory-mapped weights and counts concurrent
+        # allocations, so take the larger of it and the tensor sizes
+        footprint = max(_model_footprint(model), _current_rss_bytes() - rss_before, 0)
+        stats.update({
+            'loaded': True,
+            'load_time_seconds': round(time.perf_counter() - start_time, 3),
+            'resident_bytes': footprint,
+            'loads': stats['loads'] + 1,
+            'error': None
+        })
+        self._last_used[name] = time.monotonic()
+        self._models[name] = model
+        MODEL_RESIDENT_BYTES.labels(model=name).set(footprint)
+
+        logger.info(
+            f"Model '{name}' loaded in {stats['load_time_seconds']}s "
+            f"(+{footprint / 1024 / 1024:.1f} MB resident)"
+        )
+        self._make_room(0, keep=name)
+        self._start_snapshot(name, model)
+        return model
+
+    def _start_snapshot(self, name: str, model: Any):
+        """Save a model's local copy once, off the load and eviction paths."""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None or name in self._snapshot_threads:
+            return
+
+        def run():
+            try:
+                snapshot(model)
+            except Exception as e:
+                logger.error(f"Failed to snapshot model '{name}': {e}")
+
+        thread = threading.Thread(target=run, name=f"snapshot-{name}", daemon=True)
+        self._snapshot_threads[name] = thread
+        thread.start()
+
+    def resident_bytes(self) -> int:
+        """Measured footprint of every loaded model."""
+        return sum(self._stats[name]['resident_bytes'] or 0 for name in list(self._models))
+
+    def _make_room(self, incoming_bytes: int, keep: str):
+        """Evict least recently used models until ``incoming_bytes`` more fit the budget."""
+        if not self.memory_budget_bytes:
+            return
+
+        with self._budget_lock:
+            now = time.monotonic()
+            candidates = sorted(
+                (
+                    name for name in list(self._models)
+                    if name != keep and name not in self.pinned
+                    and not self._in_use.get(name)
+                    and now - self._last_used.get(name, 0.0) >= self.min_idle_s
+                ),
+                key=lambda name: self._last_used.get(name, 0.0)
+            )
+            while self.resident_bytes() + incoming_bytes > self.memory_budget_bytes:
+                if not candidates:
+                    logger.warning(
+                        f"Models use {self.resident_bytes() / 1024 / 1024:.0f} MB, over the "
+                        f"{self.memory_budget_bytes / 1024 / 1024:.0f} MB budget, "
+                        f"and none can be evicted"
+                    )
+                    return
+                self._evict(candidates.pop(0))
+
+    def _evict(self, name: str):
+        with self._use_lock:
+            # Acquired since the candidates were chosen
+            if self._in_use.get(name):
+                return
+            model = self._models.pop(name, None)
+        if model is None:
+            return
+
+        stats = self._stats[name]
+        stats['loaded'] = False
+        stats['evictions'] += 1
+        MODEL_EVICTIONS.labels(model=name).inc()
+        MODEL_RESIDENT_BYTES.labels(model=name).set(0)
+
+        idle = time.monotonic() - self._last_used.get(name, 0.0)
+        logger.info(
+            f"Evicted model '{name}' ({(stats['resident_bytes'] or 0) / 1024 / 1024:.1f} MB, "
+            f"idle {idle:.0f}s)"
+        )
+        del model
+        _release_memory()
+
+    def warm_up(self, names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Eagerly load the given models (all enabled models by default)."""
+        if not names:
+            names = list(self._loaders)
+
+        return {
+            name: self.get(name) is not None
+            for name in names
+            if self.is_enabled(name)
+        }
+
+    def unload(self, name: str):
+        """Drop a loaded model so it is reloaded on next use."""
+        with self._locks.get(name, self._registry_lock):
+            self._models.pop(name, None)
+            if name in self._stats:
+                self._stats[name].update({'loaded': False, 'error': None})
+                MODEL_RESIDENT_BYTES.labels(model=name).set(0)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Report enablement, load time, resident size and evictions per model."""
+        now = time.monotonic()
+        return {
+            name: dict(
+                stats,
+                enabled=self.is_enabled(name),
+                pinned=name in self.pinned,
+                idle_seconds=(
+                    round(now - self._last_used[name], 1) if name in self._models else None
+                )
+            )
+            for name, stats in self._stats.items()
+        }
@@ -0,0 +1,243 @@
+# app/nlp/phrase_embeddings.py
+import atexit
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_phrase(phrase: str) -> str:
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', phrase).lower()).strip()
+
+
+def _checksum(key: str) -> int:
+    return zlib.crc32(key.encode('utf-8'))
+
+
+class PhraseEmbeddingCache:
+    """Persistent, bounded cache of candidate-phrase embeddings.
+
+    Vectors are stored in a float16 memory-mapped matrix (``vectors.f16``)
+    with a JSON index mapping normalized phrases to rows, so only phrases
+    never seen before go through the encoder. When full, the least recently
+    used phrase's row is reused. The index is flushed at most every
+    ``flush_interval_s`` and at exit; a per-row checksum of the phrase,
+    checked on every read, drops index entries whose row was reused since
+    the index was written or loaded.
+
+    The directory is opened on first use. One process owns it; other
+    processes use the stored vectors read-only and keep new phrases out.
+    Every ``flush_interval_s`` a read-only process reloads the index if the
+    owner has rewritten it, and takes ownership if the owner has exited.
+    """
+
+    def __init__(self, directory: str, max_phrases: int = 200000,
+                 flush_interval_s: float = 30.0):
+        self.directory = directory
+        self.max_phrases = max_phrases
+        self.flush_interval_s = flush_interval_s
+        self._index: 'OrderedDict[str, int]' = OrderedDict()
+        self._matrix: Optional[np.memmap] = None
+        self._checks: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        self._next_row = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._hits = 0
+        self._misses = 0
+        self._lock_file = None
+        self._index_stamp: Optional[Tuple[int, int]] = None
+        self._last_refresh = time.monotonic()
+        self.writable = False
+
+    def _open(self):
+        with self._lock:
+            if self._lock_file is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = open(os.path.join(self.directory, 'lock'), 'w')
+            if not self._acquire():
+                logger.info(f"Phrase embedding cache {self.directory} is owned by another process; read-only")
+
+            self._load()
+
+    def _acquire(self) -> bool:
+        """Try to become the owning (writing) process."""
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self.writable = True
+        atexit.register(self.flush)
+        return True
+
+    def _refresh(self):
+        """Read-only: take over from an exited owner, or load its newer index."""
+        now = time.monotonic()
+        if self.writable or now - self._last_refresh < self.flush_interval_s:
+            return
+        self._last_refresh = now
+        if self._acquire():
+            logger.info(f"Took ownership of phrase embedding cache {self.directory}")
+            # Reopen the read-only mappings for writing
+            self._index = OrderedDict()
+            self._matrix = None
+            self._checks = None
+            self._next_row = 0
+            self._load()
+        elif self._index_version() != self._index_stamp:
+            self._load()
+
+    def _index_version(self) -> Optional[Tuple[int, int]]:
+        """Changes whenever the owner replaces the index file."""
+        try:
+            stat = os.stat(self._index_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, 'vectors.f16')
+
+    @property
+    def _checks_path(self) -> str:
+        return os.path.join(self.directory, 'checks.u32')
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, 'index.json')
+
+    def _load(self):
+        paths = (self._index_path, self._vectors_path, self._checks_path)
+        if not all(os.path.exists(path) for path in paths):
+            return
+        self._index_stamp = self._index_version()
+        try:
+            with open(self._index_path) as f:
+                stored = json.load(f)
+            if stored['max_phrases'] != self.max_phrases:
+                logger.info("Phrase embedding cache size changed; starting empty")
+                return
+            self._open_matrix(stored['dim'], create=False)
+            self._index = OrderedDict(
+                (key, row) for key, row in stored['phrases']
+                if self._checks[row] == _checksum(key)
+            )
+            self._next_row = max(self._index.values(), default=-1) + 1
+            logger.info(f"Loaded {len(self._index)} cached phrase embeddings")
+        except Exception as e:
+            logger.error(f"Failed to load phrase embedding cache: {e}")
+            self._index = OrderedDict()
+            self._matrix = None
+            self._checks = None
+
+    def _open_matrix(self, dim: int, create: bool):
+        mode = 'w+' if create else ('r+' if self.writable else 'r')
+        self._matrix = np.memmap(
+            self._vectors_path, dtype=np.float16, mode=mode, shape=(self.max_phrases, dim)
+        )
+        self._checks = np.memmap(
+            self._checks_path, dtype=np.uint32, mode=mode, shape=(self.max_phrases,)
+        )
+        self._dim = dim
+
+    def _store(self, key: str, vector: np.ndarray):
+        if self._matrix is None:
+            self._open_matrix(vector.shape[-1], create=True)
+        if self._next_row < self.max_phrases:
+            row = self._next_row
+            self._next_row += 1
+        else:
+            _, row = self._index.popitem(last=False)
+        self._matrix[row] = vector
+        self._checks[row] = _checksum(key)
+        self._index[key] = row
+        self._dirty = True
+
+    def embed(self, phrases: List[str],
+              embed_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embeddings of ``phrases`` in order, encoding only uncached ones."""
+        self._open()
+        keys = [normalize_phrase(phrase) for phrase in phrases]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            self._refresh()
+            for key in keys:
+                row = self._index.get(key)
+                if row is None or key in found:
+                    continue
+                vector = np.asarray(self._matrix[row], dtype=np.float32)
+                # The owner may have reused the row since this index was loaded
+                if self._checks[row] != _checksum(key):
+                    del self._index[key]
+                    continue
+                self._index.move_to_end(key)
+                found[key] = vector
+
+        missing = list(OrderedDict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            vectors = np.asarray(embed_fn(missing), dtype=np.float32)
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    found[key] = vector
+                    if self.writable and key not in self._index:
+                        self._store(key, vector)
+
+        with self._lock:
+            self._hits += len(keys) - len(missing)
+            self._misses += len(missing)
+
+        if self._dirty and time.monotonic() - self._last_flush >= self.flush_interval_s:
+            self.flush()
+
+        return np.stack([found[key] for key in keys])
+
+    def flush(self):
+        """Write the vectors and an index snapshot to disk."""
+        if not self.writable:
+            return
+        with self._lock:
+            if not self._dirty or self._matrix is None:
+                return
+            self._matrix.flush()
+            self._checks.flush()
+            snapshot = {
+                'dim': self._dim,
+                'max_phrases': self.max_phrases,
+                'phrases': list(self._index.items())
+            }
+            self._dirty = False
+            self._last_flush = time.monotonic()
+
+        tmp_path = self._index_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self._index_path)
+        except Exception as e:
+            logger.error(f"Failed to write phrase embedding index: {e}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'phrases': len(self._index),
+                'hits': self._hits,
+                'misses': self._misses,
+                'writable': self.writable
+            }
@@ -0,0 +1,137 @@
+# app/nlp/pipeline.py
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """One step of the per-document analysis DAG.
+
+    ``fn(context, inputs)`` receives the results of the stages named in
+    ``depends_on``. ``default`` is used when the stage fails, times out or
+    one of its dependencies did not succeed.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any, Dict[str, Any]], Any],
+                 depends_on: List[str] = None, timeout: Optional[float] = None,
+                 default: Any = None):
+        self.name = name
+        self.fn = fn
+        self.depends_on = list(depends_on or [])
+        self.timeout = timeout
+        self.default = default
+
+
+class StageExecutor:
+    """Runs independent stages concurrently on a bounded thread pool.
+
+    Stages start as soon as their dependencies finish. Each stage's wall
+    time is recorded, and a stage that raises or exceeds its timeout
+    yields its default, so the other stages' results are still returned.
+    A timed-out stage cannot be interrupted; its result is discarded.
+    """
+
+    def __init__(self, stages: List[Stage], pool: ThreadPoolExecutor,
+                 default_timeout: Optional[float] = None):
+        names = {stage.name for stage in stages}
+        for stage in stages:
+            missing = set(stage.depends_on) - names
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages {missing}")
+        self.stages = {stage.name: stage for stage in stages}
+        self.pool = pool
+        self.default_timeout = default_timeout
+
+    def run(self, context: Any) -> Dict[str, Any]:
+        """Execute the DAG; returns results, per-stage timings and errors."""
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        errors: Dict[str, str] = {}
+        started: Dict[str, float] = {}
+        lock = threading.Lock()
+
+        pending = dict(self.stages)
+        running: Dict[Future, Stage] = {}
+
+        def execute(stage: Stage, inputs: Dict[str, Any]):
+            with lock:
+                started[stage.name] = time.monotonic()
+            try:
+                return stage.fn(context, inputs)
+            finally:
+                with lock:
+                    timings[stage.name] = round(time.monotonic() - started[stage.name], 4)
+
+        def fail(stage: Stage, reason: str):
+            errors[stage.name] = reason
+            results[stage.name] = stage.default
+            logger.warning(f"Stage '{stage.name}' {reason}")
+
+        while pending or running:
+            # Start every stage whose dependencies have all completed
+            for name, stage in list(pending.items()):
+                if not all(dep in results for dep in stage.depends_on):
+                    continue
+                del pending[name]
+                failed_deps = [dep for dep in stage.depends_on if dep in errors]
+                if failed_deps:
+                    fail(stage, f"skipped: dependencies failed {failed_deps}")
+                    continue
+                inputs = {dep: results[dep] for dep in stage.depends_on}
+                running[self.pool.submit(execute, stage, inputs)] = stage
+
+            if not running:
+                if pending:
+                    # Only reachable with a dependency cycle
+                    for stage in pending.values():
+                        fail(stage, "skipped: unresolvable dependencies")
+                    pending.clear()
+                continue
+
+            done, _ = wait(running, timeout=self._next_timeout(running, started, lock),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage.name] = future.result()
+                except Exception as e:
+                    fail(stage, f"failed: {e}")
+
+            # Abandon stages that have run past their timeout
+            now = time.monotonic()
+            for future, stage in list(running.items()):
+                timeout = self._timeout(stage)
+                with lock:
+                    start = started.get(stage.name)
+                if timeout is not None and start is not None and now - start >= timeout:
+                    running.pop(future)
+                    with lock:
+                        timings[stage.name] = round(now - start, 4)
+                    fail(stage, f"timed out after {timeout}s")
+
+        with lock:
+            return {'results': results, 'timings': dict(timings), 'errors': errors}
+
+    def _timeout(self, stage: Stage) -> Optional[float]:
+        return stage.timeout if stage.timeout is not None else self.default_timeout
+
+    def _next_timeout(self, running: Dict[Future, Stage], started: Dict[str, float],
+                      lock: threading.Lock) -> Optional[float]:
+        """Seconds until the earliest running stage reaches its timeout."""
+        now = time.monotonic()
+        remaining = []
+        with lock:
+            for stage in running.values():
+                timeout = self._timeout(stage)
+                start = started.get(stage.name)
+                if timeout is None:
+                    continue
+                # Queued stages have not started; poll so their clock is picked up
+                remaining.append(timeout - (now - start) if start is not None else 0.05)
+        return max(0.0, min(remaining)) if remaining else None
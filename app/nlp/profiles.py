@@ -0,0 +1,111 @@
+# app/nlp/profiles.py
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.settings import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class ProcessingProfile:
+    """Per-stage model choices and token budgets for one latency/quality trade-off.
+
+    Model names are ModelRegistry entries; a model that is not enabled falls
+    back to the stage's standard model. Stages in ``skip_stages`` do not run.
+    """
+
+    def __init__(self, name: str,
+                 summarizer: str = 'summarizer',
+                 summary_mode: str = 'truncate',
+                 summary_max_length: int = None,
+                 summary_max_tokens: int = 1024,
+                 classifier_mode: str = 'zero_shot',
+                 classifier_max_tokens: int = 1024,
+                 sentiment_model: str = 'sentiment',
+                 sentiment_max_tokens: int = 512,
+                 keyword_ngram_range: Tuple[int, int] = (1, 2),
+                 keyword_use_mmr: bool = True,
+                 windowed_stages: List[str] = None,
+                 skip_stages: List[str] = None):
+        self.name = name
+        self.summarizer = summarizer
+        self.summary_mode = summary_mode
+        self.summary_max_length = summary_max_length or settings.SUMMARY_MAX_LENGTH
+        self.summary_max_tokens = summary_max_tokens
+        self.classifier_mode = classifier_mode
+        self.classifier_max_tokens = classifier_max_tokens
+        self.sentiment_model = sentiment_model
+        self.sentiment_max_tokens = sentiment_max_tokens
+        self.keyword_ngram_range = tuple(keyword_ngram_range)
+        self.keyword_use_mmr = keyword_use_mmr
+        self.windowed_stages = list(windowed_stages or [])
+        self.skip_stages = list(skip_stages or [])
+
+    def runs(self, stage: str) -> bool:
+        return stage not in self.skip_stages
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+def _builtin_profiles() -> Dict[str, Dict[str, Any]]:
+    return {
+        # Throughput for bulk ingestion: extractive summary, small models
+        'fast': {
+            'summary_mode': 'extractive',
+            'classifier_mode': 'embedding',
+            'classifier_max_tokens': 256,
+            'sentiment_model': 'sentiment_distilled',
+            'sentiment_max_tokens': 128,
+            'keyword_ngram_range': (1, 1),
+            'keyword_use_mmr': False,
+        },
+        'balanced': {
+            'summarizer': 'summarizer_distilled',
+            'summary_max_tokens': 512,
+            'classifier_max_tokens': 256,
+            'sentiment_max_tokens': 256,
+        },
+        # The full BART-large pipeline, configured by the global settings
+        'accurate': {
+            'summary_mode': settings.SUMMARY_MODE,
+            'classifier_mode': settings.CLASSIFIER_MODE,
+            'windowed_stages': settings.WINDOWED_STAGES,
+        },
+    }
+
+
+def build_profiles(overrides: Dict[str, Dict[str, Any]] = None) -> Dict[str, ProcessingProfile]:
+    """Built-in profiles updated with ``overrides``.
+
+    An override for an unknown name defines a new profile on top of its
+    ``base`` profile (``accurate`` by default).
+    """
+    definitions = _builtin_profiles()
+    for name, options in (overrides or {}).items():
+        options = dict(options)
+        base = options.pop('base', name if name in definitions else 'accurate')
+        definitions[name] = {**definitions.get(base, {}), **options}
+
+    return {name: ProcessingProfile(name, **options) for name, options in definitions.items()}
+
+
+profiles = build_profiles(settings.PROCESSING_PROFILES)
+
+
+def get_profile(name: Optional[str] = None) -> ProcessingProfile:
+    """Profile by name; the default profile when no name is given."""
+    name = name or settings.DEFAULT_PROFILE
+    if name not in profiles:
+        raise ValueError(f"Unknown processing profile '{name}'; choose from {sorted(profiles)}")
+    return profiles[name]
+
+
+def resolve_profile(name: Optional[str] = None, tenant: Optional[str] = None) -> ProcessingProfile:
+    """An explicit choice wins, then the tenant's profile, then the default."""
+    if not name and tenant:
+        name = settings.TENANT_PROFILES.get(tenant)
+    return get_profile(name)
@@ -0,0 +1,153 @@
+# app/nlp/result_cache.py
+import hashlib
+import json
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.middleware.metrics import NLP_STAGE_CACHE_LOOKUPS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Sentinel distinguishing "not cached" from a cached falsy value
+_MISSING = object()
+
+
+class Uncached:
+    """A stage result to hand back but not store, e.g. a degraded fallback."""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+def unwrap(value: Any) -> Any:
+    return value.value if isinstance(value, Uncached) else value
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of extracted text, so re-exports of a document match."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def text_hash(text: str, normalize: bool = True) -> str:
+    if normalize:
+        text = normalize_text(text)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or (hasattr(value, '__len__') and len(value) == 0)
+
+
+class StageResultCache:
+    """Two-tier cache of NLP stage results keyed by content, model and parameters.
+
+    The first tier is a bounded in-process LRU; the second is Redis when a
+    client is given. Empty results are not stored, since stages return them
+    when a model is unavailable or fails; neither are results a stage wraps
+    in ``Uncached``.
+    """
+
+    def __init__(self, max_entries: int = 2048, redis_client=None,
+                 ttl: int = 7 * 24 * 3600, version: str = "1"):
+        self.max_entries = max_entries
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.version = version
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts: Dict[Tuple[str, str], int] = {}
+
+    def make_key(self, stage: str, content_hash: str, model_id: str,
+                 params: Optional[Dict] = None) -> str:
+        identity = json.dumps([self.version, model_id, params or {}], sort_keys=True, default=str)
+        identity_hash = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+        return f"nlp:{stage}:{identity_hash}:{content_hash}"
+
+    def _record(self, stage: str, result: str):
+        NLP_STAGE_CACHE_LOOKUPS.labels(stage=stage, result=result).inc()
+        with self._lock:
+            self._counts[(stage, result)] = self._counts.get((stage, result), 0) + 1
+
+    def _get_memory(self, key: str) -> Any:
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+            return value
+
+    def _set_memory(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_redis(self, key: str) -> Any:
+        if not self.redis_client:
+            return _MISSING
+        try:
+            cached = self.redis_client.get(key)
+        except Exception as e:
+            logger.error(f"Stage cache read failed: {e}")
+            return _MISSING
+        return _MISSING if cached is None else json.loads(cached)
+
+    def contains(self, key: str) -> bool:
+        """Cheap presence check without counting a lookup."""
+        if self._get_memory(key) is not _MISSING:
+            return True
+        if not self.redis_client:
+            return False
+        try:
+            return bool(self.redis_client.exists(key))
+        except Exception:
+            return False
+
+    def get(self, stage: str, key: str) -> Any:
+        """Return the cached value, or ``_MISSING``; promotes Redis hits to memory."""
+        value = self._get_memory(key)
+        if value is not _MISSING:
+            self._record(stage, 'hit_memory')
+            return value
+
+        value = self._get_redis(key)
+        if value is not _MISSING:
+            self._set_memory(key, value)
+            self._record(stage, 'hit_redis')
+            return value
+
+        self._record(stage, 'miss')
+        return _MISSING
+
+    def set(self, stage: str, key: str, value: Any):
+        if _is_empty(value):
+            return
+        self._set_memory(key, value)
+        if self.redis_client:
+            try:
+                self.redis_client.setex(key, self.ttl, json.dumps(value, default=str))
+            except Exception as e:
+                logger.error(f"Stage cache write failed: {e}")
+
+    def get_or_compute(self, stage: str, key: str, compute):
+        value = self.get(stage, key)
+        if value is _MISSING:
+            value = compute()
+            if isinstance(value, Uncached):
+                return value.value
+            self.set(stage, key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_stage: Dict[str, Dict[str, int]] = {}
+            for (stage, result), count in self._counts.items():
+                per_stage.setdefault(stage, {})[result] = count
+            return {'entries': len(self._entries), 'stages': per_stage}
@@ -1,82 +1,311 @@
 # app/nlp/semantic_analysis.py
-import spacy
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-from keybert import KeyBERT
+import os
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 
+import numpy as np
+
+from app.config.settings import get_settings
+from app.nlp.backends import build_pipeline, save_snapshot
+from app.nlp.batching import InferenceScheduler
+from app.nlp.embedding_classifier import EmbeddingClassifier
+from app.nlp.language import TRIGRAM_PROFILES, UNDETERMINED, language_evidence
+from app.nlp.label_sets import LabelSet, LabelSetRegistry, premise_budget, score_premises
+from app.nlp.phrase_embeddings import PhraseEmbeddingCache
+from app.nlp.pipeline import Stage, StageExecutor
+from app.nlp.profiles import ProcessingProfile, get_profile
+from app.nlp.result_cache import StageResultCache, Uncached, text_hash, unwrap
+from app.nlp.summarization import MapReduceSummarizer, extractive_summary, split_sentences
+from app.nlp.tokenization import TokenCache, pad_batch
+from app.nlp.windowing import aggregate_scores, make_windows, sample_windows
+from app.nlp.model_registry import ModelRegistry
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class SemanticAnalyzer:
-    def __init__(self):
-        self.nlp = None
-        self.summarizer = None
-        self.classifier = None
-        self.kw_model = None
-        self.sentiment_analyzer = None
-        self._initialize_models()
-    
-    def _initialize_models(self):
-        """Initialize all NLP models with error handling."""
-        try:
-            # Load spaCy model
-            self.nlp = spacy.load('en_core_web_sm')
-            logger.info("SpaCy model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load spaCy model: {e}")
+settings = get_settings()
+
+# Shared registry; models are loaded on first use or during warm-up and
+# evicted least recently used first when over the memory budget
+model_registry = ModelRegistry(
+    enabled_models=settings.ENABLED_MODELS,
+    memory_budget_bytes=settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+    pinned=settings.MODEL_PINNED,
+    min_idle_s=settings.MODEL_EVICTION_MIN_IDLE_S
+)
+
+# Collects concurrent transformer calls into micro-batches
+inference_scheduler = InferenceScheduler(
+    max_batch_size=settings.BATCH_SIZE,
+    max_wait_ms=settings.BATCH_MAX_WAIT_MS,
+    enabled=settings.INFERENCE_BATCHING_ENABLED
+)
+
+# Token ids of recent documents, shared by models with the same tokenizer (BART)
+token_cache = TokenCache(
+    max_entries=settings.TOKEN_CACHE_SIZE,
+    prefix_chars=settings.TOKEN_CACHE_PREFIX_CHARS
+)
+
+SUMMARIZER_MODEL = 'facebook/bart-large-cnn'
+DISTILLED_SUMMARIZER_MODEL = 'sshleifer/distilbart-cnn-12-6'
+CLASSIFIER_MODEL = 'facebook/bart-large-mnli'
+SENTIMENT_MODEL = 'cardiffnlp/twitter-roberta-base-sentiment-latest'
+DISTILLED_SENTIMENT_MODEL = 'distilbert-base-uncased-finetuned-sst-2-english'
+MULTILINGUAL_SENTIMENT_MODEL = 'cardiffnlp/twitter-xlm-roberta-base-sentiment'
+KEYBERT_MODEL = 'all-MiniLM-L6-v2'  # KeyBERT's default sentence-transformer
+
+# Model behind each transformer registry entry
+MODEL_IDS = {
+    'summarizer': SUMMARIZER_MODEL,
+    'summarizer_distilled': DISTILLED_SUMMARIZER_MODEL,
+    'classifier': CLASSIFIER_MODEL,
+    'sentiment': SENTIMENT_MODEL,
+    'sentiment_distilled': DISTILLED_SENTIMENT_MODEL,
+    'sentiment_multilingual': MULTILINGUAL_SENTIMENT_MODEL,
+}
+
+DEFAULT_CATEGORIES = [
+    'Technical Documentation', 'Legal Document', 'Financial Report',
+    'Academic Paper', 'Medical Document', 'Business Report',
+    'Marketing Material', 'News Article', 'Educational Content',
+    'Research Paper'
+]
+
+# Label sets are identified by content hash so repeated taxonomies are free
+label_set_registry = LabelSetRegistry(max_size=settings.LABEL_SET_CACHE_SIZE)
+default_label_set = label_set_registry.register(DEFAULT_CATEGORIES, pinned=True)
+
+# Candidate-phrase embeddings persisted across documents and restarts
+phrase_embedding_cache = None
+if settings.PHRASE_EMBEDDING_CACHE_ENABLED:
+    try:
+        phrase_embedding_cache = PhraseEmbeddingCache(
+            os.path.join(settings.PHRASE_EMBEDDING_CACHE_DIR, KEYBERT_MODEL),
+            max_phrases=settings.PHRASE_EMBEDDING_CACHE_MAX_PHRASES
+        )
+    except Exception as e:
+        logger.error(f"Phrase embedding cache unavailable: {e}")
+
+# Per-stage results keyed by (normalized text hash, model id, stage parameters)
+stage_cache = None
+if settings.STAGE_CACHE_ENABLED:
+    from app.utils.cache import redis_client
+    stage_cache = StageResultCache(
+        max_entries=settings.STAGE_CACHE_MAX_ENTRIES,
+        redis_client=redis_client,
+        ttl=settings.STAGE_CACHE_TTL_SECONDS,
+        version=settings.STAGE_CACHE_VERSION
+    )
+
+
+class AnalysisContext:
+    """Per-document state shared by the analysis stages.
+
+    The spaCy ``Doc`` is parsed once and handed to every stage that needs
+    entities or sentences, instead of each stage re-running the pipeline.
+    ``full_text`` keeps the untruncated text for stages that chunk it.
+    ``language`` is the detected language, or None when detection is off.
+    ``profile`` selects the models and token budgets of each stage.
+    """
+
+    def __init__(self, text: str, doc=None, full_text: str = None,
+                 language: str = None, profile: ProcessingProfile = None):
+        self.text = text
+        self.doc = doc
+        self.full_text = full_text if full_text is not None else text
+        self.language = language
+        self.profile = profile or get_profile()
+        self.skipped_stages: List[str] = []
+        self._hashes = {}
+    
+    def content_hash(self, full: bool = False, raw: bool = False) -> str:
+        """Hash of the normalized (full) text, computed once per context.
         
-        try:
-            # Load summarization model
-            self.summarizer = pipeline(
-                'summarization', 
-                model='facebook/bart-large-cnn',
-                device=-1  # Use CPU
+        ``raw`` hashes the text as is, for stages whose output depends on
+        line breaks or spacing.
+        """
+        if (full, raw) not in self._hashes:
+            self._hashes[full, raw] = text_hash(
+                self.full_text if full else self.text, normalize=not raw
             )
-            logger.info("Summarization model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load summarization model: {e}")
+        return self._hashes[full, raw]
+
+
+def _load_spacy():
+    import spacy
+    # Disable pipeline components no stage uses
+    return spacy.load(
+        settings.SPACY_MODEL,
+        disable=settings.SPACY_DISABLED_COMPONENTS
+    )
+
+def _load_summarizer():
+    return build_pipeline('summarization', SUMMARIZER_MODEL)
+
+def _load_distilled_summarizer():
+    return build_pipeline('summarization', DISTILLED_SUMMARIZER_MODEL)
+
+def _load_classifier():
+    return build_pipeline('zero-shot-classification', CLASSIFIER_MODEL)
+
+def _load_keybert():
+    from keybert import KeyBERT
+    return KeyBERT()
+
+def _load_sentiment_analyzer():
+    return build_pipeline('sentiment-analysis', SENTIMENT_MODEL)
+
+def _load_distilled_sentiment_analyzer():
+    return build_pipeline('sentiment-analysis', DISTILLED_SENTIMENT_MODEL)
+
+def _load_multilingual_sentiment_analyzer():
+    return build_pipeline('sentiment-analysis', MULTILINGUAL_SENTIMENT_MODEL)
+
+
+class SemanticAnalyzer:
+    def __init__(self, registry: ModelRegistry = None,
+                 scheduler: InferenceScheduler = None,
+                 tokens: TokenCache = None,
+                 phrase_embeddings: PhraseEmbeddingCache = None):
+        self.registry = registry or model_registry
+        self.scheduler = scheduler or inference_scheduler
+        self.tokens = tokens or token_cache
+        self.phrase_embeddings = phrase_embeddings or phrase_embedding_cache
+        self.embedding_classifier = EmbeddingClassifier(
+            self._embed, max_label_sets=settings.LABEL_SET_CACHE_SIZE
+        )
+        self._register_models()
+    
+    def _register_models(self):
+        """Register model loaders; models load lazily on first use."""
+        loaders = {
+            'summarizer': _load_summarizer,
+            'summarizer_distilled': _load_distilled_summarizer,
+            'classifier': _load_classifier,
+            'sentiment': _load_sentiment_analyzer,
+            'sentiment_distilled': _load_distilled_sentiment_analyzer,
+            'sentiment_multilingual': _load_multilingual_sentiment_analyzer,
+        }
+        self.registry.register('spacy', _load_spacy)
+        self.registry.register('keybert', _load_keybert)
+        for name, loader in loaders.items():
+            # Evicted transformer models are reloaded from a local snapshot
+            self.registry.register(
+                name, loader, snapshot=partial(save_snapshot, model_name=MODEL_IDS[name])
+            )
+    
+    @property
+    def nlp(self):
+        return self.registry.get('spacy')
+    
+    @property
+    def summarizer(self):
+        return self.registry.get('summarizer')
+    
+    @property
+    def classifier(self):
+        return self.registry.get('classifier')
+    
+    @property
+    def kw_model(self):
+        return self.registry.get('keybert')
+    
+    @property
+    def sentiment_analyzer(self):
+        return self.registry.get('sentiment')
+    
+    def warm_up(self, names: List[str] = None) -> Dict[str, bool]:
+        """Load models ahead of the first request."""
+        return self.registry.warm_up(names)
+    
+    def parse(self, text: str):
+        """Parse a single text with spaCy, returning None if unavailable."""
+        if not self.nlp:
+            return None
         
         try:
-            # Load classification model
-            self.classifier = pipeline(
-                'zero-shot-classification',
-                model='facebook/bart-large-mnli',
-                device=-1
-            )
-            logger.info("Classification model loaded successfully")
+            return self.nlp(text)
         except Exception as e:
-            logger.error(f"Failed to load classification model: {e}")
+            logger.error(f"spaCy parsing failed: {e}")
+            return None
+    
+    def parse_batch(self, texts: List[str]) -> List[Optional[object]]:
+        """Parse several texts in one nlp.pipe pass."""
+        if not self.nlp or not texts:
+            return [None] * len(texts)
         
         try:
-            # Load KeyBERT model
-            self.kw_model = KeyBERT()
-            logger.info("KeyBERT model loaded successfully")
+            return list(self.nlp.pipe(
+                texts,
+                batch_size=settings.SPACY_BATCH_SIZE,
+                n_process=settings.SPACY_N_PROCESS
+            ))
         except Exception as e:
-            logger.error(f"Failed to load KeyBERT model: {e}")
+            logger.error(f"Batched spaCy parsing failed: {e}")
+            return [self.parse(text) for text in texts]
+    
+    def detect_language(self, text: str) -> Optional[str]:
+        """Detected language code, 'und' when unsure, None when detection is off.
         
-        try:
-            # Load sentiment analysis model
-            self.sentiment_analyzer = pipeline(
-                'sentiment-analysis',
-                model='cardiffnlp/twitter-roberta-base-sentiment-latest',
-                device=-1
+        Stages are only skipped or rerouted on clear evidence: short or
+        mixed-language Latin-script text counts as undetermined, so every
+        stage runs for it. Every trigram profile is scored, so a language
+        outside SUPPORTED_LANGUAGES is reported as itself rather than as
+        its closest supported neighbour (Portuguese as Spanish).
+        """
+        if not settings.LANGUAGE_DETECTION_ENABLED:
+            return None
+        
+        evidence = language_evidence(text)
+        if evidence['confidence'] < settings.LANGUAGE_MIN_CONFIDENCE:
+            return UNDETERMINED
+        if evidence['method'] == 'trigram' and (
+                evidence['letters'] < settings.LANGUAGE_MIN_LETTERS
+                or evidence['margin'] < settings.LANGUAGE_MIN_MARGIN):
+            return UNDETERMINED
+        return evidence['language']
+    
+    def _model_name(self, preferred: str, standard: str) -> str:
+        """A profile's model if enabled, otherwise the stage's standard model."""
+        return preferred if self.registry.is_enabled(preferred) else standard
+    
+    def create_contexts(self, texts: List[str], full_texts: List[str] = None,
+                        needs_parse=None,
+                        profile: ProcessingProfile = None) -> List[AnalysisContext]:
+        """Build analysis contexts for a batch of documents.
+        
+        ``needs_parse(context)`` can exclude documents from the batched
+        parse, e.g. when every stage that uses the Doc is already cached.
+        """
+        if full_texts is None:
+            full_texts = texts
+        contexts = [
+            AnalysisContext(
+                text, full_text=full_text,
+                language=self.detect_language(text), profile=profile
             )
-            logger.info("Sentiment analysis model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load sentiment analysis model: {e}")
+            for text, full_text in zip(texts, full_texts)
+        ]
+        
+        to_parse = [c for c in contexts if needs_parse is None or needs_parse(c)]
+        for context, doc in zip(to_parse, self.parse_batch([c.text for c in to_parse])):
+            context.doc = doc
+        return contexts
     
-    def perform_ner(self, text: str) -> Dict[str, List[str]]:
+    def perform_ner(self, text: str, doc=None) -> Dict[str, List[str]]:
         """Enhanced Named Entity Recognition."""
         entities = {}
         
-        if not self.nlp:
+        if doc is None:
+            doc = self.parse(text)
+        if doc is None:
             return entities
         
         try:
-            doc = self.nlp(text)
-            
             for ent in doc.ents:
                 label = ent.label_
                 if label not in entities:
@@ -96,52 +325,270 @@ class SemanticAnalyzer:
         
         return entities
     
-    def generate_summary(self, text: str, max_length: int = 150) -> str:
-        """Generate text summary with length control."""
-        if not self.summarizer or len(text) < 100:
-            return ""
+    def _summarize_batch(self, batch: List[List[int]], max_length: int,
+                         model_name: str = 'summarizer') -> List[str]:
+        """Generate summaries for pre-tokenized inputs (ids without special tokens)."""
+        import torch
         
+        with self.registry.acquire(model_name) as summarizer:
+            tokenizer = summarizer.tokenizer
+            input_ids, attention_mask = pad_batch(
+                [tokenizer.build_inputs_with_special_tokens(ids) for ids in batch],
+                tokenizer.pad_token_id
+            )
+            with torch.inference_mode():
+                outputs = summarizer.model.generate(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    max_length=max_length,
+                    min_length=30,
+                    do_sample=False
+                )
+        return [
+            summary.strip() for summary in tokenizer.batch_decode(
+                outputs, skip_special_tokens=True, clean_up_tokenization_spaces=True
+            )
+        ]
+    
+    def _submit_summary(self, text: str, max_length: int, cache: bool = True,
+                        model_name: str = 'summarizer', max_tokens: int = 1024):
+        tokenizer = self.registry.get(model_name).tokenizer
+        # Fill the token budget exactly instead of cutting by characters
+        budget = min(tokenizer.model_max_length, max_tokens) - tokenizer.num_special_tokens_to_add()
+        input_ids = self.tokens.encode(tokenizer, text, budget, cache=cache)
+        return self.scheduler.submit(
+            model_name,
+            partial(self._summarize_batch, max_length=max_length, model_name=model_name),
+            input_ids,
+            length=len(input_ids),
+            key=max_length
+        )
+    
+    def _generate_map_reduce_summary(self, text: str, max_length: int, doc=None,
+                                     model_name: str = 'summarizer',
+                                     max_tokens: int = 1024) -> str:
+        """Summarize token-budgeted chunks, then summarize the partial summaries."""
         try:
-            # Truncate text if too long for model
-            max_input_length = 1024
-            if len(text) > max_input_length:
-                text = text[:max_input_length]
+            summarizer = MapReduceSummarizer(
+                partial(self._submit_summary, cache=False,
+                        model_name=model_name, max_tokens=max_tokens),
+                self.registry.get(model_name).tokenizer,
+                chunk_tokens=min(settings.SUMMARY_CHUNK_TOKENS, max_tokens),
+                max_chunks=settings.SUMMARY_MAX_CHUNKS,
+                concurrency=settings.SUMMARY_CONCURRENCY,
+                time_budget_s=settings.SUMMARY_TIME_BUDGET_S,
+                chunk_summary_length=settings.SUMMARY_CHUNK_MAX_LENGTH
+            )
+            summary = summarizer.summarize(text, max_length, doc)
+            logger.info(f"Generated map-reduce summary of {len(summary)} characters")
+            return summary
             
-            summary_result = self.summarizer(
-                text, 
-                max_length=max_length, 
-                min_length=30, 
-                do_sample=False
+        except Exception as e:
+            logger.error(f"Map-reduce summarization failed: {e}")
+            return ""
+    
+    def _classify_batch(self, batch: List[Tuple[List[int], LabelSet]]) -> List[Dict]:
+        """Score (premise ids, label set) items, one NLI pass per label set in the batch.
+        
+        Label sets travel with the items so a single queue serves them all;
+        keying queues by label set would start a batcher thread per set.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, (_, label_set) in enumerate(batch):
+            groups.setdefault(label_set.id, []).append(index)
+        
+        results: List[Optional[Dict]] = [None] * len(batch)
+        with self.registry.acquire('classifier') as classifier:
+            for indices in groups.values():
+                scored = score_premises(
+                    classifier.model,
+                    classifier.tokenizer,
+                    [batch[index][0] for index in indices],
+                    batch[indices[0]][1],
+                    max_pairs_per_forward=settings.NLI_MAX_PAIRS_PER_FORWARD
+                )
+                for index, result in zip(indices, scored):
+                    results[index] = result
+        return results
+    
+    def summarizer_name(self, profile: ProcessingProfile = None) -> str:
+        profile = profile or get_profile()
+        return self._model_name(profile.summarizer, 'summarizer')
+    
+    def sentiment_model_name(self, language: str = None,
+                             profile: ProcessingProfile = None) -> Optional[str]:
+        """Registry name of the sentiment model for a language; None if unsupported."""
+        profile = profile or get_profile()
+        if language_supported('sentiment', language):
+            return self._model_name(profile.sentiment_model, 'sentiment')
+        if (language in settings.MULTILINGUAL_SENTIMENT_LANGUAGES
+                and self.registry.is_enabled('sentiment_multilingual')):
+            return 'sentiment_multilingual'
+        return None
+    
+    def _sentiment_batch(self, texts: List[str], model_name: str = 'sentiment',
+                         max_tokens: int = 512) -> List[Dict]:
+        with self.registry.acquire(model_name) as pipe:
+            return pipe(texts, batch_size=len(texts), truncation=True, max_length=max_tokens)
+    
+    def _sentiment_scores_batch(self, texts: List[str],
+                                model_name: str = 'sentiment') -> List[Dict[str, float]]:
+        with self.registry.acquire(model_name) as pipe:
+            results = pipe(texts, top_k=None, batch_size=len(texts))
+        return [{item['label']: item['score'] for item in result} for result in results]
+    
+    def _windows(self, text: str, tokenizer) -> List[Tuple[str, int]]:
+        """Token windows over the text, sampled down to WINDOW_MAX_WINDOWS by salience."""
+        windows = make_windows(
+            text, tokenizer, settings.WINDOW_TOKENS, settings.WINDOW_STRIDE_TOKENS
+        )
+        return sample_windows(windows, settings.WINDOW_MAX_WINDOWS)
+    
+    def _run_windows(self, name: str, batch_fn, windows: List[Tuple], key=()) -> List:
+        """Submit all windows at once so the scheduler runs them as one batch."""
+        futures = [
+            self.scheduler.submit(name, batch_fn, window, length=tokens, key=key)
+            for window, tokens in windows
+        ]
+        return [future.result() for future in futures]
+    
+    def generate_extractive_summary(self, text: str, doc=None) -> str:
+        """Most central sentences by TextRank, reusing the spaCy segmentation."""
+        try:
+            summary = extractive_summary(
+                split_sentences(text, doc),
+                max_sentences=settings.SUMMARY_EXTRACTIVE_SENTENCES,
+                max_candidates=settings.SUMMARY_EXTRACTIVE_MAX_CANDIDATES
             )
+            logger.info(f"Generated extractive summary of {len(summary)} characters")
+            return summary
             
-            summary = summary_result[0]['summary_text']
+        except Exception as e:
+            logger.error(f"Extractive summarization failed: {e}")
+            return ""
+    
+    def generate_summary(self, text: str, max_length: int = None, doc=None,
+                         profile: ProcessingProfile = None) -> str:
+        """Generate text summary with length control."""
+        return unwrap(self.summarize(text, max_length, doc, profile))
+    
+    def _abstractive_summary(self, text: str, max_length: int, doc, model_name: str,
+                             profile: ProcessingProfile) -> str:
+        """The model's summary, or "" when it fails or exceeds the time budget."""
+        if profile.summary_mode == 'map_reduce':
+            return self._generate_map_reduce_summary(
+                text, max_length, doc, model_name, profile.summary_max_tokens
+            )
+        
+        future = self._submit_summary(
+            text, max_length, model_name=model_name, max_tokens=profile.summary_max_tokens
+        )
+        try:
+            summary = future.result(timeout=settings.SUMMARY_TIME_BUDGET_S)
             logger.info(f"Generated summary of {len(summary)} characters")
             return summary
-            
+        except FutureTimeoutError:
+            future.cancel()
+            logger.warning(
+                f"Summary exceeded its {settings.SUMMARY_TIME_BUDGET_S}s time budget"
+            )
         except Exception as e:
             logger.error(f"Summarization failed: {e}")
+        return ""
+    
+    def summarize(self, text: str, max_length: int = None, doc=None,
+                  profile: ProcessingProfile = None) -> Union[str, Uncached]:
+        """Summary for the profile's mode; an extractive fallback comes back ``Uncached``.
+        
+        The fallback stands in for a slow or failed abstractive run, so it
+        must not be cached under the abstractive model's identity.
+        """
+        profile = profile or get_profile()
+        max_length = max_length or profile.summary_max_length
+        if len(text) < 100:
             return ""
+        if profile.summary_mode == 'extractive':
+            return self.generate_extractive_summary(text, doc)
+        
+        model_name = self.summarizer_name(profile)
+        if self.registry.get(model_name):
+            summary = self._abstractive_summary(text, max_length, doc, model_name, profile)
+        else:
+            logger.warning(f"Summarizer '{model_name}' is unavailable")
+            summary = ""
+        
+        if not summary and settings.SUMMARY_EXTRACTIVE_FALLBACK:
+            logger.info("Falling back to extractive summary")
+            return Uncached(self.generate_extractive_summary(text, doc))
+        return summary
+    
+    def _embed(self, texts: List[str]):
+        """Encode texts with the sentence-transformer KeyBERT already loads."""
+        with self.registry.acquire('keybert') as kw_model:
+            return kw_model.model.embed(texts)
+    
+    def _embed_batch(self, texts: List[str]) -> List:
+        return list(self._embed(texts))
     
-    def classify_document(self, text: str, candidate_labels: List[str] = None) -> List[str]:
+    def _embed_document(self, text: str):
+        """Document embedding, batched with other documents being analyzed."""
+        return self.scheduler.run('embedder', self._embed_batch, text, length=len(text))
+    
+    def _classify_by_embedding(self, text: str, candidate_labels: List[str]) -> Optional[List[str]]:
+        """Rank labels by embedding similarity; None means fall back to MNLI."""
+        if not self.kw_model:
+            return None
+        
+        try:
+            document_embedding = self._embed_document(text)
+            ranked, margin = self.embedding_classifier.rank(
+                document_embedding, candidate_labels
+            )
+        except Exception as e:
+            logger.error(f"Embedding classification failed: {e}")
+            return None
+        
+        if margin < settings.CLASSIFIER_MIN_MARGIN:
+            logger.info(f"Embedding margin {margin:.3f} too low, falling back to MNLI")
+            return None
+        
+        top_categories = ranked[:3]
+        logger.info(f"Classified document by embedding into: {top_categories}")
+        return top_categories
+    
+    def classify_document(self, text: str, candidate_labels: List[str] = None,
+                          label_set: LabelSet = None,
+                          profile: ProcessingProfile = None) -> List[str]:
         """Classify document into categories."""
+        profile = profile or get_profile()
+        if label_set is None:
+            if candidate_labels is None:
+                label_set = default_label_set
+            else:
+                label_set = label_set_registry.register(candidate_labels)
+        
+        if profile.classifier_mode == 'embedding':
+            top_categories = self._classify_by_embedding(text, label_set.labels)
+            if top_categories is not None:
+                return top_categories
+        
         if not self.classifier:
             return []
         
-        if candidate_labels is None:
-            candidate_labels = [
-                'Technical Documentation', 'Legal Document', 'Financial Report',
-                'Academic Paper', 'Medical Document', 'Business Report',
-                'Marketing Material', 'News Article', 'Educational Content',
-                'Research Paper'
-            ]
-        
         try:
-            # Truncate text for classification
-            max_length = 512
-            if len(text) > max_length:
-                text = text[:max_length]
+            # Shares the summarizer's token ids: both BART models use one tokenizer
+            tokenizer = self.classifier.tokenizer
+            premise_ids = self.tokens.encode(
+                tokenizer, text,
+                min(premise_budget(tokenizer, label_set), profile.classifier_max_tokens)
+            )
             
-            result = self.classifier(text, candidate_labels)
+            result = self.scheduler.run(
+                'classifier',
+                self._classify_batch,
+                (premise_ids, label_set),
+                length=len(premise_ids)
+            )
             top_categories = result['labels'][:3]
             
             logger.info(f"Classified document into: {top_categories}")
@@ -151,20 +598,92 @@ class SemanticAnalyzer:
             logger.error(f"Classification failed: {e}")
             return []
     
-    def extract_keywords(self, text: str, top_k: int = 10) -> List[Tuple[str, float]]:
+    def classify_document_windowed(self, text: str, label_set: LabelSet = None) -> Dict:
+        """Zero-shot classify every window and aggregate by length-weighted mean."""
+        if not self.classifier:
+            return {}
+        
+        label_set = label_set or default_label_set
+        
+        try:
+            tokenizer = self.classifier.tokenizer
+            windows = self._windows(text, tokenizer)
+            if not windows:
+                return {}
+            
+            window_ids = tokenizer(
+                [window for window, _ in windows], add_special_tokens=False
+            )['input_ids']
+            results = self._run_windows(
+                'classifier',
+                self._classify_batch,
+                [((ids, label_set), len(ids)) for ids in window_ids]
+            )
+            aggregated = aggregate_scores(
+                [dict(zip(r['labels'], r['scores'])) for r in results],
+                [tokens for _, tokens in windows]
+            )
+            mean = aggregated['mean']
+            ranked = sorted(mean, key=mean.get, reverse=True)
+            
+            classification = {
+                'labels': ranked[:3],
+                'scores': {label: round(mean[label], 4) for label in ranked},
+                'variance': {
+                    label: round(aggregated['variance'][label], 6) for label in ranked
+                },
+                'windows': len(windows)
+            }
+            logger.info(f"Classified {len(windows)} windows into: {ranked[:3]}")
+            return classification
+            
+        except Exception as e:
+            logger.error(f"Windowed classification failed: {e}")
+            return {}
+    
+    def _keyword_embeddings(self, text: str, ngram_range: Tuple[int, int]) -> Dict:
+        """Precomputed document and candidate embeddings for KeyBERT.
+        
+        Candidates come from the same CountVectorizer KeyBERT fits, so the
+        rows line up with its vocabulary; only unseen phrases are encoded.
+        """
+        from sklearn.feature_extraction.text import CountVectorizer
+        
+        try:
+            candidates = CountVectorizer(
+                ngram_range=ngram_range, stop_words='english'
+            ).fit([text]).get_feature_names_out()
+        except ValueError:
+            # Empty vocabulary; KeyBERT returns no keywords either
+            return {}
+        
+        return {
+            'doc_embeddings': np.asarray([self._embed_document(text)]),
+            'word_embeddings': self.phrase_embeddings.embed(list(candidates), self._embed)
+        }
+    
+    def extract_keywords(self, text: str, top_k: int = 10,
+                         profile: ProcessingProfile = None) -> List[Tuple[str, float]]:
         """Extract keywords using KeyBERT."""
+        profile = profile or get_profile()
         if not self.kw_model:
             return []
         
         try:
-            keywords = self.kw_model.extract_keywords(
-                text, 
-                keyphrase_ngram_range=(1, 2), 
-                stop_words='english',
-                top_n=top_k,  # Fixed: KeyBERT uses top_n, not top_k
-                use_mmr=True,
-                diversity=0.5
-            )
+            embeddings = {}
+            if self.phrase_embeddings is not None:
+                embeddings = self._keyword_embeddings(text, profile.keyword_ngram_range)
+            
+            with self.registry.acquire('keybert') as kw_model:
+                keywords = kw_model.extract_keywords(
+                    text, 
+                    keyphrase_ngram_range=profile.keyword_ngram_range, 
+                    stop_words='english',
+                    top_n=top_k,  # Fixed: KeyBERT uses top_n, not top_k
+                    use_mmr=profile.keyword_use_mmr,
+                    diversity=0.5,
+                    **embeddings
+                )
             
             logger.info(f"Extracted {len(keywords)} keywords")
             return keywords
@@ -173,21 +692,29 @@ class SemanticAnalyzer:
             logger.error(f"Keyword extraction failed: {e}")
             return []
     
-    def analyze_sentiment(self, text: str) -> Dict[str, float]:
+    def analyze_sentiment(self, text: str, language: str = None,
+                          profile: ProcessingProfile = None) -> Dict[str, float]:
         """Analyze document sentiment."""
-        if not self.sentiment_analyzer:
+        profile = profile or get_profile()
+        model_name = self.sentiment_model_name(language, profile)
+        if not model_name or not self.registry.get(model_name):
             return {}
         
         try:
-            # Truncate text for sentiment analysis
-            max_length = 512
-            if len(text) > max_length:
-                text = text[:max_length]
+            # The pipeline truncates to the token budget; skip tokenizing the rest
+            max_tokens = profile.sentiment_max_tokens
+            text = text[:max_tokens * 16]
             
-            result = self.sentiment_analyzer(text)
+            result = self.scheduler.run(
+                model_name,
+                partial(self._sentiment_batch, model_name=model_name, max_tokens=max_tokens),
+                text,
+                length=len(text),
+                key=max_tokens
+            )
             sentiment = {
-                'label': result[0]['label'],
-                'score': result[0]['score']
+                'label': result['label'],
+                'score': result['score']
             }
             
             logger.info(f"Sentiment analysis: {sentiment}")
@@ -197,7 +724,43 @@ class SemanticAnalyzer:
             logger.error(f"Sentiment analysis failed: {e}")
             return {}
     
-    def identify_key_sections(self, text: str) -> List[str]:
+    def analyze_sentiment_windowed(self, text: str, language: str = None,
+                                   profile: ProcessingProfile = None) -> Dict:
+        """Sentiment over the whole document as a length-weighted mean of windows."""
+        model_name = self.sentiment_model_name(language, profile)
+        if not model_name or not self.registry.get(model_name):
+            return {}
+        
+        try:
+            windows = self._windows(text, self.registry.get(model_name).tokenizer)
+            if not windows:
+                return {}
+            
+            scores = self._run_windows(
+                model_name,
+                partial(self._sentiment_scores_batch, model_name=model_name),
+                windows,
+                key='all_scores'
+            )
+            aggregated = aggregate_scores(scores, [tokens for _, tokens in windows])
+            mean = aggregated['mean']
+            label = max(mean, key=mean.get)
+            
+            sentiment = {
+                'label': label,
+                'score': mean[label],
+                'scores': {k: round(v, 4) for k, v in mean.items()},
+                'variance': {k: round(v, 6) for k, v in aggregated['variance'].items()},
+                'windows': len(windows)
+            }
+            logger.info(f"Windowed sentiment over {len(windows)} windows: {label}")
+            return sentiment
+            
+        except Exception as e:
+            logger.error(f"Windowed sentiment analysis failed: {e}")
+            return {}
+    
+    def identify_key_sections(self, text: str, doc=None) -> List[str]:
         """Identify key sections using multiple strategies."""
         key_sections = []
         
@@ -208,9 +771,10 @@ class SemanticAnalyzer:
             key_sections.extend(headings[:5])
         
         # Strategy 2: Find sentences with high entity density
-        if self.nlp:
+        if doc is None:
+            doc = self.parse(text)
+        if doc is not None:
             try:
-                doc = self.nlp(text)
                 sentences = list(doc.sents)
                 
                 scored_sentences = []
@@ -229,23 +793,346 @@ class SemanticAnalyzer:
         
         return key_sections[:5]  # Return top 5 sections
 
-# Global analyzer instance
+# Global analyzer instance (cheap: no models are loaded here)
 analyzer = SemanticAnalyzer()
 
-def perform_ner(text: str) -> Dict[str, List[str]]:
-    return analyzer.perform_ner(text)
+def create_contexts(texts: List[str], full_texts: List[str] = None, needs_parse=None,
+                    profile: ProcessingProfile = None) -> List[AnalysisContext]:
+    return analyzer.create_contexts(texts, full_texts, needs_parse, profile)
+
+def perform_ner(text: str, doc=None) -> Dict[str, List[str]]:
+    return analyzer.perform_ner(text, doc)
+
+def generate_summary(text: str, max_length: int = None, doc=None,
+                     profile: ProcessingProfile = None) -> str:
+    return analyzer.generate_summary(text, max_length, doc, profile)
+
+def classify_text(text: str, candidate_labels: List[str] = None,
+                  label_set: LabelSet = None, profile: ProcessingProfile = None) -> List[str]:
+    return analyzer.classify_document(text, candidate_labels, label_set, profile)
+
+def extract_keywords(text: str, top_k: int = 10,
+                     profile: ProcessingProfile = None) -> List[Tuple[str, float]]:
+    return analyzer.extract_keywords(text, top_k, profile)
+
+def analyze_sentiment(text: str, language: str = None,
+                      profile: ProcessingProfile = None) -> Dict[str, float]:
+    return analyzer.analyze_sentiment(text, language, profile)
+
+def identify_key_sections(text: str, doc=None) -> List[str]:
+    return analyzer.identify_key_sections(text, doc)
+
+def classify_text_windowed(text: str, label_set: LabelSet = None) -> Dict:
+    return analyzer.classify_document_windowed(text, label_set)
+
+def analyze_sentiment_windowed(text: str, language: str = None,
+                               profile: ProcessingProfile = None) -> Dict:
+    return analyzer.analyze_sentiment_windowed(text, language, profile)
+
+# Bounded pool shared by all documents' stages; PyTorch releases the GIL
+stage_pool = ThreadPoolExecutor(
+    max_workers=settings.PIPELINE_MAX_WORKERS, thread_name_prefix='nlp-stage'
+)
+
+# Stages whose computation uses the spaCy Doc
+DOC_STAGES = ('entities', 'key_sections', 'summary')
+
+# Stages that read line structure (key_sections matches headings line by
+# line), so whitespace-normalized text is not a safe cache key for them
+LINE_SENSITIVE_STAGES = ('key_sections',)
 
-def generate_summary(text: str, max_length: int = 150) -> str:
-    return analyzer.generate_summary(text, max_length)
+# Summary modes that segment sentences with the Doc; the truncate mode
+# feeds raw text to the model and its fallback can split by punctuation
+SUMMARY_DOC_MODES = ('extractive', 'map_reduce')
 
-def classify_text(text: str, candidate_labels: List[str] = None) -> List[str]:
-    return analyzer.classify_document(text, candidate_labels)
+def doc_stages(profile: ProcessingProfile = None) -> Tuple[str, ...]:
+    """The stages that use the spaCy Doc under a profile's summary mode."""
+    if (profile or get_profile()).summary_mode in SUMMARY_DOC_MODES:
+        return DOC_STAGES
+    return tuple(name for name in DOC_STAGES if name != 'summary')
 
-def extract_keywords(text: str, top_k: int = 10) -> List[Tuple[str, float]]:
-    return analyzer.extract_keywords(text, top_k)
+def gating_language(language: str = None) -> Optional[str]:
+    """The language stages are gated on: trigram languages outside
+    SUPPORTED_LANGUAGES count as undetermined."""
+    if language in TRIGRAM_PROFILES and language not in settings.SUPPORTED_LANGUAGES:
+        return UNDETERMINED
+    return language
+
+def language_supported(name: str, language: str = None) -> bool:
+    """Whether the stage's default model handles the language.
+    
+    Unknown, undetermined or unsupported languages run every stage, as
+    before detection.
+    """
+    language = gating_language(language)
+    if language is None or language == UNDETERMINED:
+        return True
+    supported = settings.STAGE_LANGUAGES.get(name)
+    return supported is None or language in supported
+
+def stage_runs_for(name: str, language: str = None,
+                   profile: ProcessingProfile = None) -> bool:
+    """Whether a stage runs at all, directly or rerouted to another model."""
+    if profile is not None and not profile.runs(name):
+        return False
+    if name == 'sentiment':
+        return analyzer.sentiment_model_name(language, profile) is not None
+    if name == 'summary' and (profile or get_profile()).summary_mode == 'extractive':
+        # TextRank needs no language model
+        return True
+    return language_supported(name, language)
+
+def _stage_identity(name: str, label_set: LabelSet = None, language: str = None,
+                    profile: ProcessingProfile = None) -> Tuple[bool, str, Dict]:
+    """What determines a stage's output: (uses full text, model id, parameters)."""
+    profile = profile or get_profile()
+    windowed = profile.windowed_stages
+    backend = settings.INFERENCE_BACKEND
+    window_params = {
+        'windowed': True,
+        'window_tokens': settings.WINDOW_TOKENS,
+        'stride_tokens': settings.WINDOW_STRIDE_TOKENS,
+        'max_windows': settings.WINDOW_MAX_WINDOWS
+    }
+    
+    if name in ('entities', 'key_sections'):
+        return False, settings.SPACY_MODEL, {'disabled': settings.SPACY_DISABLED_COMPONENTS}
+    
+    if name == 'summary':
+        params = {
+            'mode': profile.summary_mode,
+            'max_length': profile.summary_max_length,
+            'max_tokens': profile.summary_max_tokens
+        }
+        if profile.summary_mode == 'extractive':
+            return True, 'textrank', {
+                'sentences': settings.SUMMARY_EXTRACTIVE_SENTENCES,
+                'max_candidates': settings.SUMMARY_EXTRACTIVE_MAX_CANDIDATES
+            }
+        if profile.summary_mode == 'map_reduce':
+            params.update(
+                chunk_tokens=settings.SUMMARY_CHUNK_TOKENS,
+                max_chunks=settings.SUMMARY_MAX_CHUNKS,
+                chunk_max_length=settings.SUMMARY_CHUNK_MAX_LENGTH
+            )
+        return True, f"{MODEL_IDS[analyzer.summarizer_name(profile)]}@{backend}", params
+    
+    if name == 'keywords':
+        return False, KEYBERT_MODEL, {
+            'top_k': 10,
+            'ngram_range': profile.keyword_ngram_range,
+            'use_mmr': profile.keyword_use_mmr
+        }
+    
+    if name in ('categories', 'category_scores'):
+        params = {'label_set': (label_set or default_label_set).id}
+        if 'classification' in windowed:
+            return True, f"{CLASSIFIER_MODEL}@{backend}", dict(params, **window_params)
+        params.update(
+            mode=profile.classifier_mode,
+            min_margin=settings.CLASSIFIER_MIN_MARGIN,
+            max_tokens=profile.classifier_max_tokens
+        )
+        return False, f"{CLASSIFIER_MODEL}@{backend}", params
+    
+    if name == 'sentiment':
+        model = MODEL_IDS[analyzer.sentiment_model_name(language, profile) or 'sentiment']
+        if 'sentiment' in windowed:
+            return True, f"{model}@{backend}", window_params
+        return False, f"{model}@{backend}", {'max_tokens': profile.sentiment_max_tokens}
+    
+    raise ValueError(f"Unknown stage: {name}")
+
+def stage_cache_key(name: str, context: AnalysisContext, label_set: LabelSet = None) -> str:
+    full, model_id, params = _stage_identity(
+        name, label_set, context.language, context.profile
+    )
+    content = context.content_hash(full, raw=name in LINE_SENSITIVE_STAGES)
+    return stage_cache.make_key(name, content, model_id, params)
+
+def _needs_parse(context: AnalysisContext) -> bool:
+    """False when every stage that would use the Doc is skipped or cached."""
+    names = [
+        name for name in doc_stages(context.profile)
+        if stage_runs_for(name, context.language, context.profile)
+    ]
+    if not names:
+        return False
+    if stage_cache is None:
+        return True
+    return not all(
+        stage_cache.contains(stage_cache_key(name, context)) for name in names
+    )
+
+def _parse_stage(context: AnalysisContext, inputs: Dict):
+    if context.doc is None and _needs_parse(context):
+        context.doc = analyzer.parse(context.text)
+    return context.doc
+
+def build_analysis_stages(label_set: LabelSet = None,
+                          profile: ProcessingProfile = None) -> List[Stage]:
+    """Declare the per-document analysis DAG.
+    
+    Only NER, key sections and summary sentence splitting need the spaCy
+    parse; every model-backed stage is independent of the others.
+    Windowed stages look at the whole document instead of its opening.
+    The profile picks windowed stages here; stages read the rest from
+    the context's profile.
+    """
+    windowed = (profile or get_profile()).windowed_stages
+    timeouts = settings.PIPELINE_STAGE_TIMEOUTS
+    
+    def stage(name, compute, depends_on=None, default=None):
+        if stage_cache is not None:
+            def run(ctx, inputs):
+                return stage_cache.get_or_compute(
+                    name,
+                    stage_cache_key(name, ctx, label_set),
+                    lambda: compute(ctx, inputs)
+                )
+        else:
+            def run(ctx, inputs):
+                return unwrap(compute(ctx, inputs))
+        
+        def gated(ctx, inputs):
+            # Skip stages the profile leaves out, and models that would
+            # produce meaningless output for the language
+            if not stage_runs_for(name, ctx.language, ctx.profile):
+                ctx.skipped_stages.append(name)
+                return default
+            return run(ctx, inputs)
+        
+        return Stage(name, gated, depends_on, timeouts.get(name), default)
+    
+    stages = [
+        Stage('parse', _parse_stage, timeout=timeouts.get('parse')),
+        stage('entities', lambda ctx, inputs: perform_ner(ctx.text, inputs['parse']),
+              ['parse'], {}),
+        stage('key_sections',
+              lambda ctx, inputs: identify_key_sections(ctx.text, inputs['parse']),
+              ['parse'], []),
+        stage('summary',
+              lambda ctx, inputs: analyzer.summarize(
+                  ctx.full_text, doc=inputs['parse'], profile=ctx.profile
+              ),
+              ['parse'], ""),
+        stage('keywords', lambda ctx, inputs: extract_keywords(ctx.text, profile=ctx.profile),
+              default=[]),
+    ]
+    
+    if 'classification' in windowed:
+        stages.append(stage(
+            'category_scores',
+            lambda ctx, inputs: classify_text_windowed(ctx.full_text, label_set),
+            default={}
+        ))
+        stages.append(stage(
+            'categories',
+            lambda ctx, inputs: inputs['category_scores'].get('labels', []),
+            ['category_scores'], []
+        ))
+    else:
+        stages.append(stage(
+            'categories',
+            lambda ctx, inputs: classify_text(ctx.text, label_set=label_set, profile=ctx.profile),
+            default=[]
+        ))
+    
+    if 'sentiment' in windowed:
+        stages.append(stage(
+            'sentiment',
+            lambda ctx, inputs: analyze_sentiment_windowed(
+                ctx.full_text, ctx.language, ctx.profile
+            ),
+            default={}
+        ))
+    else:
+        stages.append(stage(
+            'sentiment',
+            lambda ctx, inputs: analyze_sentiment(ctx.text, ctx.language, ctx.profile),
+            default={}
+        ))
+    
+    return stages
+
+def analyze_context(context: AnalysisContext, label_set: LabelSet = None) -> Dict:
+    """Run every analysis stage for one parsed document.
+    
+    Independent stages run concurrently, so latency approaches the slowest
+    stage rather than the sum. Failed or timed-out stages fall back to
+    empty values and are listed under ``stage_errors``.
+    """
+    executor = StageExecutor(
+        build_analysis_stages(label_set, context.profile),
+        stage_pool,
+        default_timeout=settings.PIPELINE_STAGE_TIMEOUT_S
+    )
+    run = executor.run(context)
+    
+    result = {name: value for name, value in run['results'].items() if name != 'parse'}
+    result['profile'] = context.profile.name
+    if context.language is not None:
+        result['language'] = context.language
+    if context.skipped_stages:
+        result['skipped_stages'] = sorted(context.skipped_stages)
+    result['stage_timings'] = run['timings']
+    if run['errors']:
+        result['stage_errors'] = run['errors']
+    return result
+
+def analyze_documents_local(texts: List[str], full_texts: List[str] = None,
+                            label_set: LabelSet = None,
+                            profile: ProcessingProfile = None) -> List[Union[Dict, Exception]]:
+    """Parse a batch with one nlp.pipe pass and analyze documents concurrently.
+
+    Concurrent documents share micro-batches in the inference scheduler.
+    Failures are returned in place of the document's result.
+    """
+    if not texts:
+        return []
+    
+    contexts = create_contexts(texts, full_texts, needs_parse=_needs_parse, profile=profile)
+    max_workers = max(1, min(len(contexts), settings.BATCH_SIZE))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(analyze_context, context, label_set) for context in contexts]
+    
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.error(f"Document analysis failed: {e}")
+            results.append(e)
+    return results
+
+def analyze_documents(texts: List[str], full_texts: List[str] = None,
+                      label_set: LabelSet = None,
+                      profile: ProcessingProfile = None) -> List[Union[Dict, Exception]]:
+    """Analyze a batch in-process, or on the shared inference server if enabled."""
+    if settings.INFERENCE_SERVER_ENABLED:
+        from app.nlp.inference_server import get_client
+        try:
+            return get_client().analyze(texts, full_texts, label_set, profile)
+        except (ConnectionError, TimeoutError) as e:
+            if not settings.INFERENCE_SERVER_FALLBACK_LOCAL:
+                logger.error(f"Remote analysis failed: {e}")
+                return [e] * len(texts)
+            logger.warning(f"Inference server failed ({e}); analyzing in-process")
+    return analyze_documents_local(texts, full_texts, label_set, profile)
 
-def analyze_sentiment(text: str) -> Dict[str, float]:
-    return analyzer.analyze_sentiment(text)
+def runtime_stats() -> Dict:
+    """Model, memory, thread and cache state of this process's analyzer."""
+    from app.nlp.thread_budget import effective_settings
 
-def identify_key_sections(text: str) -> List[str]:
-    return analyzer.identify_key_sections(text)
+    return {
+        "models": model_registry.stats(),
+        "model_memory": {
+            "budget_bytes": model_registry.memory_budget_bytes or None,
+            "resident_bytes": model_registry.resident_bytes()
+        },
+        "threads": effective_settings(),
+        "stage_cache": stage_cache.stats() if stage_cache else None,
+        "phrase_embedding_cache": (
+            phrase_embedding_cache.stats() if phrase_embedding_cache else None
+        )
+    }
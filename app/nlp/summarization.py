@@ -0,0 +1,212 @@
+# app/nlp/summarization.py
+import logging
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, List
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+# Reduce rounds before giving up and joining the partial summaries
+MAX_REDUCE_ROUNDS = 3
+
+# Sentences shorter than this are ranked but never extracted
+MIN_EXTRACT_WORDS = 5
+
+
+def _regex_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+
+def split_sentences(text: str, doc=None) -> List[str]:
+    """Split text into sentences, reusing spaCy's segmentation where it covers the text.
+
+    A Doc parsed from a truncated copy covers a prefix of ``text``; the
+    rest is split by punctuation, starting at the Doc's last (possibly
+    cut) sentence.
+    """
+    if doc is None or not text.startswith(doc.text):
+        return _regex_sentences(text)
+
+    sentences = list(doc.sents)
+    if len(doc.text) == len(text):
+        return [sent.text.strip() for sent in sentences if sent.text.strip()]
+    if not sentences:
+        return _regex_sentences(text)
+    head = [sent.text.strip() for sent in sentences[:-1] if sent.text.strip()]
+    return head + _regex_sentences(text[sentences[-1].start_char:])
+
+
+def textrank_scores(sentences: List[str], damping: float = 0.85,
+                    iterations: int = 50, tolerance: float = 1e-6) -> np.ndarray:
+    """TextRank centrality of each sentence over TF-IDF cosine similarity."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    n = len(sentences)
+    if n < 3:
+        return np.ones(n, dtype=np.float32)
+    try:
+        tfidf = TfidfVectorizer(sublinear_tf=True).fit_transform(sentences)
+    except ValueError:
+        # No usable terms (numbers or punctuation only)
+        return np.ones(n, dtype=np.float32)
+
+    # Rows are L2-normalized, so the product is the cosine similarity
+    similarity = (tfidf @ tfidf.T).toarray().astype(np.float32)
+    np.fill_diagonal(similarity, 0.0)
+    row_sums = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no terms with any other link uniformly
+    transition = np.where(row_sums > 0, similarity / np.maximum(row_sums, 1e-12), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+
+def extractive_summary(sentences: List[str], max_sentences: int = 3,
+                       max_candidates: int = 1000) -> str:
+    """The ``max_sentences`` most central sentences, joined in document order.
+
+    Documents with more than ``max_candidates`` sentences are sampled
+    evenly, bounding the quadratic similarity matrix.
+    """
+    sentences = select_evenly(sentences, max_candidates)
+    if len(sentences) <= max_sentences:
+        return ' '.join(sentences)
+
+    scores = textrank_scores(sentences)
+    eligible = np.array([len(sentence.split()) >= MIN_EXTRACT_WORDS for sentence in sentences])
+    if eligible.sum() >= max_sentences:
+        scores = np.where(eligible, scores, -np.inf)
+    # Stable sort keeps the earlier sentence on ties
+    top = np.argsort(-scores, kind='stable')[:max_sentences]
+    return ' '.join(sentences[index] for index in sorted(top))
+
+
+def chunk_sentences(sentences: List[str], tokenizer, max_tokens: int) -> List[str]:
+    """Greedily pack whole sentences into chunks of at most ``max_tokens`` tokens."""
+    if not sentences:
+        return []
+
+    token_ids = tokenizer(sentences, add_special_tokens=False)['input_ids']
+    chunks = []
+    current, current_tokens = [], 0
+
+    for sentence, ids in zip(sentences, token_ids):
+        if len(ids) > max_tokens:
+            # A single oversized "sentence" (tables, lists) is cut by tokens
+            if current:
+                chunks.append(' '.join(current))
+                current, current_tokens = [], 0
+            for start in range(0, len(ids), max_tokens):
+                chunks.append(tokenizer.decode(ids[start:start + max_tokens]))
+            continue
+
+        if current and current_tokens + len(ids) > max_tokens:
+            chunks.append(' '.join(current))
+            current, current_tokens = [], 0
+
+        current.append(sentence)
+        current_tokens += len(ids)
+
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def select_evenly(chunks: List[str], max_chunks: int) -> List[str]:
+    """Keep at most ``max_chunks`` chunks spread evenly over the document."""
+    if len(chunks) <= max_chunks:
+        return chunks
+    step = (len(chunks) - 1) / (max_chunks - 1) if max_chunks > 1 else 0
+    return [chunks[round(i * step)] for i in range(max_chunks)]
+
+
+class MapReduceSummarizer:
+    """Summarize long documents chunk by chunk, then summarize the summaries.
+
+    ``submit_fn(chunk, max_length)`` must return a future resolving to the
+    summary text; chunk calls are kept ``concurrency`` deep so they are
+    batched by the inference scheduler. Work still pending when the time
+    budget runs out is dropped and the partial summaries are returned.
+    """
+
+    def __init__(self, submit_fn: Callable[[str, int], Future], tokenizer,
+                 chunk_tokens: int = 900, max_chunks: int = 16,
+                 concurrency: int = 4, time_budget_s: float = 60.0,
+                 chunk_summary_length: int = 120):
+        self.submit_fn = submit_fn
+        self.tokenizer = tokenizer
+        self.chunk_tokens = chunk_tokens
+        self.max_chunks = max(1, max_chunks)
+        self.concurrency = max(1, concurrency)
+        self.time_budget_s = time_budget_s
+        self.chunk_summary_length = chunk_summary_length
+
+    def summarize(self, text: str, max_length: int = 150, doc=None) -> str:
+        deadline = time.monotonic() + self.time_budget_s
+
+        chunks = chunk_sentences(split_sentences(text, doc), self.tokenizer, self.chunk_tokens)
+        if not chunks:
+            return ""
+        chunks = select_evenly(chunks, self.max_chunks)
+        logger.info(f"Summarizing {len(chunks)} chunks")
+
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if len(chunks) == 1:
+                final = self._map(chunks, max_length, deadline)
+                return final[0] if final else chunks[0]
+
+            partials = self._map(chunks, self.chunk_summary_length, deadline)
+            if not partials:
+                return ""
+            if time.monotonic() >= deadline:
+                logger.warning("Summary time budget exhausted, returning partial summaries")
+                return ' '.join(partials)
+
+            # Reduce: pack the partial summaries into new chunks
+            chunks = chunk_sentences(partials, self.tokenizer, self.chunk_tokens)
+
+        return ' '.join(chunks)
+
+    def _map(self, chunks: List[str], max_length: int, deadline: float) -> List[str]:
+        """Summarize chunks with bounded concurrency, in document order."""
+        summaries = [None] * len(chunks)
+        queue = list(enumerate(chunks))
+        in_flight = {}
+
+        while queue or in_flight:
+            while queue and len(in_flight) < self.concurrency:
+                index, chunk = queue.pop(0)
+                in_flight[self.submit_fn(chunk, max_length)] = index
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                try:
+                    summaries[index] = future.result()
+                except Exception as e:
+                    logger.error(f"Chunk summarization failed: {e}")
+
+        # Free the inference slots of calls nobody will wait for
+        for future in in_flight:
+            future.cancel()
+        if queue or in_flight:
+            logger.warning(
+                f"Dropped {len(queue) + len(in_flight)} of {len(chunks)} chunks "
+                f"after exceeding the time budget"
+            )
+        return [summary for summary in summaries if summary]
@@ -0,0 +1,217 @@
+# app/nlp/thread_budget.py
+import importlib.util
+import logging
+import math
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.config.settings import get_settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Environment read by OpenMP, BLAS and numexpr when they initialize,
+# mapped to the budget field that sets it
+_THREAD_ENV_VARS = {
+    'OMP_NUM_THREADS': 'intra_op',
+    'MKL_NUM_THREADS': 'blas',
+    'OPENBLAS_NUM_THREADS': 'blas',
+    'VECLIB_MAXIMUM_THREADS': 'blas',
+    'NUMEXPR_NUM_THREADS': 'blas',
+}
+
+# Budget applied to this process, reported by effective_settings()
+_applied: Optional['ThreadBudget'] = None
+
+
+def available_cores() -> int:
+    """Cores this process may use: CPU affinity, capped by a cgroup CPU quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cores = os.cpu_count() or 1
+
+    # cgroup v2 ("max 100000" when unlimited), then v1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            cores = min(cores, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                quota = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if quota > 0:
+                cores = min(cores, math.ceil(quota / period))
+        except (OSError, ValueError):
+            pass
+    return max(1, cores)
+
+
+class ThreadBudget:
+    """Thread counts for one of ``workers`` processes sharing ``cores``.
+
+    ``intra_op`` bounds torch (and onnxruntime/OpenMP) kernels, ``blas``
+    bounds NumPy/spaCy linear algebra, ``inter_op`` bounds torch's pool
+    for running independent operators in parallel.
+    """
+
+    def __init__(self, cores: int, workers: int, intra_op: int, inter_op: int,
+                 blas: int, tokenizers_parallelism: bool):
+        self.cores = cores
+        self.workers = workers
+        self.intra_op = intra_op
+        self.inter_op = inter_op
+        self.blas = blas
+        self.tokenizers_parallelism = tokenizers_parallelism
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+def plan_budget(workers: Optional[int] = None, cores: Optional[int] = None) -> ThreadBudget:
+    """Split the node's cores evenly across inference worker processes.
+
+    Explicit settings win over the computed split. Tokenizer parallelism
+    stays off by default: batches are already parallel across workers and
+    the Rust pool would oversubscribe the same cores.
+    """
+    cores = cores or settings.THREAD_BUDGET_CORES or available_cores()
+    workers = max(1, workers or settings.THREAD_BUDGET_WORKERS)
+    per_worker = max(1, cores // workers)
+    return ThreadBudget(
+        cores=cores,
+        workers=workers,
+        intra_op=settings.TORCH_INTRA_OP_THREADS or per_worker,
+        inter_op=settings.TORCH_INTER_OP_THREADS or 1,
+        blas=settings.BLAS_THREADS or per_worker,
+        tokenizers_parallelism=settings.TOKENIZERS_PARALLELISM
+    )
+
+
+def apply_thread_budget(budget: Optional[ThreadBudget] = None,
+                        workers: Optional[int] = None) -> ThreadBudget:
+    """Apply a budget to this process; call at startup, before models load.
+
+    Environment variables cover libraries not yet initialized; torch and
+    already-loaded BLAS/OpenMP pools are resized in place.
+    """
+    global _applied
+    budget = budget or plan_budget(workers)
+
+    for name, field in _THREAD_ENV_VARS.items():
+        os.environ[name] = str(getattr(budget, field))
+    os.environ['TOKENIZERS_PARALLELISM'] = 'true' if budget.tokenizers_parallelism else 'false'
+
+    if importlib.util.find_spec('threadpoolctl'):
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=budget.blas, user_api='blas')
+        threadpool_limits(limits=budget.intra_op, user_api='openmp')
+
+    if importlib.util.find_spec('torch'):
+        import torch
+        torch.set_num_threads(budget.intra_op)
+        try:
+            torch.set_num_interop_threads(budget.inter_op)
+        except RuntimeError:
+            # Only allowed before the first inter-op parallel work
+            logger.warning("torch inter-op threads already initialized; keeping them")
+
+    _applied = budget
+    logger.info(
+        f"Thread budget: {budget.workers} worker(s) on {budget.cores} cores, "
+        f"{budget.intra_op} intra-op / {budget.inter_op} inter-op / {budget.blas} BLAS threads"
+    )
+    return budget
+
+
+def effective_settings() -> Dict:
+    """The applied budget and the thread counts libraries actually report."""
+    effective = {
+        'budget': _applied.to_dict() if _applied else None,
+        'available_cores': available_cores(),
+        'environment': {
+            name: os.environ.get(name)
+            for name in list(_THREAD_ENV_VARS) + ['TOKENIZERS_PARALLELISM']
+        }
+    }
+    if 'torch' in sys.modules:
+        torch = sys.modules['torch']
+        effective['torch'] = {
+            'intra_op': torch.get_num_threads(),
+            'inter_op': torch.get_num_interop_threads()
+        }
+    if importlib.util.find_spec('threadpoolctl'):
+        from threadpoolctl import threadpool_info
+        effective['threadpools'] = [
+            {key: pool.get(key) for key in ('user_api', 'internal_api', 'num_threads')}
+            for pool in threadpool_info()
+        ]
+    return effective
+
+
+def candidate_splits(cores: int) -> List[int]:
+    """Worker counts that divide the cores evenly (1 .. cores)."""
+    return [workers for workers in range(1, cores + 1) if cores % workers == 0]
+
+
+def _benchmark_worker(workers: int, cores: int, workload: Callable[[], object],
+                      duration_s: float, start, results):
+    budget = ThreadBudget(
+        cores=cores, workers=workers, intra_op=max(1, cores // workers), inter_op=1,
+        blas=max(1, cores // workers), tokenizers_parallelism=False
+    )
+    apply_thread_budget(budget)
+    workload()  # Warm-up (model load, allocator) is not timed
+    start.wait()  # All workers measure the same window
+    count = 0
+    deadline = time.monotonic() + duration_s
+    while time.monotonic() < deadline:
+        workload()
+        count += 1
+    results.put(count)
+
+
+def benchmark(workload: Callable[[], object], cores: Optional[int] = None,
+              splits: Optional[List[int]] = None, duration_s: float = 20.0) -> List[Dict]:
+    """Measure throughput of ``workload`` for each worker/thread split.
+
+    Each split runs ``workers`` spawned processes with ``cores // workers``
+    threads for ``duration_s``; results are sorted best first. The
+    workload must be a picklable module-level function.
+    """
+    import multiprocessing
+
+    cores = cores or available_cores()
+    context = multiprocessing.get_context('spawn')
+    report = []
+    for workers in splits or candidate_splits(cores):
+        results = context.Queue()
+        start = context.Barrier(workers)
+        processes = [
+            context.Process(
+                target=_benchmark_worker,
+                args=(workers, cores, workload, duration_s, start, results)
+            )
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        completed = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+
+        report.append({
+            'workers': workers,
+            'threads_per_worker': max(1, cores // workers),
+            'calls_per_second': round(completed / duration_s, 2)
+        })
+        logger.info(f"Split {report[-1]}")
+
+    return sorted(report, key=lambda entry: entry['calls_per_second'], reverse=True)
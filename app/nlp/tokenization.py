@@ -0,0 +1,102 @@
+# app/nlp/tokenization.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tokenizers that encode this identically share cached token ids
+_FAMILY_PROBE = "Tokenizer family probe: naïve café, 1,234.5 — résumé!"
+
+
+def tokenizer_key(tokenizer) -> Tuple:
+    """Identity of a tokenizer that survives reloads, unlike ``id()``.
+
+    An evicted and reloaded model gets a new tokenizer object, and a freed
+    object's id can be reused by a different tokenizer.
+    """
+    return (type(tokenizer).__name__, getattr(tokenizer, 'name_or_path', None), len(tokenizer))
+
+
+def pad_batch(sequences: List[List[int]], pad_id: int):
+    """Right-pad token id lists into ``(input_ids, attention_mask)`` tensors."""
+    import torch
+
+    width = max(len(ids) for ids in sequences)
+    input_ids = torch.full((len(sequences), width), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+    for row, ids in enumerate(sequences):
+        input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[row, :len(ids)] = 1
+    return input_ids, attention_mask
+
+
+class TokenCache:
+    """Token ids of recent documents, computed once per tokenizer family.
+
+    Only a fixed-size character prefix is tokenized and cached, so a
+    document and its truncated copy share one entry. Concurrent requests
+    for the same entry wait for a single tokenization.
+    """
+
+    def __init__(self, max_entries: int = 256, prefix_chars: int = 8192):
+        self.max_entries = max_entries
+        self.prefix_chars = prefix_chars
+        self._entries: 'OrderedDict[Tuple, Future]' = OrderedDict()
+        self._families: Dict[Tuple, Tuple] = {}
+        self._lock = threading.Lock()
+
+    def family(self, tokenizer) -> Tuple:
+        key = tokenizer_key(tokenizer)
+        family = self._families.get(key)
+        if family is None:
+            probe = tokenizer(_FAMILY_PROBE, add_special_tokens=False)['input_ids']
+            family = (type(tokenizer).__name__, len(tokenizer), tuple(probe))
+            self._families[key] = family
+        return family
+
+    def _prefix_ids(self, tokenizer, prefix: str) -> List[int]:
+        key = (self.family(tokenizer), hashlib.sha1(prefix.encode('utf-8')).hexdigest())
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = Future()
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+
+        if owner:
+            try:
+                entry.set_result(tokenizer(prefix, add_special_tokens=False)['input_ids'])
+            except Exception as e:
+                with self._lock:
+                    self._entries.pop(key, None)
+                entry.set_exception(e)
+        return entry.result()
+
+    def encode(self, tokenizer, text: str, max_tokens: int, cache: bool = True) -> List[int]:
+        """The first ``max_tokens`` token ids of ``text``, without special tokens."""
+        if not cache:
+            return tokenizer(
+                text, add_special_tokens=False, truncation=True, max_length=max_tokens
+            )['input_ids']
+        
+        if len(text) <= self.prefix_chars:
+            return self._prefix_ids(tokenizer, text)[:max_tokens]
+
+        ids = self._prefix_ids(tokenizer, text[:self.prefix_chars])
+        # The cut may split the last word, so its final token is unreliable
+        if len(ids) > max_tokens:
+            return ids[:max_tokens]
+
+        # Unusually dense text: the cached prefix does not fill the budget
+        return tokenizer(
+            text, add_special_tokens=False, truncation=True, max_length=max_tokens
+        )['input_ids']
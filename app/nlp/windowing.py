@@ -0,0 +1,62 @@
+# app/nlp/windowing.py
+import re
+from typing import Dict, List, Tuple
+
+_WORD = re.compile(r'[A-Za-z]{4,}')
+
+
+def make_windows(text: str, tokenizer, window_tokens: int = 256,
+                 stride_tokens: int = 224) -> List[Tuple[str, int]]:
+    """Split text into overlapping token windows.
+
+    Returns ``(window_text, token_count)`` pairs; window text is sliced from
+    the original string via the tokenizer's offset mapping.
+    """
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = encoding['offset_mapping']
+    if not offsets:
+        return []
+
+    stride_tokens = max(1, min(stride_tokens, window_tokens))
+    windows = []
+    for start in range(0, len(offsets), stride_tokens):
+        end = min(start + window_tokens, len(offsets))
+        windows.append((text[offsets[start][0]:offsets[end - 1][1]], end - start))
+        if end == len(offsets):
+            break
+    return windows
+
+
+def salience(window_text: str) -> float:
+    """Cheap content score: share of distinct content words in the window."""
+    words = _WORD.findall(window_text.lower())
+    if not words:
+        return 0.0
+    return len(set(words)) / len(words) * min(1.0, len(words) / 50)
+
+
+def sample_windows(windows: List[Tuple[str, int]], max_windows: int) -> List[Tuple[str, int]]:
+    """Keep the first window plus the most salient others, in document order."""
+    if max_windows <= 0 or len(windows) <= max_windows:
+        return windows
+
+    ranked = sorted(range(1, len(windows)), key=lambda i: salience(windows[i][0]), reverse=True)
+    keep = sorted([0] + ranked[:max_windows - 1])
+    return [windows[i] for i in keep]
+
+
+def aggregate_scores(window_scores: List[Dict[str, float]],
+                     weights: List[float]) -> Dict[str, Dict[str, float]]:
+    """Weighted mean and variance of each label's score across windows."""
+    total_weight = float(sum(weights)) or 1.0
+    labels = {label for scores in window_scores for label in scores}
+
+    mean = {}
+    variance = {}
+    for label in labels:
+        values = [scores.get(label, 0.0) for scores in window_scores]
+        mu = sum(w * v for w, v in zip(weights, values)) / total_weight
+        mean[label] = mu
+        variance[label] = sum(w * (v - mu) ** 2 for w, v in zip(weights, values)) / total_weight
+
+    return {'mean': mean, 'variance': variance}
@@ -1,5 +1,7 @@
 # app/tasks/celery_app.py
+import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from app.config.settings import get_settings
 
 settings = get_settings()
@@ -22,3 +24,50 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
 )
 
+
+# Pool size of this worker, recorded before the prefork children start
+_worker_pool_size = None
+
+
+@worker_init.connect
+def record_worker_pool_size(sender=None, **kwargs):
+    """Remember the resolved concurrency; ``-c N`` is not written back to the config."""
+    global _worker_pool_size
+    _worker_pool_size = getattr(sender, 'concurrency', None)
+
+
+def worker_pool_size() -> int:
+    """Prefork children of this worker, resolved as Celery does: -c, config, CPU count."""
+    return _worker_pool_size or celery_app.conf.worker_concurrency or os.cpu_count() or 1
+
+
+@worker_process_init.connect
+def apply_worker_thread_budget(**kwargs):
+    """Give each prefork child its share of the cores before it loads models."""
+    if not settings.THREAD_BUDGET_ENABLED:
+        return
+    from app.nlp.thread_budget import apply_thread_budget
+    
+    workers = None
+    if settings.THREAD_BUDGET_WORKERS <= 1:
+        workers = worker_pool_size()
+    apply_thread_budget(workers=workers)
+
+
+@celery_app.task(name='metadata.analyze_texts')
+def analyze_texts(texts, labels=None, profile=None):
+    """Run semantic analysis on extracted texts.
+    
+    With INFERENCE_SERVER_ENABLED the work is sent to the shared inference
+    server, so Celery workers do not load their own copy of the models.
+    ``profile`` names a processing profile; the default profile if omitted.
+    """
+    from app.nlp.profiles import get_profile
+    from app.nlp.semantic_analysis import analyze_documents, label_set_registry
+    
+    label_set = label_set_registry.register(labels) if labels else None
+    results = analyze_documents(texts, label_set=label_set, profile=get_profile(profile))
+    return [
+        {'error': str(result)} if isinstance(result, Exception) else result
+        for result in results
+    ]
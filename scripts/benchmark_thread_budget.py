@@ -0,0 +1,69 @@
+# scripts/benchmark_thread_budget.py
+"""Find the worker/thread split with the best throughput on this node.
+
+Usage: python scripts/benchmark_thread_budget.py [encoder|sentiment|spacy] [seconds]
+
+"encoder" times a synthetic BART-sized encoder layer and needs no model
+download; the others time the real models. Set THREAD_BUDGET_WORKERS to
+the winning worker count (uvicorn/Celery processes per node).
+"""
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.nlp.thread_budget import available_cores, benchmark
+
+SAMPLE_TEXT = (
+    "The quarterly report shows revenue growth of 12 percent, driven by strong "
+    "demand in the European market and lower operating costs. "
+) * 8
+
+_state = {}
+
+
+def encoder_workload():
+    """One batch of 8 x 256 tokens through a 1024-wide transformer layer."""
+    import torch
+    if 'layer' not in _state:
+        _state['layer'] = torch.nn.TransformerEncoderLayer(
+            d_model=1024, nhead=16, dim_feedforward=4096, batch_first=True
+        ).eval()
+        _state['input'] = torch.randn(8, 256, 1024)
+    with torch.inference_mode():
+        _state['layer'](_state['input'])
+
+
+def sentiment_workload():
+    from app.nlp.semantic_analysis import analyzer
+    analyzer.sentiment_analyzer([SAMPLE_TEXT] * 8, truncation=True)
+
+
+def spacy_workload():
+    from app.nlp.semantic_analysis import analyzer
+    list(analyzer.nlp.pipe([SAMPLE_TEXT] * 8))
+
+
+WORKLOADS = {
+    'encoder': encoder_workload,
+    'sentiment': sentiment_workload,
+    'spacy': spacy_workload,
+}
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else "encoder"
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 20.0
+    if name not in WORKLOADS:
+        print(f"Unknown workload '{name}'; choose from {sorted(WORKLOADS)}")
+        sys.exit(1)
+    
+    print(f"Benchmarking '{name}' on {available_cores()} cores...")
+    report = benchmark(WORKLOADS[name], duration_s=duration)
+    print(json.dumps(report, indent=2))
+    best = report[0]
+    print(
+        f"Best split: THREAD_BUDGET_WORKERS={best['workers']} "
+        f"({best['threads_per_worker']} threads per worker)"
+    )
@@ -0,0 +1,34 @@
+# scripts/check_backend_parity.py
+"""Compare quantized/ONNX pipeline outputs against fp32 PyTorch."""
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.nlp.backends import check_parity
+from app.nlp.semantic_analysis import (
+    SUMMARIZER_MODEL, CLASSIFIER_MODEL, SENTIMENT_MODEL
+)
+
+PIPELINES = [
+    ('summarization', SUMMARIZER_MODEL),
+    ('zero-shot-classification', CLASSIFIER_MODEL),
+    ('sentiment-analysis', SENTIMENT_MODEL),
+]
+
+if __name__ == "__main__":
+    backend = sys.argv[1] if len(sys.argv) > 1 else "int8"
+    print(f"Checking {backend} backend against fp32...")
+    
+    failed = False
+    for task, model_name in PIPELINES:
+        report = check_parity(task, model_name, backend)
+        print(json.dumps(report, indent=2))
+        failed = failed or not report['passed']
+    
+    if failed:
+        print("Parity check failed!")
+        sys.exit(1)
+    print("Parity check passed!")
@@ -39,3 +39,130 @@ def test_home_page():
     response = client.get("/")
     assert response.status_code == 200
 
+
+
+def test_register_label_set():
+    """Test custom label sets are registered by content hash."""
+    labels = ["Contract", "Invoice", "Policy"]
+    response = client.post("/api/v1/documents/label-sets", json={"labels": labels})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["labels"] == labels
+
+    # Registering the same set again returns the same id
+    again = client.post("/api/v1/documents/label-sets", json={"labels": labels})
+    assert again.json()["label_set_id"] == data["label_set_id"]
+
+    response = client.get(f"/api/v1/documents/label-sets/{data['label_set_id']}")
+    assert response.status_code == 200
+    assert response.json()["labels"] == labels
+
+
+def test_model_status_reports_local_process(monkeypatch):
+    """Test model and cache stats come from this process when inference is local."""
+    from app.api.v1 import health
+    monkeypatch.setattr(health.settings, 'INFERENCE_SERVER_ENABLED', False)
+
+    data = client.get("/api/v1/models").json()
+    assert data["source"] == "local"
+    assert "models" in data and "stage_cache" in data and "threads" in data
+
+
+def test_model_status_reports_inference_server(monkeypatch):
+    """Test model and cache stats are fetched from the inference server when enabled."""
+    import types
+    from app.api.v1 import health
+    from app.nlp import inference_server
+    server_stats = {"models": {"summarizer": {"loaded": True}}, "stage_cache": {"entries": 3}}
+    monkeypatch.setattr(health.settings, 'INFERENCE_SERVER_ENABLED', True)
+    monkeypatch.setattr(inference_server, 'get_client',
+                        lambda: types.SimpleNamespace(stats=lambda: server_stats))
+
+    data = client.get("/api/v1/models").json()
+    assert data["source"] == "inference_server"
+    assert data["stage_cache"] == {"entries": 3}
+    assert data["models"] == server_stats["models"]
+
+
+REPORT = " ".join(
+    f"Section {i} of the supply agreement sets delivery terms, payment schedules "
+    f"and warranty obligations for shipment batch {i}."
+    for i in range(40)
+)
+
+
+@pytest.fixture
+def upload_db(monkeypatch):
+    """Fresh in-memory document tables and a recording stand-in for analysis."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from app.api.v1 import documents
+    from app.database.database import get_db
+    from app.database.models import DocumentFingerprint, DocumentLSHBand, DocumentMetadata
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False},
+                           poolclass=StaticPool)
+    tables = [model.__table__ for model in (DocumentMetadata, DocumentFingerprint, DocumentLSHBand)]
+    DocumentMetadata.metadata.create_all(bind=engine, tables=tables)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def session():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    analyzed = []
+
+    def fake_analyze(texts, full_texts, label_set, profile):
+        analyzed.append(list(full_texts))
+        return [{'summary': f"analysis {len(analyzed)}", 'profile': profile.name} for _ in texts]
+
+    monkeypatch.setattr(documents, 'analyze_documents', fake_analyze)
+    app.dependency_overrides[get_db] = session
+    yield analyzed
+    app.dependency_overrides.pop(get_db, None)
+
+
+def _upload(files, **form):
+    return client.post(
+        "/api/v1/documents/upload",
+        files=[("files", (name, text.encode(), "text/plain")) for name, text in files],
+        data=form
+    ).json()["results"]
+
+
+def test_near_duplicate_reuses_analysis(upload_db):
+    """Test a re-saved document with a new footer reuses the stored analysis."""
+    first = _upload([("report.txt", REPORT)], profile="fast")[0]
+    second = _upload([("report-v2.txt", REPORT + " Printed 2024-05-01.")], profile="fast")[0]
+
+    assert len(upload_db) == 1
+    assert second["status"] == "success"
+    assert second["document_id"] != first["document_id"]
+    assert second["extracted_metadata"]["summary"] == "analysis 1"
+    assert second["extracted_metadata"]["near_duplicate_of"]["document_id"] == first["document_id"]
+
+
+def test_near_duplicate_with_other_profile_or_labels_is_analyzed(upload_db):
+    """Test reuse requires the same processing profile and label set."""
+    _upload([("report.txt", REPORT)], profile="fast")
+    other_profile = _upload([("report-v2.txt", REPORT + " Draft.")], profile="balanced")[0]
+    other_labels = _upload([("report-v3.txt", REPORT + " Final.")], profile="fast",
+                           labels="Contract,Invoice")[0]
+
+    assert len(upload_db) == 3
+    assert "near_duplicate_of" not in other_profile["extracted_metadata"]
+    assert "near_duplicate_of" not in other_labels["extracted_metadata"]
+
+
+def test_same_request_duplicates_are_analyzed_once(upload_db):
+    """Test identical files in one upload share one analysis and one stored document."""
+    results = _upload([("a.txt", REPORT), ("b.txt", REPORT)], profile="fast")
+
+    assert upload_db == [[REPORT]]
+    assert [r["filename"] for r in results] == ["a.txt", "b.txt"]
+    assert results[0]["document_id"] == results[1]["document_id"]
+    assert results[1]["message"] == "Document already processed"
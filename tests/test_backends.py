@@ -0,0 +1,127 @@
+import sys
+import types
+
+from app.nlp import backends
+
+
+class FakeModel:
+    def __init__(self, source):
+        self.source = source
+        self.loaded = None
+
+    def load_state_dict(self, state):
+        self.loaded = state
+
+    def state_dict(self):
+        return {'weights': self.source}
+
+    def eval(self):
+        return self
+
+
+def install_fakes(monkeypatch, tmp_path):
+    """Replace torch and transformers with recording stand-ins."""
+    calls = []
+    saved = {}
+
+    class AutoModelForSequenceClassification:
+        @staticmethod
+        def from_pretrained(name):
+            calls.append(('from_pretrained', name))
+            return FakeModel('hub')
+
+        @staticmethod
+        def from_config(config):
+            calls.append(('from_config', config))
+            return FakeModel('config')
+
+    def quantize_dynamic(model, layers, dtype):
+        calls.append(('quantize', dtype))
+        return model
+
+    def save(state, path):
+        saved[path] = state
+        open(path, 'w').close()
+
+    torch = types.SimpleNamespace(
+        nn=types.SimpleNamespace(Linear=object), qint8='qint8',
+        quantization=types.SimpleNamespace(quantize_dynamic=quantize_dynamic),
+        save=save, load=lambda path: saved[path],
+    )
+    transformers = types.SimpleNamespace(
+        AutoModelForSequenceClassification=AutoModelForSequenceClassification,
+        AutoConfig=types.SimpleNamespace(from_pretrained=lambda name: f"config:{name}"),
+        AutoTokenizer=types.SimpleNamespace(from_pretrained=lambda name: f"tokenizer:{name}"),
+        pipeline=lambda task, model, device, tokenizer=None: {'task': task, 'model': model, 'tokenizer': tokenizer},
+    )
+    monkeypatch.setitem(sys.modules, 'torch', torch)
+    monkeypatch.setitem(sys.modules, 'transformers', transformers)
+    monkeypatch.setitem(sys.modules, 'optimum', None)
+    monkeypatch.setitem(sys.modules, 'optimum.onnxruntime', None)
+    monkeypatch.setattr(backends.settings, 'MODEL_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(backends.settings, 'MODEL_SNAPSHOTS_ENABLED', False)
+    return calls
+
+
+def test_int8_pipeline_reloads_cached_quantized_weights(monkeypatch, tmp_path):
+    """Test the first int8 build quantizes hub weights and later builds reuse them."""
+    calls = install_fakes(monkeypatch, tmp_path)
+
+    first = backends.build_pipeline('sentiment-analysis', 'org/model', backend='int8')
+    assert first['model'].source == 'hub'
+    assert first['tokenizer'] == 'tokenizer:org/model'
+
+    calls.clear()
+    second = backends.build_pipeline('sentiment-analysis', 'org/model', backend='int8')
+    assert second['model'].source == 'config'
+    assert second['model'].loaded == {'weights': 'hub'}
+    assert ('from_pretrained', 'org/model') not in calls
+    assert ('quantize', 'qint8') in calls
+
+
+def test_missing_onnx_runtime_falls_back_to_torch(monkeypatch, tmp_path, caplog):
+    """Test an unavailable ONNX backend serves the fp32 model and says why."""
+    install_fakes(monkeypatch, tmp_path)
+
+    pipe = backends.build_pipeline('sentiment-analysis', 'org/model', backend='onnx')
+
+    assert pipe['model'] == 'org/model'
+    assert 'optimum[onnxruntime]' in caplog.text
+
+
+def test_check_parity_reports_drift_against_thresholds(monkeypatch):
+    """Test classifier parity passes within the score threshold and fails beyond it."""
+    def fake_pipeline(positive):
+        def run(samples, top_k=None):
+            return [[{'label': 'POSITIVE', 'score': positive},
+                     {'label': 'NEGATIVE', 'score': 1 - positive}] for _ in samples]
+        return run
+
+    drift = {'torch': 0.9, 'int8': 0.85}
+    monkeypatch.setattr(backends, 'build_pipeline',
+                        lambda task, model, backend: fake_pipeline(drift[backend]))
+    monkeypatch.setattr(backends.settings, 'INFERENCE_PARITY_MAX_SCORE_DIFF', 0.1)
+
+    report = backends.check_parity('sentiment-analysis', 'org/model', 'int8', samples=['a', 'b'])
+    assert report['samples'] == 2
+    assert report['top_label_agreement'] == 1.0
+    assert report['max_score_diff'] == 0.05
+    assert report['passed']
+
+    drift['int8'] = 0.4
+    report = backends.check_parity('sentiment-analysis', 'org/model', 'int8', samples=['a'])
+    assert report['top_label_agreement'] == 0.0
+    assert not report['passed']
+
+
+def test_check_parity_scores_summaries_by_token_overlap(monkeypatch):
+    """Test summarization parity compares outputs by token-overlap F1."""
+    outputs = {'torch': "revenue grew in europe", 'onnx': "revenue grew strongly in europe"}
+    monkeypatch.setattr(backends, 'build_pipeline', lambda task, model, backend: (
+        lambda samples, **kwargs: [{'summary_text': outputs[backend]} for _ in samples]
+    ))
+    monkeypatch.setattr(backends.settings, 'INFERENCE_PARITY_MIN_F1', 0.6)
+
+    report = backends.check_parity('summarization', 'org/model', 'onnx', samples=['text'])
+    assert report['mean_token_f1'] == round(2 * 1.0 * 0.8 / 1.8, 4)
+    assert report['passed']
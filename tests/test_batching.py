@@ -0,0 +1,174 @@
+import threading
+import types
+import pytest
+from app.nlp.batching import InferenceScheduler
+
+
+def test_concurrent_calls_share_a_batch():
+    """Test concurrent submissions are collected into one batch."""
+    batch_sizes = []
+
+    def batch_fn(items):
+        batch_sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=200)
+    futures = [scheduler.submit('double', batch_fn, i, length=i) for i in range(4)]
+
+    assert [f.result(timeout=5) for f in futures] == [0, 2, 4, 6]
+    assert batch_sizes == [4]
+
+
+def test_batches_are_bounded_and_length_sorted():
+    """Test batches respect max size and are ordered by input length."""
+    batches = []
+    lock = threading.Lock()
+
+    def batch_fn(items):
+        with lock:
+            batches.append(list(items))
+        return items
+
+    scheduler = InferenceScheduler(max_batch_size=2, max_wait_ms=50)
+    futures = [scheduler.submit('echo', batch_fn, n, length=n) for n in [30, 10, 20, 40, 5]]
+
+    assert [f.result(timeout=5) for f in futures] == [30, 10, 20, 40, 5]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert all(batch == sorted(batch) for batch in batches)
+
+
+def test_batch_errors_propagate_to_callers():
+    """Test a failing batch function fails every waiting call."""
+    def batch_fn(items):
+        raise ValueError("model failure")
+
+    scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        scheduler.run('broken', batch_fn, "text")
+
+
+def test_disabled_scheduler_runs_inline():
+    """Test a disabled scheduler calls the batch function directly."""
+    scheduler = InferenceScheduler(enabled=False)
+    assert scheduler.run('echo', lambda items: items, "text") == "text"
+
+
+def test_cancelled_calls_are_skipped():
+    """Test a call cancelled while queued never reaches the batch function."""
+    batches = []
+
+    def batch_fn(items):
+        batches.append(list(items))
+        return items
+
+    scheduler = InferenceScheduler(max_batch_size=4, max_wait_ms=200)
+    cancelled = scheduler.submit('echo', batch_fn, 'dropped')
+    kept = scheduler.submit('echo', batch_fn, 'kept')
+    assert cancelled.cancel()
+
+    assert kept.result(timeout=5) == 'kept'
+    assert batches == [['kept']]
+
+
+def test_label_sets_share_one_classifier_queue(monkeypatch):
+    """Test distinct label sets reuse one batcher thread and are scored per set."""
+    from concurrent.futures import ThreadPoolExecutor
+    from app.nlp import semantic_analysis
+    from app.nlp.label_sets import LabelSetRegistry
+    from app.nlp.profiles import ProcessingProfile
+
+    scored = []
+
+    def fake_score_premises(model, tokenizer, premises, label_set, max_pairs_per_forward):
+        scored.append(label_set.id)
+        return [{'labels': list(label_set.labels), 'scores': [1.0]} for _ in premises]
+
+    classifier = types.SimpleNamespace(model=None, tokenizer=None)
+    tokens = types.SimpleNamespace(encode=lambda tokenizer, text, budget: [1, 2, 3])
+    monkeypatch.setattr(semantic_analysis, 'score_premises', fake_score_premises)
+    monkeypatch.setattr(semantic_analysis, 'premise_budget', lambda tokenizer, label_set: 16)
+    scheduler = InferenceScheduler(max_batch_size=8, max_wait_ms=50)
+    registry = semantic_analysis.ModelRegistry()
+    analyzer = semantic_analysis.SemanticAnalyzer(registry=registry, scheduler=scheduler, tokens=tokens)
+    registry.register('classifier', lambda: classifier)
+    profile = ProcessingProfile('zero_shot')
+    registry = LabelSetRegistry()
+    label_sets = [registry.register([f"topic {i}"]) for i in range(20)]
+
+    threads_before = threading.active_count()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(
+            lambda label_set: analyzer.classify_document("text", label_set=label_set, profile=profile),
+            label_sets
+        ))
+    threads_after = threading.active_count()
+
+    assert results == [[f"topic {i}"] for i in range(20)]
+    assert list(scheduler._queues) == [('classifier', ())]
+    assert threads_after <= threads_before + 1
+    assert sorted(scored) == sorted(label_set.id for label_set in label_sets)
+
+
+class FakeNlp:
+    """Records nlp.pipe batches; parses a text into its upper-cased copy."""
+
+    def __init__(self, fail_pipe=False):
+        self.batches = []
+        self.fail_pipe = fail_pipe
+
+    def __call__(self, text):
+        return text.upper()
+
+    def pipe(self, texts, batch_size, n_process):
+        if self.fail_pipe:
+            raise RuntimeError("pipe failed")
+        self.batches.append(list(texts))
+        return (text.upper() for text in texts)
+
+
+def test_parse_batch_uses_one_pipe_pass(monkeypatch):
+    """Test texts are parsed together and per-text parsing is the fallback."""
+    from app.nlp import semantic_analysis
+
+    nlp = FakeNlp()
+    monkeypatch.setattr(semantic_analysis.SemanticAnalyzer, 'nlp', property(lambda self: nlp))
+    analyzer = semantic_analysis.SemanticAnalyzer()
+
+    assert analyzer.parse_batch(["one", "two"]) == ["ONE", "TWO"]
+    assert nlp.batches == [["one", "two"]]
+    assert analyzer.parse_batch([]) == []
+
+    nlp.fail_pipe = True
+    assert analyzer.parse_batch(["three"]) == ["THREE"]
+
+
+def test_create_contexts_parses_only_requested_documents(monkeypatch):
+    """Test contexts carry language and profile, and needs_parse limits the batch."""
+    from app.nlp import semantic_analysis
+    from app.nlp.profiles import ProcessingProfile
+
+    nlp = FakeNlp()
+    monkeypatch.setattr(semantic_analysis.SemanticAnalyzer, 'nlp', property(lambda self: nlp))
+    analyzer = semantic_analysis.SemanticAnalyzer()
+    monkeypatch.setattr(analyzer, 'detect_language', lambda text: 'en')
+    profile = ProcessingProfile('default')
+
+    contexts = analyzer.create_contexts(
+        ["keep", "skip"], full_texts=["keep full", "skip full"],
+        needs_parse=lambda context: context.text != "skip", profile=profile
+    )
+
+    assert nlp.batches == [["keep"]]
+    assert [c.doc for c in contexts] == ["KEEP", None]
+    assert [c.full_text for c in contexts] == ["keep full", "skip full"]
+    assert all(c.language == 'en' and c.profile is profile for c in contexts)
+
+
+def test_summary_needs_the_doc_only_in_sentence_modes():
+    """Test the truncate summary mode does not force a spaCy parse."""
+    from app.nlp import semantic_analysis
+    from app.nlp.profiles import ProcessingProfile
+
+    assert 'summary' not in semantic_analysis.doc_stages(ProcessingProfile('a', summary_mode='truncate'))
+    assert 'summary' in semantic_analysis.doc_stages(ProcessingProfile('b', summary_mode='extractive'))
+    assert 'summary' in semantic_analysis.doc_stages(ProcessingProfile('c', summary_mode='map_reduce'))
@@ -0,0 +1,37 @@
+import numpy as np
+from app.nlp.embedding_classifier import EmbeddingClassifier
+
+# One axis per topic; phrases mentioning a topic point along its axis
+TOPICS = ['invoice', 'contract', 'report']
+
+calls = []
+
+
+def _stub_embed(phrases):
+    calls.append(list(phrases))
+    return np.array([
+        [1.0 if topic in phrase.lower() else 0.0 for topic in TOPICS] + [0.1]
+        for phrase in phrases
+    ])
+
+
+
+def test_labels_are_ranked_by_prototype_similarity():
+    """Test the closest prototype ranks first and the margin reflects the gap."""
+    classifier = EmbeddingClassifier(_stub_embed)
+    document = np.array([0.2, 0.9, 0.1, 0.0])
+    
+    ranked, margin = classifier.rank(document, ['Invoice', 'Contract', 'Report'])
+    assert ranked == ['Contract', 'Invoice', 'Report']
+    assert margin > 0.5
+
+
+def test_prototype_cache_is_bounded():
+    """Test prototypes are cached per label set and evicted least recently used first."""
+    calls.clear()
+    classifier = EmbeddingClassifier(_stub_embed, max_label_sets=2)
+    for labels in (['invoice', 'report'], ['contract'], ['invoice', 'report'], ['report']):
+        classifier.prototypes(labels)
+    
+    assert len(calls) == 3
+    assert list(classifier._prototypes) == [('invoice', 'report'), ('report',)]
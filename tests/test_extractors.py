@@ -34,3 +34,275 @@ def test_docx_extractor_with_empty_file():
     assert callable(extract_text_from_docx)
     assert callable(extract_metadata_from_docx)
 
+
+
+def _make_pdf(path, pages):
+    import fitz
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+
+def test_pdf_pages_are_extracted_in_order(tmp_path, monkeypatch):
+    """Test parallel page-range extraction joins pages in document order."""
+    from app.extractors import pdf_extractor
+    monkeypatch.setattr(pdf_extractor.settings, 'PDF_PARALLEL_MIN_PAGES', 2)
+    monkeypatch.setattr(pdf_extractor.settings, 'PDF_EXTRACTION_WORKERS', 2)
+    
+    path = str(tmp_path / "ordered.pdf")
+    _make_pdf(path, [f"Section {i} of the technical manual describes part {i}." for i in range(6)])
+    
+    page_texts = pdf_extractor.extract_page_texts(path)
+    assert [text.split()[1] for text in page_texts] == [str(i) for i in range(6)]
+    assert extract_text_from_pdf(path).startswith("Section 0")
+
+
+def test_ocr_renders_pages_lazily_with_bounded_in_flight(tmp_path, monkeypatch):
+    """Test streaming OCR keeps page order and at most N rendered pages alive."""
+    import threading
+    import time
+    from app.extractors import pdf_extractor
+    monkeypatch.setattr(pdf_extractor.settings, 'OCR_PAGES_IN_FLIGHT', 2)
+    monkeypatch.setattr(pdf_extractor.settings, 'OCR_DPI', 50)
+    
+    active = []
+    peak = []
+    lock = threading.Lock()
+    
+    def fake_ocr(image):
+        with lock:
+            active.append(image)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.remove(image)
+        assert image.mode == 'L'
+        return f"{image.width}x{image.height}"
+    
+    monkeypatch.setattr(pdf_extractor, '_ocr_image', fake_ocr)
+    path = str(tmp_path / "scanned.pdf")
+    _make_pdf(path, [f"Scanned page {i}" for i in range(5)])
+    
+    texts = pdf_extractor.ocr_pages(path)
+    assert len(texts) == 5
+    assert max(peak) <= 2
+    assert pdf_extractor.ocr_pages(path, [3]) == texts[3:4]
+
+
+def test_only_sparse_non_blank_pages_are_ocred(tmp_path, monkeypatch):
+    """Test hybrid OCR skips text pages and visually blank pages."""
+    import fitz
+    from app.extractors import pdf_extractor
+    monkeypatch.setattr(pdf_extractor.settings, 'OCR_DPI', 50)
+    ocred = []
+    
+    def fake_ocr(image):
+        ocred.append(image.size)
+        return "Recognized scanned paragraph."
+    
+    monkeypatch.setattr(pdf_extractor, '_ocr_image', fake_ocr)
+    
+    path = str(tmp_path / "hybrid.pdf")
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "A digital page with a complete text layer of its own.")
+    doc.new_page()  # Blank page
+    scanned = doc.new_page()
+    # A "scan": drawn content without a text layer
+    scanned.draw_rect(fitz.Rect(72, 72, 400, 300), color=(0, 0, 0), fill=(0, 0, 0))
+    doc.save(path)
+    doc.close()
+    
+    text = extract_text_from_pdf(path)
+    assert len(ocred) == 1
+    assert text.startswith("A digital page")
+    assert text.endswith("Recognized scanned paragraph.")
+
+
+def _striped_image(angle=0.0):
+    from PIL import Image, ImageDraw
+    image = Image.new('L', (1200, 1600), 230)
+    draw = ImageDraw.Draw(image)
+    for y in range(100, 1500, 50):
+        draw.rectangle((100, y, 1100, y + 15), fill=40)
+    return image.rotate(angle, fillcolor=230) if angle else image
+
+
+def test_otsu_threshold_separates_bimodal_histogram():
+    """Test the Otsu threshold falls between the ink and paper peaks."""
+    from app.extractors.pdf_extractor import otsu_threshold
+    histogram = [0] * 256
+    histogram[40] = 300
+    histogram[230] = 700
+    threshold = otsu_threshold(histogram)
+    assert 40 <= threshold < 230
+
+
+def test_preprocess_binarizes_and_downscales(monkeypatch):
+    """Test preprocessing yields a two-level image at the target DPI."""
+    import numpy as np
+    from app.extractors import pdf_extractor
+    monkeypatch.setattr(pdf_extractor.settings, 'OCR_TARGET_DPI', 150)
+    
+    processed = pdf_extractor.preprocess_image_for_ocr(_striped_image(), dpi=300)
+    assert processed.mode == 'L'
+    assert processed.size == (600, 800)
+    assert set(np.unique(np.asarray(processed))) == {0, 255}
+
+
+def test_estimate_skew_recovers_rotation():
+    """Test the projection-profile search finds the angle that undoes a rotation."""
+    from app.extractors.pdf_extractor import estimate_skew
+    assert estimate_skew(_striped_image(2.0)) == -2.0
+    assert estimate_skew(_striped_image()) == 0.0
+
+
+def test_extract_document_parses_pdf_bytes_once(tmp_path, monkeypatch):
+    """Test PDF bytes and memoryviews yield text, metadata and page count in one open."""
+    from app.extractors import pdf_extractor
+    from app.extractors.document_extractor import extract_document
+    path = str(tmp_path / "upload.pdf")
+    _make_pdf(path, [f"Page {i} of the quarterly report on regional sales." for i in range(3)])
+    with open(path, 'rb') as f:
+        content = f.read()
+    
+    opened = []
+    original_open = pdf_extractor.open_pdf
+    monkeypatch.setattr(pdf_extractor, 'open_pdf', lambda source: opened.append(source) or original_open(source))
+    
+    for source in (content, memoryview(content)):
+        extracted = extract_document(source, '.pdf')
+        assert extracted['page_count'] == 3
+        assert extracted['metadata']['page_count'] == 3
+        assert extracted['text'].startswith("Page 0")
+    assert len(opened) == 2
+
+
+def test_parallel_pdf_extraction_from_bytes(tmp_path, monkeypatch):
+    """Test page-range workers receive the uploaded bytes instead of a path."""
+    from app.extractors import pdf_extractor
+    monkeypatch.setattr(pdf_extractor.settings, 'PDF_PARALLEL_MIN_PAGES', 2)
+    monkeypatch.setattr(pdf_extractor.settings, 'PDF_EXTRACTION_WORKERS', 2)
+    path = str(tmp_path / "large.pdf")
+    _make_pdf(path, [f"Chapter {i} covers installation and maintenance steps." for i in range(4)])
+    with open(path, 'rb') as f:
+        content = f.read()
+    
+    page_texts = pdf_extractor.extract_page_texts(memoryview(content))
+    assert [text.split()[1] for text in page_texts] == ["0", "1", "2", "3"]
+
+
+def test_in_memory_pdf_is_shared_once_with_page_workers(tmp_path, monkeypatch):
+    """Test range tasks carry a shared-memory name, not a pickled copy of the PDF."""
+    import pickle
+    from concurrent.futures import ThreadPoolExecutor
+    from multiprocessing.shared_memory import SharedMemory
+    from app.extractors import pdf_extractor
+    monkeypatch.setattr(pdf_extractor.settings, 'PDF_PARALLEL_MIN_PAGES', 2)
+    monkeypatch.setattr(pdf_extractor.settings, 'PDF_EXTRACTION_WORKERS', 3)
+    path = str(tmp_path / "shared.pdf")
+    _make_pdf(path, [f"Clause {i} sets out the obligations of the supplier." for i in range(6)])
+    with open(path, 'rb') as f:
+        content = f.read()
+    
+    submitted = []
+    
+    class RecordingPool(ThreadPoolExecutor):
+        def submit(self, fn, *args):
+            submitted.append(pickle.dumps(args))
+            return super().submit(fn, *args)
+    
+    with RecordingPool(max_workers=3) as pool:
+        monkeypatch.setattr(pdf_extractor, '_get_page_pool', lambda: pool)
+        page_texts = pdf_extractor.extract_page_texts(content)
+    
+    assert [text.split()[1] for text in page_texts] == [str(i) for i in range(6)]
+    assert len(submitted) == 3
+    assert all(len(args) < len(content) // 4 for args in submitted)
+    shared = pickle.loads(submitted[0])[0]
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=shared.name)
+
+
+def test_extract_document_parses_docx_bytes():
+    """Test DOCX content is parsed from memory with its metadata."""
+    import io
+    from docx import Document
+    from app.extractors.document_extractor import extract_document
+    doc = Document()
+    doc.core_properties.title = "Service Agreement"
+    doc.add_paragraph("The supplier shall deliver the goods within thirty days.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    
+    extracted = extract_document(buffer.getvalue(), '.docx')
+    assert "thirty days" in extracted['text']
+    assert extracted['metadata']['title'] == "Service Agreement"
+
+
+def _contract_docx():
+    import io
+    from docx import Document
+    doc = Document()
+    doc.core_properties.title = "Master Services Agreement"
+    doc.core_properties.revision = 4
+    doc.add_paragraph("Schedule of fees")
+    table = doc.add_table(rows=3, cols=3)
+    for row in range(3):
+        for col in range(3):
+            table.cell(row, col).text = f"r{row}c{col}"
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, 2).merge(table.cell(2, 2))
+    doc.add_paragraph("Payment is due within thirty days.")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def test_streaming_docx_keeps_document_order_and_merged_cells_once():
+    """Test streamed DOCX text follows document order and does not repeat merged cells."""
+    from app.extractors.docx_extractor import extract_docx
+    lines = extract_docx(_contract_docx())['text'].split("\n")
+    
+    assert lines[0] == "Schedule of fees"
+    assert lines[-1] == "Payment is due within thirty days."
+    table_text = "\n".join(lines[1:-1])
+    assert table_text.count("r0c0") == 1
+    assert table_text.count("r2c2") == 1
+    assert "r2c0 | r2c1" in table_text
+
+
+def test_streaming_docx_metadata_matches_python_docx(monkeypatch):
+    """Test core.xml metadata read directly matches the python-docx fallback."""
+    from app.extractors import docx_extractor
+    content = _contract_docx()
+    streamed = docx_extractor.extract_docx(content)
+    
+    monkeypatch.setattr(docx_extractor.settings, 'DOCX_STREAMING_ENABLED', False)
+    fallback = docx_extractor.extract_docx(content)
+    assert streamed['metadata'] == fallback['metadata']
+    assert streamed['metadata']['revision'] == 4
+    assert streamed['page_count'] == fallback['page_count']
+
+
+def test_streaming_docx_reads_text_boxes_once():
+    """Test a text box stored as mc:Choice and mc:Fallback is emitted once."""
+    import io
+    from app.extractors.docx_extractor import iter_document_blocks
+    box = '<w:txbxContent><w:p><w:r><w:t>Boxed note</w:t></w:r></w:p></w:txbxContent>'
+    xml = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+        'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"><w:body>'
+        '<w:p><w:r><w:t>Before</w:t></w:r></w:p>'
+        '<w:p><w:r><mc:AlternateContent>'
+        f'<mc:Choice Requires="wps"><w:drawing>{box}</w:drawing></mc:Choice>'
+        f'<mc:Fallback><w:pict>{box}</w:pict></mc:Fallback>'
+        '</mc:AlternateContent></w:r></w:p>'
+        '<w:p><w:r><w:t>After</w:t></w:r></w:p>'
+        '</w:body></w:document>'
+    )
+    
+    assert list(iter_document_blocks(io.BytesIO(xml.encode()))) == ["Before", "Boxed note", "After"]
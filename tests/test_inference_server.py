@@ -0,0 +1,87 @@
+import threading
+from multiprocessing.connection import Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+from app.nlp import inference_server, semantic_analysis
+from app.nlp.inference_server import InferenceClient, InferenceServer, _pack_text, _unpack_text
+
+
+def _serve(address, handler):
+    """Accept one client on a Unix socket and hand the connection to ``handler``."""
+    listener = Listener(address, family='AF_UNIX', authkey=inference_server._authkey())
+
+    def accept():
+        with listener:
+            handler(listener.accept())
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_large_texts_travel_through_shared_memory(monkeypatch):
+    """Test texts above the threshold are packed into a segment and unpacked intact."""
+    monkeypatch.setattr(inference_server.settings, 'INFERENCE_SERVER_SHM_THRESHOLD', 16)
+    segments = []
+    
+    assert _pack_text("short", segments) == ('inline', "short")
+    payload = _pack_text("Umlaute: äöü " * 10, segments)
+    assert payload[0] == 'shm' and len(segments) == 1
+    assert _unpack_text(payload) == "Umlaute: äöü " * 10
+    
+    # The reader leaves the segment for its owner to unlink
+    SharedMemory(name=payload[1]).close()
+    segments[0].close()
+    segments[0].unlink()
+
+
+def test_unix_socket_round_trip(tmp_path, monkeypatch):
+    """Test an analyze request reaches the server with its texts and returns results."""
+    monkeypatch.setattr(inference_server.settings, 'INFERENCE_SERVER_SHM_THRESHOLD', 32)
+    received = []
+
+    def fake_analyze(texts, full_texts, label_set, profile):
+        received.append((texts, full_texts, profile.name))
+        return [{'length': len(text)} for text in full_texts]
+
+    monkeypatch.setattr(semantic_analysis, 'analyze_documents_local', fake_analyze)
+    address = str(tmp_path / "inference.sock")
+    server = _serve(address, InferenceServer(address)._handle)
+    
+    client = InferenceClient(address, timeout=5)
+    long_text = "The agreement renews annually. " * 20
+    assert client.ping()
+    assert client.analyze(["short", long_text[:100]], ["short", long_text], profile=None) == [
+        {'length': 5}, {'length': len(long_text)}
+    ]
+    assert received[0][1] == ["short", long_text]
+    client._reset()
+    server.join(timeout=5)
+
+
+def test_hung_server_times_out(tmp_path, monkeypatch):
+    """Test an unanswered request raises, and analysis can fall back in-process."""
+    release = threading.Event()
+
+    def hang(connection):
+        connection.recv()
+        release.wait(5)
+        connection.close()
+
+    address = str(tmp_path / "hung.sock")
+    _serve(address, hang)
+    client = InferenceClient(address, timeout=0.2)
+    with pytest.raises(TimeoutError):
+        client.call({'method': 'ping'})
+    release.set()
+
+    failing = InferenceClient(str(tmp_path / "missing.sock"), timeout=0.2)
+    monkeypatch.setattr(inference_server, '_client', failing)
+    monkeypatch.setattr(semantic_analysis.settings, 'INFERENCE_SERVER_ENABLED', True)
+    monkeypatch.setattr(semantic_analysis.settings, 'INFERENCE_SERVER_FALLBACK_LOCAL', True)
+    monkeypatch.setattr(
+        semantic_analysis, 'analyze_documents_local',
+        lambda texts, full_texts, label_set, profile: ['local'] * len(texts)
+    )
+    assert semantic_analysis.analyze_documents(["text"]) == ['local']
@@ -0,0 +1,104 @@
+import math
+import types
+
+import pytest
+from app.nlp.label_sets import LabelSetRegistry, score_premises
+
+PAD, CLS, SEP = 1, 0, 2
+
+# Word-level vocabulary of the stub tokenizer
+VOCAB = {'this': 3, 'example': 4, 'is': 5, 'invoice.': 10, 'contract.': 11}
+
+
+class StubTokenizer:
+    """Word-level tokenizer with BART-style pair layout."""
+
+    model_max_length = 64
+    pad_token_id = PAD
+    name_or_path = 'stub-nli'
+
+    def __init__(self):
+        self.calls = 0
+
+    def __len__(self):
+        return len(VOCAB) + 3
+
+    def __call__(self, texts, add_special_tokens=False):
+        self.calls += 1
+        return {'input_ids': [[VOCAB[word] for word in text.lower().split()] for text in texts]}
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3 if pair else 2
+
+    def build_inputs_with_special_tokens(self, first, second):
+        return [CLS] + first + [SEP] + second + [SEP]
+
+
+class StubNLIModel:
+    """Entailment logit 2 when the hypothesis label token occurs in the premise, else 0."""
+
+    config = types.SimpleNamespace(
+        label2id={'contradiction': 0, 'neutral': 1, 'entailment': 2}, num_labels=3
+    )
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, input_ids, attention_mask):
+        import torch
+
+        self.batches.append((input_ids.clone(), attention_mask.clone()))
+        logits = torch.zeros((input_ids.shape[0], 3))
+        for row, (ids, mask) in enumerate(zip(input_ids.tolist(), attention_mask.tolist())):
+            ids = [token for token, keep in zip(ids, mask) if keep]
+            premise, hypothesis = ids[1:ids.index(SEP)], ids[ids.index(SEP) + 1:-1]
+            logits[row, 2] = 2.0 if hypothesis[-1] in premise else 0.0
+        return types.SimpleNamespace(logits=logits)
+
+
+def test_registry_shares_and_bounds_label_sets():
+    """Test identical label sets share an entry and unpinned sets are evicted."""
+    registry = LabelSetRegistry(max_size=1)
+    pinned = registry.register(['Invoice', 'Contract'], pinned=True)
+    assert registry.register([' Invoice', 'Contract', 'Invoice']) is pinned
+    
+    custom = registry.register(['Report'])
+    registry.register(['Memo'])
+    assert registry.get(pinned.id) is pinned
+    assert registry.get(custom.id) is None
+
+
+def test_score_premises_softmaxes_entailment_over_padded_pairs():
+    """Test scores are a softmax over entailment logits of padded pairs, reusing hypothesis ids."""
+    torch = pytest.importorskip('torch')
+    tokenizer = StubTokenizer()
+    model = StubNLIModel()
+    label_set = LabelSetRegistry().register(['invoice', 'contract'])
+    premises = [[10, 3], [4, 5, 11, 3, 4]]
+    
+    results = score_premises(model, tokenizer, premises, label_set, max_pairs_per_forward=3)
+    score_premises(model, tokenizer, premises, label_set, max_pairs_per_forward=3)
+    
+    expected = math.exp(2) / (math.exp(2) + 1)
+    assert results[0]['labels'] == ['invoice', 'contract']
+    assert results[1]['labels'] == ['contract', 'invoice']
+    for result in results:
+        assert result['scores'][0] == pytest.approx(expected, rel=1e-5)
+        assert sum(result['scores']) == pytest.approx(1.0)
+    
+    # Hypotheses are tokenized once; 4 pairs run as forwards of 3 and 1
+    assert tokenizer.calls == 1
+    input_ids, attention_mask = model.batches[0]
+    assert [len(ids) for ids in input_ids] == [12, 12, 12]
+    assert attention_mask.sum(dim=1).tolist() == [9, 9, 12]
+    assert (input_ids[attention_mask == 0] == PAD).all()
+    assert model.batches[1][0].shape[0] == 1
+
+
+def test_hypothesis_ids_survive_a_tokenizer_reload():
+    """Test a reloaded copy of the same tokenizer reuses the cached hypothesis ids."""
+    label_set = LabelSetRegistry().register(['invoice', 'contract'])
+    first, reloaded = StubTokenizer(), StubTokenizer()
+
+    assert label_set.hypothesis_ids(first) == label_set.hypothesis_ids(reloaded)
+    assert (first.calls, reloaded.calls) == (1, 0)
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+from app.nlp.language import detect_language, language_evidence
+from app.metadata.dublin_core_mapper import map_to_dublin_core
+
+
+@pytest.mark.parametrize("expected, text", [
+    ("en", "The committee reviewed the annual budget and approved the proposal "
+           "for new research funding in the next fiscal year."),
+    ("es", "El comité revisó el presupuesto anual y aprobó la propuesta de "
+           "financiación para la investigación del próximo año."),
+    ("fr", "Le comité a examiné le budget annuel et a approuvé la proposition "
+           "de financement pour la recherche de l'année prochaine."),
+    ("de", "Der Ausschuss hat den Jahreshaushalt geprüft und den Vorschlag für "
+           "die Forschungsförderung im nächsten Jahr genehmigt."),
+    ("it", "Il comitato ha esaminato il bilancio annuale e ha approvato la "
+           "proposta di finanziamento per la ricerca del prossimo anno."),
+    ("ru", "Комитет рассмотрел годовой бюджет и одобрил предложение."),
+    ("ja", "委員会は年間予算を審査し、提案を承認しました。"),
+])
+def test_detect_language(expected, text):
+    """Trigram profiles and scripts identify common document languages."""
+    language, confidence = detect_language(text)
+    assert language == expected
+    assert confidence > 0
+
+
+def test_short_text_is_undetermined():
+    """Too little text yields 'und' rather than a guess."""
+    assert detect_language("Invoice 2023-04") == ("und", 0.0)
+
+
+def test_candidates_restrict_profiles():
+    """Only the configured languages are considered for Latin-script text."""
+    text = "Der Ausschuss hat den Jahreshaushalt geprüft und genehmigt."
+    language, _ = detect_language(text, candidates=["en", "fr"])
+    assert language in ("en", "fr")
+
+
+def _sample(name):
+    with open(os.path.join(os.path.dirname(__file__), name), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("text", [
+    "INVOICE No. 2024-118 Total due: USD 4,500.00 Payment terms net 30 days from "
+    "date of invoice. Bank: ACME Corp, IBAN DE89 3704.",
+    "PO 77812 Qty 40 Unit EUR 12.50 Delivery 2024-03-01 Terms: DDP, net 45.",
+])
+def test_short_numeric_english_is_not_rerouted(text):
+    """Codes and amounts can favour another profile; they must not skip English stages."""
+    from app.nlp.semantic_analysis import analyzer, language_supported
+    assert analyzer.detect_language(text) == "und"
+    assert language_supported('entities', analyzer.detect_language(text))
+
+
+def test_bilingual_text_is_undetermined():
+    """A document alternating Spanish and English has no clear lead and runs every stage."""
+    from app.nlp.semantic_analysis import analyzer
+    evidence = language_evidence(_sample("sample5.txt"), ["en", "es", "fr", "de", "it"])
+    assert evidence['margin'] < 0.2
+    assert analyzer.detect_language(_sample("sample5.txt")) == "und"
+
+
+def test_clear_documents_keep_their_language():
+    """Long single-language documents are still identified for routing."""
+    from app.nlp.semantic_analysis import analyzer
+    french = ("Le comité a examiné le budget annuel et a approuvé la proposition "
+              "de financement pour la recherche de l'année prochaine. ") * 3
+    assert analyzer.detect_language(french) == "fr"
+    assert analyzer.detect_language(_sample("sample2.txt")) == "en"
+    assert analyzer.detect_language("委員会は年間予算を審査し、提案を承認しました。") == "ja"
+
+
+def test_unsupported_language_is_not_mistaken_for_a_neighbour():
+    """Portuguese is reported as such and, being unsupported, runs every stage."""
+    from app.nlp.semantic_analysis import analyzer, language_supported
+    portuguese = ("O comitê analisou o orçamento anual e aprovou a proposta de "
+                  "financiamento para a pesquisa do próximo ano, que não foi "
+                  "discutida na reunião anterior com os membros do conselho. ") * 2
+    assert analyzer.detect_language(portuguese) == "pt"
+    assert language_supported('entities', "pt")
+    assert not language_supported('entities', "es")
+
+
+def test_dublin_core_uses_detected_language():
+    """dc:language comes from analysis, defaulting to English for older records."""
+    assert map_to_dublin_core({'language': 'fr'})['dc:language'] == 'fr'
+    assert map_to_dublin_core({})['dc:language'] == 'en'
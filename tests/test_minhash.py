@@ -0,0 +1,51 @@
+from app.nlp.minhash import MinHasher, band_keys, shingle_hashes, similarity
+
+BASE = (
+    "The regional archive holds correspondence, land records and photographs "
+    "collected between 1850 and 1950. Researchers may request digitized copies "
+    "of any item listed in the catalog. Original documents are available in the "
+    "reading room by appointment only, and fragile items are handled by staff. "
+    "The collection is described in the finding aid published by the archive."
+)
+
+
+def test_similar_texts_have_similar_signatures():
+    """A changed footer barely moves the estimate; unrelated text scores low."""
+    hasher = MinHasher()
+    base = hasher.signature(BASE)
+    footer = hasher.signature(BASE + " Page 1 of 12, printed 2024-03-01.")
+    other = hasher.signature(
+        "Quarterly revenue grew by eight percent while operating costs fell, "
+        "driven by lower energy prices and a smaller logistics network."
+    )
+    assert similarity(base, footer) > 0.7
+    assert similarity(base, other) < 0.1
+
+
+def test_signatures_ignore_case_and_formatting():
+    """Re-extracted text with different whitespace and case is identical."""
+    hasher = MinHasher()
+    reformatted = BASE.upper().replace(". ", ".\n\n")
+    assert similarity(hasher.signature(BASE), hasher.signature(reformatted)) == 1.0
+
+
+def test_band_keys_collide_for_near_duplicates():
+    """Near-duplicates share LSH buckets; keys are namespaced by band."""
+    hasher = MinHasher(num_perm=128)
+    first = band_keys(hasher.signature(BASE), bands=16)
+    second = band_keys(hasher.signature(BASE + " Reprinted."), bands=16)
+    assert len(first) == 16
+    assert set(first) & set(second)
+    assert len({key.split(':')[0] for key in first}) == 16
+
+
+def test_signature_roundtrips_through_bytes():
+    """Stored signatures decode to the same values."""
+    hasher = MinHasher(num_perm=64)
+    signature = hasher.signature(BASE)
+    assert (hasher.from_bytes(hasher.to_bytes(signature)) == signature).all()
+
+
+def test_empty_text_has_no_shingles():
+    """Text without words yields no shingles."""
+    assert len(shingle_hashes("  ... ---  ")) == 0
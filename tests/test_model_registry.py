@@ -0,0 +1,101 @@
+from app.nlp.model_registry import ModelRegistry
+
+MB = 1024 * 1024
+
+
+class Tensor:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def numel(self):
+        return self.nbytes
+
+    def element_size(self):
+        return 1
+
+
+class FakeModel:
+    """Stand-in exposing parameters()/buffers() like a torch module."""
+
+    def __init__(self, nbytes):
+        self._parameters = [Tensor(nbytes)]
+
+    def parameters(self):
+        return self._parameters
+
+    def buffers(self):
+        return []
+
+
+def _registry(budget_mb, **kwargs):
+    registry = ModelRegistry(memory_budget_bytes=budget_mb * MB, **kwargs)
+    loads = []
+    for name in ('a', 'b', 'c'):
+        registry.register(name, lambda name=name: loads.append(name) or FakeModel(400 * MB))
+    return registry, loads
+
+
+def test_least_recently_used_model_is_evicted():
+    """Loading over the budget evicts the model used longest ago."""
+    registry, loads = _registry(1000)
+    registry.get('a')
+    registry.get('b')
+    registry.get('a')  # b is now least recently used
+    registry.get('c')
+
+    assert registry.is_loaded('a') and registry.is_loaded('c')
+    assert not registry.is_loaded('b')
+    assert registry.stats()['b']['evictions'] == 1
+    assert registry.resident_bytes() == 800 * MB
+
+    # An evicted model is reloaded on demand
+    registry.get('b')
+    assert loads == ['a', 'b', 'c', 'b']
+    assert registry.stats()['b']['loads'] == 2
+
+
+def test_pinned_and_recently_used_models_are_kept():
+    """Pinned models and models inside the idle window are never evicted."""
+    registry, _ = _registry(1000, pinned=['a'], min_idle_s=60)
+    registry.get('a')
+    registry.get('b')
+    registry.get('c')
+
+    # Nothing is evictable, so the budget is exceeded rather than thrashing
+    assert all(registry.is_loaded(name) for name in ('a', 'b', 'c'))
+
+
+def test_snapshot_runs_once_after_first_load():
+    """The snapshot callback gets the model in the background, not when it is evicted."""
+    registry = ModelRegistry(memory_budget_bytes=500 * MB)
+    snapshots = []
+    registry.register('a', lambda: FakeModel(400 * MB), snapshot=snapshots.append)
+    registry.register('b', lambda: FakeModel(400 * MB))
+    model = registry.get('a')
+    registry._snapshot_threads['a'].join(timeout=5)
+    assert snapshots == [model]
+
+    registry.get('b')  # evicts a
+    registry.get('a')
+    assert snapshots == [model]
+
+
+def test_models_in_use_are_not_evicted():
+    """A model held through acquire() stays resident while another one loads."""
+    registry, loads = _registry(500)
+    with registry.acquire('a') as model:
+        assert isinstance(model, FakeModel)
+        registry.get('b')
+        assert registry.is_loaded('a')
+
+    registry.get('c')
+    assert not registry.is_loaded('a')
+    assert loads == ['a', 'b', 'c']
+
+
+def test_unlimited_budget_never_evicts():
+    """Without a budget every model stays resident."""
+    registry, _ = _registry(0)
+    for name in ('a', 'b', 'c'):
+        registry.get(name)
+    assert all(registry.is_loaded(name) for name in ('a', 'b', 'c'))
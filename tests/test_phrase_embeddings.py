@@ -0,0 +1,99 @@
+import numpy as np
+from app.nlp.phrase_embeddings import PhraseEmbeddingCache, normalize_phrase
+
+
+class CountingEncoder:
+    """Deterministic stand-in encoder that records which phrases it embeds."""
+
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, phrases):
+        self.seen.extend(phrases)
+        return np.array([[len(p), p.count(' '), 1.0] for p in phrases], dtype=np.float32)
+
+
+def test_only_new_phrases_are_encoded(tmp_path):
+    """Repeated and differently-cased phrases reuse cached vectors."""
+    cache = PhraseEmbeddingCache(str(tmp_path), max_phrases=10)
+    encoder = CountingEncoder()
+
+    first = cache.embed(["machine learning", "Data"], encoder)
+    second = cache.embed(["data", "MACHINE  learning", "model"], encoder)
+
+    assert encoder.seen == ["machine learning", "data", "model"]
+    assert first.shape == (2, 3)
+    np.testing.assert_allclose(second[1], first[0])
+    assert cache.stats()['hits'] == 2
+
+
+def test_cache_persists_across_instances(tmp_path):
+    """A flushed cache is reloaded from the memory-mapped matrix and index."""
+    cache = PhraseEmbeddingCache(str(tmp_path), max_phrases=10)
+    cache.embed(["quarterly revenue"], CountingEncoder())
+    cache.flush()
+    cache._lock_file.close()
+
+    reopened = PhraseEmbeddingCache(str(tmp_path), max_phrases=10)
+    encoder = CountingEncoder()
+    vectors = reopened.embed(["quarterly revenue"], encoder)
+
+    assert encoder.seen == []
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(vectors[0], [17.0, 1.0, 1.0])
+
+
+def test_least_recently_used_phrase_is_evicted(tmp_path):
+    """When full, the least recently used phrase's row is reused."""
+    cache = PhraseEmbeddingCache(str(tmp_path), max_phrases=2)
+    encoder = CountingEncoder()
+    cache.embed(["alpha", "beta"], encoder)
+    cache.embed(["alpha"], encoder)
+    cache.embed(["gamma"], encoder)
+    cache.embed(["alpha", "beta"], encoder)
+
+    assert encoder.seen == ["alpha", "beta", "gamma", "beta"]
+    assert normalize_phrase("  Two\tWords ") == "two words"
+
+
+def test_reader_ignores_rows_reused_by_the_owner(tmp_path):
+    """A read-only process treats a row overwritten by the owner as a miss."""
+    owner = PhraseEmbeddingCache(str(tmp_path), max_phrases=2)
+    owner.embed(["alpha", "beta"], CountingEncoder())
+    owner.flush()
+
+    reader = PhraseEmbeddingCache(str(tmp_path), max_phrases=2)
+    encoder = CountingEncoder()
+    reader.embed(["alpha"], encoder)
+    assert not reader.writable
+    assert encoder.seen == []
+
+    # The owner wraps around and reuses both rows for other phrases
+    owner.embed(["gamma words here", "delta"], CountingEncoder())
+    vectors = reader.embed(["alpha", "beta"], encoder)
+
+    assert encoder.seen == ["alpha", "beta"]
+    np.testing.assert_allclose(vectors, [[5.0, 0.0, 1.0], [4.0, 0.0, 1.0]])
+
+
+def test_reader_reloads_index_and_takes_over_ownership(tmp_path):
+    """A read-only process picks up newly flushed phrases and owns the cache once the owner exits."""
+    owner = PhraseEmbeddingCache(str(tmp_path), max_phrases=4)
+    owner.embed(["alpha"], CountingEncoder())
+    owner.flush()
+
+    reader = PhraseEmbeddingCache(str(tmp_path), max_phrases=4, flush_interval_s=0)
+    encoder = CountingEncoder()
+    reader.embed(["alpha"], encoder)
+    assert not reader.writable
+
+    owner.embed(["beta"], CountingEncoder())
+    owner.flush()
+    reader.embed(["beta"], encoder)
+    assert encoder.seen == []
+
+    owner._lock_file.close()
+    reader.embed(["gamma"], encoder)
+    assert reader.writable
+    assert encoder.seen == ["gamma"]
+    assert reader.stats()['phrases'] == 3
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.nlp.pipeline import Stage, StageExecutor
+
+pool = ThreadPoolExecutor(max_workers=4)
+
+
+def test_stages_receive_dependency_results():
+    """Test dependent stages see the results of their dependencies."""
+    stages = [
+        Stage('parse', lambda ctx, inputs: ctx.upper()),
+        Stage('length', lambda ctx, inputs: len(inputs['parse']), ['parse']),
+        Stage('independent', lambda ctx, inputs: 'ok'),
+    ]
+    run = StageExecutor(stages, pool).run("text")
+
+    assert run['results'] == {'parse': 'TEXT', 'length': 4, 'independent': 'ok'}
+    assert set(run['timings']) == {'parse', 'length', 'independent'}
+    assert run['errors'] == {}
+
+
+def test_independent_stages_run_concurrently():
+    """Test wall time approaches the slowest stage, not the sum."""
+    stages = [Stage(f's{i}', lambda ctx, inputs: time.sleep(0.2)) for i in range(3)]
+    start = time.monotonic()
+    StageExecutor(stages, pool).run(None)
+    assert time.monotonic() - start < 0.5
+
+
+def test_failed_stage_returns_partial_results():
+    """Test a failing stage yields its default and skips its dependents."""
+    def broken(ctx, inputs):
+        raise RuntimeError("model crashed")
+
+    stages = [
+        Stage('broken', broken, default=[]),
+        Stage('dependent', lambda ctx, inputs: 'never', ['broken'], default=''),
+        Stage('fine', lambda ctx, inputs: 'ok'),
+    ]
+    run = StageExecutor(stages, pool).run(None)
+
+    assert run['results'] == {'broken': [], 'dependent': '', 'fine': 'ok'}
+    assert set(run['errors']) == {'broken', 'dependent'}
+
+
+def test_stage_timeout():
+    """Test a slow stage is abandoned after its timeout."""
+    stages = [
+        Stage('slow', lambda ctx, inputs: time.sleep(1) or 'late', timeout=0.1, default='timed out'),
+        Stage('fast', lambda ctx, inputs: 'ok'),
+    ]
+    start = time.monotonic()
+    run = StageExecutor(stages, pool).run(None)
+
+    assert time.monotonic() - start < 0.8
+    assert run['results'] == {'slow': 'timed out', 'fast': 'ok'}
+    assert 'slow' in run['errors']
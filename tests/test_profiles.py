@@ -0,0 +1,39 @@
+import pytest
+from app.nlp.profiles import build_profiles, get_profile, resolve_profile, settings
+
+
+def test_builtin_profiles():
+    """Fast uses an extractive summary and small budgets; accurate keeps every stage."""
+    profiles = build_profiles()
+    assert set(profiles) >= {'fast', 'balanced', 'accurate'}
+    assert profiles['fast'].summary_mode == 'extractive'
+    assert profiles['fast'].sentiment_max_tokens < profiles['accurate'].sentiment_max_tokens
+    assert profiles['balanced'].summarizer == 'summarizer_distilled'
+    assert profiles['accurate'].runs('summary')
+
+
+def test_overrides_extend_a_base_profile():
+    """A new profile inherits from its base; overrides replace single options."""
+    profiles = build_profiles({
+        'bulk': {'base': 'fast', 'sentiment_max_tokens': 64, 'skip_stages': ['summary']},
+        'accurate': {'classifier_max_tokens': 512},
+    })
+    assert profiles['bulk'].summary_mode == 'extractive'
+    assert not profiles['bulk'].runs('summary')
+    assert profiles['bulk'].sentiment_max_tokens == 64
+    assert profiles['accurate'].classifier_max_tokens == 512
+    assert profiles['fast'].sentiment_max_tokens == 128
+
+
+def test_resolve_profile(monkeypatch):
+    """An explicit profile wins over the tenant's, which wins over the default."""
+    monkeypatch.setattr(settings, 'TENANT_PROFILES', {'acme': 'fast'})
+    assert resolve_profile(None, 'acme').name == 'fast'
+    assert resolve_profile('balanced', 'acme').name == 'balanced'
+    assert resolve_profile(None, 'other').name == settings.DEFAULT_PROFILE
+
+
+def test_unknown_profile_is_rejected():
+    """Unknown names raise instead of silently using the default."""
+    with pytest.raises(ValueError):
+        get_profile('turbo')
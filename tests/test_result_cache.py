@@ -0,0 +1,144 @@
+from app.nlp.result_cache import StageResultCache, normalize_text, text_hash
+
+
+def test_text_hash_ignores_whitespace_differences():
+    """Re-extracted text with different spacing maps to the same key."""
+    assert normalize_text("  Hello\n\n  world\t!  ") == "Hello world !"
+    assert text_hash("Hello   world") == text_hash("Hello\nworld")
+    assert text_hash("Hello world") != text_hash("Hello there")
+
+
+def test_key_depends_on_model_and_params():
+    """Changing the model, parameters or cache version changes the key."""
+    cache = StageResultCache(max_entries=10)
+    key = cache.make_key('summary', 'abc', 'bart', {'max_length': 150})
+    assert key == cache.make_key('summary', 'abc', 'bart', {'max_length': 150})
+    assert key != cache.make_key('summary', 'abc', 'bart', {'max_length': 100})
+    assert key != cache.make_key('summary', 'abc', 'pegasus', {'max_length': 150})
+    assert key != StageResultCache(version="2").make_key('summary', 'abc', 'bart', {'max_length': 150})
+
+
+def test_get_or_compute_caches_and_evicts_lru():
+    """Results are reused until evicted; empty results are not stored."""
+    cache = StageResultCache(max_entries=2)
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return value
+
+    cache.get_or_compute('keywords', 'a', lambda: compute(['a']))
+    cache.get_or_compute('keywords', 'a', lambda: compute(['a']))
+    assert calls == [['a']]
+
+    cache.get_or_compute('keywords', 'empty', lambda: compute([]))
+    assert not cache.contains('empty')
+
+    cache.get_or_compute('keywords', 'b', lambda: compute(['b']))
+    cache.get_or_compute('keywords', 'c', lambda: compute(['c']))
+    assert not cache.contains('a')
+    assert cache.contains('b') and cache.contains('c')
+
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['stages']['keywords']['hit_memory'] == 1
+
+
+def test_uncached_results_are_returned_but_not_stored():
+    """Degraded results wrapped in Uncached are recomputed on the next lookup."""
+    from app.nlp.result_cache import Uncached
+    cache = StageResultCache(max_entries=10)
+    assert cache.get_or_compute('summary', 'k', lambda: Uncached("fallback")) == "fallback"
+    assert not cache.contains('k')
+
+
+def test_timed_out_summary_is_not_cached(monkeypatch):
+    """A summary that fell back after a timeout is recomputed; the abstractive one is cached."""
+    import types
+    from concurrent.futures import Future
+    from app.nlp import semantic_analysis
+    from app.nlp.profiles import ProcessingProfile
+
+    submitted = []
+    pending = Future()
+
+    def submit_summary(text, max_length, model_name, max_tokens):
+        submitted.append(text)
+        return pending
+
+    analyzer = semantic_analysis.analyzer
+    monkeypatch.setattr(semantic_analysis, 'stage_cache', StageResultCache(max_entries=10))
+    monkeypatch.setattr(semantic_analysis.settings, 'SUMMARY_TIME_BUDGET_S', 0.05)
+    monkeypatch.setattr(analyzer, 'registry', types.SimpleNamespace(
+        get=lambda name: object(), is_enabled=lambda name: True
+    ))
+    monkeypatch.setattr(analyzer, '_submit_summary', submit_summary)
+    monkeypatch.setattr(analyzer, 'generate_extractive_summary', lambda text, doc=None: "extractive")
+
+    profile = ProcessingProfile('abstractive', summary_mode='truncate')
+    summary_stage = next(
+        stage for stage in semantic_analysis.build_analysis_stages(profile=profile)
+        if stage.name == 'summary'
+    )
+    context = semantic_analysis.AnalysisContext("A long report. " * 20, profile=profile)
+
+    assert summary_stage.fn(context, {'parse': None}) == "extractive"
+    pending = Future()
+    pending.set_result("abstractive")
+    assert summary_stage.fn(context, {'parse': None}) == "abstractive"
+    assert summary_stage.fn(context, {'parse': None}) == "abstractive"
+    assert len(submitted) == 2
+
+
+def test_line_sensitive_stages_key_on_raw_text(monkeypatch):
+    """Test reflowed text shares summary entries but not key_sections entries."""
+    from app.nlp import semantic_analysis
+    from app.nlp.profiles import ProcessingProfile
+
+    monkeypatch.setattr(semantic_analysis, 'stage_cache', StageResultCache(max_entries=10))
+    profile = ProcessingProfile('extractive', summary_mode='extractive')
+    heading = semantic_analysis.AnalysisContext("# Scope\nThe terms apply.", profile=profile)
+    reflowed = semantic_analysis.AnalysisContext("# Scope The terms apply.", profile=profile)
+
+    def key(name, context):
+        return semantic_analysis.stage_cache_key(name, context)
+
+    assert key('summary', heading) == key('summary', reflowed)
+    assert key('key_sections', heading) != key('key_sections', reflowed)
+
+
+def test_summary_key_follows_profile_max_length(monkeypatch):
+    """Test the summary length limit of the profile is part of the cache key."""
+    import types
+    from app.nlp import semantic_analysis
+    from app.nlp.profiles import ProcessingProfile
+
+    monkeypatch.setattr(semantic_analysis, 'stage_cache', StageResultCache(max_entries=10))
+    monkeypatch.setattr(semantic_analysis.analyzer, 'registry', types.SimpleNamespace(
+        get=lambda name: object(), is_enabled=lambda name: True
+    ))
+    keys = {
+        semantic_analysis.stage_cache_key('summary', semantic_analysis.AnalysisContext(
+            "A report.", profile=ProcessingProfile('p', summary_max_length=length)
+        ))
+        for length in (80, 150)
+    }
+    assert len(keys) == 2
+
+
+def test_unavailable_summarizer_falls_back_uncached(monkeypatch):
+    """A summarizer that failed to load yields an extractive summary that is not cached."""
+    import types
+    from app.nlp import semantic_analysis
+    from app.nlp.profiles import ProcessingProfile
+    from app.nlp.result_cache import Uncached
+
+    analyzer = semantic_analysis.analyzer
+    monkeypatch.setattr(analyzer, 'registry', types.SimpleNamespace(
+        get=lambda name: None, is_enabled=lambda name: True
+    ))
+    monkeypatch.setattr(analyzer, 'generate_extractive_summary', lambda text, doc=None: "extractive")
+
+    summary = analyzer.summarize("A long report. " * 20, profile=ProcessingProfile('p'))
+    assert isinstance(summary, Uncached)
+    assert summary.value == "extractive"
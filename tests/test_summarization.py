@@ -0,0 +1,116 @@
+from concurrent.futures import Future
+from app.nlp.summarization import (
+    MapReduceSummarizer, chunk_sentences, extractive_summary, select_evenly,
+    split_sentences, textrank_scores
+)
+
+
+class WhitespaceTokenizer:
+    """Minimal tokenizer stand-in: one token per word."""
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {'input_ids': [text.split() for text in texts]}
+
+    def decode(self, ids):
+        return ' '.join(ids)
+
+
+def _completed(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def test_split_sentences():
+    """Test regex sentence splitting without a spaCy doc."""
+    text = "First sentence. Second one! Third?\n\nNew paragraph"
+    assert split_sentences(text) == [
+        "First sentence.", "Second one!", "Third?", "New paragraph"
+    ]
+
+
+def test_chunk_sentences_respects_token_budget():
+    """Test chunks keep whole sentences within the token budget."""
+    sentences = ["one two three.", "four five.", "six seven eight nine.", "ten."]
+    chunks = chunk_sentences(sentences, WhitespaceTokenizer(), max_tokens=5)
+    assert chunks == ["one two three. four five.", "six seven eight nine. ten."]
+
+
+def test_chunk_sentences_splits_oversized_sentence():
+    """Test a sentence longer than the budget is cut by tokens."""
+    chunks = chunk_sentences(["a b c d e f g"], WhitespaceTokenizer(), max_tokens=3)
+    assert chunks == ["a b c", "d e f", "g"]
+
+
+def test_select_evenly_keeps_first_and_last():
+    """Test chunk sampling spans the whole document."""
+    chunks = [str(i) for i in range(10)]
+    selected = select_evenly(chunks, 4)
+    assert len(selected) == 4
+    assert selected[0] == "0" and selected[-1] == "9"
+
+
+def test_map_reduce_summarizes_chunks_then_summaries():
+    """Test chunk summaries are combined by a final reduce call."""
+    calls = []
+
+    def submit(chunk, max_length):
+        calls.append((chunk, max_length))
+        return _completed(f"summary{len(calls)}.")
+
+    summarizer = MapReduceSummarizer(
+        submit, WhitespaceTokenizer(), chunk_tokens=4, chunk_summary_length=20
+    )
+    text = "alpha beta gamma. delta epsilon zeta. eta theta iota."
+    summary = summarizer.summarize(text, max_length=50)
+
+    assert [max_length for _, max_length in calls] == [20, 20, 20, 50]
+    assert summary == "summary4."
+
+
+
+def test_map_cancels_in_flight_chunks_after_time_budget():
+    """Test chunks still running when the budget expires are cancelled."""
+    submitted = []
+
+    def submit(chunk, max_length):
+        submitted.append(Future())
+        return submitted[-1]
+
+    summarizer = MapReduceSummarizer(
+        submit, WhitespaceTokenizer(), chunk_tokens=4, concurrency=2, time_budget_s=0.05
+    )
+    text = "alpha beta gamma. delta epsilon zeta. eta theta iota."
+    assert summarizer.summarize(text, max_length=50) == ""
+    assert len(submitted) == 2
+    assert all(future.cancelled() for future in submitted)
+
+def test_textrank_prefers_central_sentences():
+    """Test sentences sharing terms with many others rank highest."""
+    sentences = [
+        "The library catalog stores metadata records.",
+        "Metadata records in the catalog describe each library item.",
+        "The weather was pleasant yesterday afternoon.",
+        "Catalog metadata helps readers find library records.",
+    ]
+    scores = textrank_scores(sentences)
+    assert scores.argmin() == 2
+
+
+def test_extractive_summary_keeps_document_order():
+    """Test the selected sentences are returned in their original order."""
+    sentences = [
+        "Archives digitize their catalog metadata records every year.",
+        "Lunch was served at noon.",
+        "Digitized metadata records make the catalog searchable online.",
+        "Searchable catalog records bring more readers to the archives.",
+    ]
+    summary = extractive_summary(sentences, max_sentences=2)
+    assert "Lunch" not in summary
+    kept = [sentence for sentence in sentences if sentence in summary]
+    assert summary == ' '.join(kept)
+
+
+def test_extractive_summary_of_short_document():
+    """Test a document with few sentences is returned whole."""
+    assert extractive_summary(["Only one sentence here."]) == "Only one sentence here."
@@ -0,0 +1,93 @@
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+from app.nlp import thread_budget
+from app.nlp.thread_budget import (
+    ThreadBudget, apply_thread_budget, candidate_splits, effective_settings, plan_budget, settings
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_thread_limits(monkeypatch):
+    """Undo the process-wide thread settings a test applies."""
+    environment = {
+        name: os.environ.get(name)
+        for name in list(thread_budget._THREAD_ENV_VARS) + ['TOKENIZERS_PARALLELISM']
+    }
+    monkeypatch.setattr(thread_budget, '_applied', thread_budget._applied)
+    pools = None
+    if importlib.util.find_spec('threadpoolctl'):
+        from threadpoolctl import threadpool_info, threadpool_limits
+        pools = threadpool_info()
+    torch_threads = sys.modules['torch'].get_num_threads() if 'torch' in sys.modules else None
+
+    yield
+
+    for name, value in environment.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+    if pools is not None:
+        threadpool_limits(limits=pools)
+    if torch_threads is not None and 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(torch_threads)
+
+
+def test_cores_are_split_across_workers():
+    """Each worker gets an equal share of the cores, at least one thread."""
+    budget = plan_budget(workers=4, cores=16)
+    assert (budget.intra_op, budget.blas, budget.inter_op) == (4, 4, 1)
+    assert plan_budget(workers=8, cores=4).intra_op == 1
+
+
+def test_explicit_settings_override_the_split(monkeypatch):
+    """Configured thread counts win over the computed share."""
+    monkeypatch.setattr(settings, 'TORCH_INTRA_OP_THREADS', 3)
+    monkeypatch.setattr(settings, 'BLAS_THREADS', 1)
+    budget = plan_budget(workers=2, cores=16)
+    assert (budget.intra_op, budget.blas) == (3, 1)
+
+
+def test_apply_sets_environment_and_reports_it(monkeypatch):
+    """Applying a budget exports thread limits for libraries loaded later."""
+    for name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'TOKENIZERS_PARALLELISM'):
+        monkeypatch.delenv(name, raising=False)
+    budget = ThreadBudget(cores=4, workers=2, intra_op=2, inter_op=1, blas=1,
+                          tokenizers_parallelism=False)
+    apply_thread_budget(budget)
+
+    assert os.environ['OMP_NUM_THREADS'] == '2'
+    assert os.environ['OPENBLAS_NUM_THREADS'] == '1'
+    assert os.environ['TOKENIZERS_PARALLELISM'] == 'false'
+    assert effective_settings()['budget']['intra_op'] == 2
+
+
+def test_candidate_splits_divide_cores():
+    """Benchmark candidates use every core."""
+    assert candidate_splits(8) == [1, 2, 4, 8]
+
+
+def test_celery_children_split_cores_without_configured_concurrency(monkeypatch):
+    """Without -c or worker_concurrency, the budget uses Celery's default pool size."""
+    from app.nlp import thread_budget
+    from app.tasks import celery_app as tasks
+
+    applied = []
+    monkeypatch.setattr(thread_budget, 'apply_thread_budget', lambda workers=None: applied.append(workers))
+    monkeypatch.setattr(tasks.settings, 'THREAD_BUDGET_ENABLED', True)
+    monkeypatch.setattr(tasks.settings, 'THREAD_BUDGET_WORKERS', 1)
+    monkeypatch.setattr(tasks.celery_app.conf, 'worker_concurrency', None)
+    monkeypatch.setattr(tasks, '_worker_pool_size', None)
+    monkeypatch.setattr(tasks.os, 'cpu_count', lambda: 6)
+
+    tasks.apply_worker_thread_budget()
+    assert applied == [6]
+
+    # The worker's resolved concurrency (e.g. from -c 3) wins
+    tasks.record_worker_pool_size(sender=types.SimpleNamespace(concurrency=3))
+    tasks.apply_worker_thread_budget()
+    assert applied == [6, 3]
@@ -0,0 +1,61 @@
+from app.nlp.tokenization import TokenCache
+
+
+class WordTokenizer:
+    """Stand-in tokenizer: one id per whitespace-separated word."""
+
+    def __init__(self, name_or_path='word'):
+        self.name_or_path = name_or_path
+        self.calls = 0
+
+    def __len__(self):
+        return 1000
+
+    def __call__(self, text, add_special_tokens=True, truncation=False, max_length=None):
+        self.calls += 1
+        ids = [len(word) for word in text.split()]
+        if truncation and max_length is not None:
+            ids = ids[:max_length]
+        return {'input_ids': ids}
+
+
+def test_same_family_tokenizes_once():
+    """Two tokenizers that encode identically share one cached tokenization."""
+    cache = TokenCache(max_entries=4, prefix_chars=1000)
+    first, second = WordTokenizer('word-a'), WordTokenizer('word-b')
+    text = "one two three four five"
+
+    assert cache.encode(first, text, 3) == [3, 3, 5]
+    assert cache.encode(second, text, 10) == [3, 3, 5, 4, 4]
+    # Only the family probe ran on the second tokenizer
+    assert second.calls == 1
+
+
+def test_truncated_copy_shares_prefix_entry():
+    """A document and its character-truncated copy hit the same entry."""
+    cache = TokenCache(max_entries=4, prefix_chars=20)
+    tokenizer = WordTokenizer()
+    full_text = "alpha beta gamma delta epsilon zeta eta theta"
+
+    first = cache.encode(tokenizer, full_text, 2)
+    calls = tokenizer.calls
+    assert cache.encode(tokenizer, full_text[:30], 2) == first
+    assert tokenizer.calls == calls
+
+
+def test_dense_text_falls_back_to_full_tokenization():
+    """When the cached prefix holds too few tokens, the whole text is tokenized."""
+    cache = TokenCache(max_entries=4, prefix_chars=10)
+    tokenizer = WordTokenizer()
+    text = "a b c d e f g h i j k l"
+
+    assert len(cache.encode(tokenizer, text, 8)) == 8
+
+
+def test_reloaded_tokenizer_keeps_its_family():
+    """A reloaded tokenizer with the same name and vocabulary is not probed again."""
+    cache = TokenCache(max_entries=4, prefix_chars=1000)
+    first, reloaded = WordTokenizer(), WordTokenizer()
+
+    assert cache.family(first) == cache.family(reloaded)
+    assert reloaded.calls == 0
@@ -0,0 +1,41 @@
+import pytest
+import re
+from app.nlp.windowing import aggregate_scores, make_windows, sample_windows
+
+
+class WhitespaceTokenizer:
+    """Minimal fast-tokenizer stand-in returning word offsets."""
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        offsets = [match.span() for match in re.finditer(r'\S+', text)]
+        return {'input_ids': list(range(len(offsets))), 'offset_mapping': offsets}
+
+
+def test_make_windows_overlap():
+    """Test windows slice the original text with the configured overlap."""
+    windows = make_windows("a b c d e f", WhitespaceTokenizer(), window_tokens=4, stride_tokens=3)
+    assert windows == [("a b c d", 4), ("d e f", 3)]
+
+
+def test_sample_windows_keeps_first_and_order():
+    """Test sampling keeps the opening window and document order."""
+    windows = [
+        ("intro", 10),
+        ("the the the the", 10),
+        ("revenue growth exceeded forecasts across regions", 10),
+        ("quarterly dividends increased substantially", 10),
+    ]
+    sampled = sample_windows(windows, 3)
+    assert sampled[0] == windows[0]
+    assert windows[1] not in sampled
+    assert sampled == sorted(sampled, key=windows.index)
+
+
+def test_aggregate_scores_weighted_mean_and_variance():
+    """Test length-weighted aggregation of per-window scores."""
+    aggregated = aggregate_scores(
+        [{'positive': 1.0, 'negative': 0.0}, {'positive': 0.0, 'negative': 1.0}],
+        [3, 1]
+    )
+    assert aggregated['mean']['positive'] == pytest.approx(0.75)
+    assert aggregated['variance']['positive'] == pytest.approx(0.1875)